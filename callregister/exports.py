@@ -0,0 +1,36 @@
+from .filters import CallRegisterFilter
+from .models import CallRegister
+
+CALL_EXPORT_COLUMNS = [
+    ('ID', 'id'),
+    ('Enquiry ID', 'enquiry_id'),
+    ('Candidate Name', 'enquiry__candidate_name'),
+    ('Phone', 'enquiry__phone'),
+    ('Enquiry Status', 'enquiry__enquiry_status'),
+    ('Telecaller', 'telecaller__name'),
+    ('Branch', 'telecaller__branch__branch_name'),
+    ('Call Type', 'call_type'),
+    ('Call Status', 'call_status'),
+    ('Call Outcome', 'call_outcome'),
+    ('Duration (s)', 'call_duration'),
+    ('Call Start', 'call_start_time'),
+    ('Call End', 'call_end_time'),
+    ('Follow Up Date', 'follow_up_date'),
+    ('Next Action', 'next_action'),
+    ('Notes', 'notes'),
+    ('Created At', 'created_at'),
+]
+
+
+def call_export_source(identity, params):
+    # ✅ Same scoping as CallRegisterListCreateView
+    if identity.is_admin:
+        queryset = CallRegister.objects.all()
+    elif identity.telecaller_id:
+        queryset = CallRegister.objects.filter(telecaller_id=identity.telecaller_id)
+    else:
+        queryset = CallRegister.objects.none()
+
+    queryset = CallRegisterFilter(params, queryset=queryset).qs.order_by('-created_at', '-id')
+    headers = [header for header, _ in CALL_EXPORT_COLUMNS]
+    return headers, queryset.values_list(*[path for _, path in CALL_EXPORT_COLUMNS])
@@ -1,88 +1,193 @@
 # enquiry/filters.py
 
+from datetime import date, datetime, time, timedelta
+
 import django_filters
-from .models import CallRegister
+from django import forms
+from django_filters.constants import EMPTY_VALUES
 from django.utils import timezone
+from .models import CallRegister
 
-class NotAnsweredCallsFilter(django_filters.FilterSet):
-    telecaller_name = django_filters.CharFilter(field_name="telecaller__name", lookup_expr="icontains")
-    branch_name = django_filters.CharFilter(field_name="telecaller__branch__branch_name", lookup_expr="icontains")
-    enquiry_date = django_filters.DateFilter(field_name="enquiry__created_at__date")
-    enquiry_status = django_filters.CharFilter(field_name="enquiry__enquiry_status", lookup_expr="iexact")
 
+class CallRegisterFilter(django_filters.FilterSet):
     class Meta:
         model = CallRegister
-        fields = ['telecaller_name', 'branch_name', 'enquiry_date', 'enquiry_status']
-class WalkInListFilter(django_filters.FilterSet):
-    telecaller_name = django_filters.CharFilter(
-        field_name="telecaller__name", lookup_expr="icontains"
-    )
+        fields = ['call_type', 'call_status', 'call_outcome', 'enquiry__enquiry_status']
+
+
+# ---------- shared date handling ----------
+
+def local_midnight(day):
+    """Start of ``day`` in the current time zone, as an aware datetime."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class IsoDateField(forms.DateField):
+    """
+    ``YYYY-MM-DD`` date. Unless ``strict``, a malformed value is treated as
+    absent instead of failing the request, as the call lists always have.
+    """
+
+    def __init__(self, *args, strict=False, **kwargs):
+        kwargs.setdefault('input_formats', ['%Y-%m-%d'])
+        self.strict = strict
+        super().__init__(*args, **kwargs)
+
+    def clean(self, value):
+        try:
+            return super().clean(value)
+        except forms.ValidationError:
+            if self.strict:
+                raise
+            return None
+
+
+class IsoDateFilter(django_filters.DateFilter):
+    field_class = IsoDateField
+
+
+class LocalDateFilter(IsoDateFilter):
+    """
+    Local calendar date applied to a timestamp column as a plain range:
+    ``gte`` filters ``field >= day 00:00``, ``lte`` filters
+    ``field < (day + 1) 00:00`` and ``exact`` both, midnights being in the
+    current time zone. Same rows as the ``__date`` lookups, but without the
+    ``DATE(field)`` cast, so an index on the column can serve the range.
+    """
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        conditions = {}
+        if self.lookup_expr in ('gte', 'exact'):
+            conditions[f'{self.field_name}__gte'] = local_midnight(value)
+        if self.lookup_expr in ('lte', 'exact') and value < date.max:
+            conditions[f'{self.field_name}__lt'] = local_midnight(value + timedelta(days=1))
+        return self.get_method(qs)(**conditions)
+
+
+class CallDateRangeFilter(django_filters.FilterSet):
+    """``start_date`` / ``end_date`` (both inclusive) on the call's ``created_at``."""
+
+    start_date = LocalDateFilter(field_name='created_at', lookup_expr='gte')
+    end_date = LocalDateFilter(field_name='created_at', lookup_expr='lte')
+
+    class Meta:
+        model = CallRegister
+        fields = ['start_date', 'end_date']
+
+
+# ---------- per-list filters ----------
+
+class NotAnsweredCallsFilter(CallDateRangeFilter):
+    call_status = django_filters.CharFilter(field_name="call_status", lookup_expr="iexact")
+    telecaller_name = django_filters.CharFilter(field_name="telecaller__name", lookup_expr="icontains")
+    email = django_filters.CharFilter(field_name="enquiry__email", lookup_expr="icontains")
+    phone = django_filters.CharFilter(field_name="enquiry__phone", lookup_expr="icontains")
+    candidate_name = django_filters.CharFilter(field_name="enquiry__candidate_name", lookup_expr="icontains")
+    enquiry_status = django_filters.CharFilter(field_name="enquiry__enquiry_status", lookup_expr="iexact")
+    enquiry_date = LocalDateFilter(field_name="enquiry__created_at", lookup_expr="exact")
+
+    class Meta(CallDateRangeFilter.Meta):
+        fields = CallDateRangeFilter.Meta.fields + [
+            'call_status', 'telecaller_name', 'email', 'phone',
+            'candidate_name', 'enquiry_status', 'enquiry_date',
+        ]
+
+
+class WalkInListFilter(CallDateRangeFilter):
     branch_name = django_filters.CharFilter(
         field_name="telecaller__branch__branch_name", lookup_expr="icontains"
     )
-    created_at = django_filters.DateFilter(
-        field_name="created_at", lookup_expr="date"
+    telecaller_name = django_filters.CharFilter(
+        field_name="telecaller__name", lookup_expr="icontains"
+    )
+    enquiry_date = LocalDateFilter(
+        field_name="enquiry__created_at", lookup_expr="exact"
     )
-    call_outcome = django_filters.CharFilter(
-        field_name="call_outcome", lookup_expr="iexact"
+    enquiry_status = django_filters.CharFilter(
+        field_name="enquiry__enquiry_status", lookup_expr="iexact"
     )
     call_status = django_filters.CharFilter(
         field_name="call_status", lookup_expr="iexact"
     )
-    candidate_name = django_filters.CharFilter(
-        field_name="enquiry__candidate_name", lookup_expr="icontains"
-    )
 
-    class Meta:
-        model = CallRegister
-        fields = [
-            'telecaller_name',
+    class Meta(CallDateRangeFilter.Meta):
+        fields = CallDateRangeFilter.Meta.fields + [
             'branch_name',
-            'created_at',
-            'call_outcome',
+            'telecaller_name',
+            'enquiry_date',
+            'enquiry_status',
             'call_status',
-            'candidate_name',
         ]
 
 
-
-class FollowUpCallsFilter(django_filters.FilterSet):
+class FollowUpCallsFilter(CallDateRangeFilter):
+    # A bad date here is reported rather than ignored
+    start_date = LocalDateFilter(
+        field_name="created_at", lookup_expr="gte", strict=True,
+        error_messages={'invalid': "Invalid start_date format. Use YYYY-MM-DD."},
+    )
+    end_date = LocalDateFilter(
+        field_name="created_at", lookup_expr="lte", strict=True,
+        error_messages={'invalid': "Invalid end_date format. Use YYYY-MM-DD."},
+    )
+    # ``call_status`` picks the outcome listed; "Follow Up" when not given
+    call_status = django_filters.CharFilter(
+        field_name="call_outcome", lookup_expr="iexact"
+    )
+    candidate_name = django_filters.CharFilter(
+        field_name="enquiry__candidate_name", lookup_expr="icontains"
+    )
     telecaller_name = django_filters.CharFilter(
         field_name="telecaller__name", lookup_expr="icontains"
     )
     branch_name = django_filters.CharFilter(
         field_name="telecaller__branch__branch_name", lookup_expr="icontains"
     )
-    enquiry_date = django_filters.DateFilter(
-        field_name="enquiry__created_at__date"
+
+    class Meta(CallDateRangeFilter.Meta):
+        fields = CallDateRangeFilter.Meta.fields + [
+            "call_status",
+            "candidate_name",
+            "telecaller_name",
+            "branch_name",
+        ]
+
+    def filter_queryset(self, queryset):
+        if not self.form.cleaned_data.get('call_status'):
+            queryset = queryset.filter(call_outcome='Follow Up')
+        return super().filter_queryset(queryset)
+
+
+class InterestedCallsFilter(CallDateRangeFilter):
+    candidate_name = django_filters.CharFilter(
+        field_name="enquiry__candidate_name", lookup_expr="icontains"
+    )
+    branch_name = django_filters.CharFilter(
+        field_name="telecaller__branch__branch_name", lookup_expr="icontains"
+    )
+    telecaller_name = django_filters.CharFilter(
+        field_name="telecaller__name", lookup_expr="icontains"
     )
-    enquiry_status = django_filters.CharFilter(
-        field_name="enquiry__enquiry_status", lookup_expr="iexact"
+    call_status = django_filters.CharFilter(
+        field_name="call_status", lookup_expr="iexact"
     )
-    follow_up_date = django_filters.DateFilter(
-        field_name="follow_up_date"
+    follow_up_date = IsoDateFilter(field_name="follow_up_date")
+    phone_number = django_filters.CharFilter(
+        field_name="enquiry__phone", lookup_expr="icontains"
     )
-    pending_only = django_filters.BooleanFilter(
-        method="filter_pending_only",
-        label="Pending only (follow_up_date ≤ today)"
+    email = django_filters.CharFilter(
+        field_name="enquiry__email", lookup_expr="icontains"
     )
 
-    class Meta:
-        model = CallRegister
-        fields = [
-            "telecaller_name",
+    class Meta(CallDateRangeFilter.Meta):
+        fields = CallDateRangeFilter.Meta.fields + [
+            "candidate_name",
             "branch_name",
-            "enquiry_date",
-            "enquiry_status",
+            "telecaller_name",
+            "call_status",
             "follow_up_date",
-            "pending_only",
+            "phone_number",
+            "email",
         ]
-
-    def filter_pending_only(self, queryset, name, value):
-        """
-        If pending_only=True, only include calls whose follow_up_date is today or earlier.
-        """
-        if value:
-            today = timezone.now().date()
-            return queryset.filter(follow_up_date__lte=today)
-        return queryset
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from callregister.models import sync_latest_calls
+from lead.models import Enquiry
+
+
+class Command(BaseCommand):
+    help = "Fill or repair the Enquiry.latest_call* copies from CallRegister."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        updated, last_id = 0, 0
+
+        # ✅ One UPDATE per id range keeps each statement (and its locks) short
+        while True:
+            ids = list(
+                Enquiry.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            updated += sync_latest_calls(ids)
+            last_id = ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"Synced latest call for {updated} enquiries."))
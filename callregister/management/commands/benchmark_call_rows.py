@@ -0,0 +1,114 @@
+import random
+import statistics
+import string
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from branch.models import Branch
+from callregister.models import CallRegister
+from callregister.rows import call_row_mapper, call_rows
+from callregister.serializers import CallRegisterSerializer
+from lead.models import Enquiry
+from login.models import Account
+from roles.models import Role
+from tellecaller.models import Telecaller
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ("Compare rows per second of CallRegisterSerializer and the values() row mapper "
+            "on call-list pages (rolled back afterwards).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000, help='Calls to insert before measuring.')
+        parser.add_argument('--page-sizes', default='10,100,1000',
+                            help='Comma separated page sizes to measure at.')
+        parser.add_argument('--repeat', type=int, default=20, help='Pages read per size and method.')
+
+    def handle(self, *args, **options):
+        settings.DEBUG = False
+        sizes = sorted(int(n) for n in options['page_sizes'].split(',') if n.strip())
+        try:
+            with transaction.atomic():
+                self._seed(options['rows'])
+                queryset = CallRegister.objects.select_related(
+                    'enquiry', 'telecaller', 'telecaller__branch'
+                ).order_by('-created_at', '-id')
+
+                self.stdout.write(f"{'page':>6} {'serializer rows/s':>18} {'mapper rows/s':>14} {'speedup':>8} {'identical':>10}")
+                for size in sizes:
+                    identical = self._render_serializer(queryset, size) == self._render_mapper(queryset, size)
+                    serializer = self._rows_per_second(lambda: self._render_serializer(queryset, size), size, options['repeat'])
+                    mapper = self._rows_per_second(lambda: self._render_mapper(queryset, size), size, options['repeat'])
+                    self.stdout.write(
+                        f"{size:>6} {serializer:>18,.0f} {mapper:>14,.0f} {mapper / serializer:>7.1f}x "
+                        f"{'yes' if identical else 'NO':>10}"
+                    )
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _seed(self, count):
+        rng = random.Random(42)
+        role, _ = Role.objects.get_or_create(name='Telecaller')
+        branch = Branch.objects.create(branch_name='Benchmark', address='-', city='-', email='benchmark@example.com', contact='0')
+        telecallers = []
+        for i in range(5):
+            account = Account.objects.create_user(f'benchmark{i}@example.com', None, role)
+            telecallers.append(Telecaller.objects.create(
+                account=account, branch=branch, email=account.email, name=f'Benchmark {i}',
+                contact='0', address='-', role=role,
+            ))
+        enquiries = Enquiry.objects.bulk_create([
+            Enquiry(
+                candidate_name=''.join(rng.choices(string.ascii_lowercase, k=10)),
+                phone=''.join(rng.choices(string.digits, k=10)),
+                email=''.join(rng.choices(string.ascii_lowercase, k=8)) + '@example.com',
+                assigned_by=telecallers[i % 5],
+            )
+            for i in range(max(count // 10, 1))
+        ], batch_size=2000)
+
+        now = timezone.now()
+        calls = []
+        for i in range(count):
+            enquiry = enquiries[i % len(enquiries)]
+            calls.append(CallRegister(
+                enquiry=enquiry,
+                telecaller_id=enquiry.assigned_by_id,
+                call_status=rng.choice(['contacted', 'Not Answered', 'Busy']),
+                call_outcome=rng.choice(['Follow Up', 'walk_in_list', 'Interested', None]),
+                call_duration=rng.choice([None, 0, rng.randint(1, 3600)]),
+                call_start_time=now - timedelta(minutes=i),
+                call_end_time=now - timedelta(minutes=i) + timedelta(seconds=90),
+                notes=''.join(rng.choices(string.ascii_lowercase + ' ', k=40)),
+                follow_up_date=(now + timedelta(days=i % 14)).date(),
+            ))
+        CallRegister.objects.bulk_create(calls, batch_size=2000)
+
+    @staticmethod
+    def _render_serializer(queryset, size):
+        return JSONRenderer().render(CallRegisterSerializer(queryset[:size], many=True).data)
+
+    @staticmethod
+    def _render_mapper(queryset, size):
+        to_representation = call_row_mapper()
+        return JSONRenderer().render([to_representation(row) for row in call_rows(queryset)[:size]])
+
+    @staticmethod
+    def _rows_per_second(render, size, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            render()
+            timings.append(time.perf_counter() - started)
+        return size / statistics.median(timings)
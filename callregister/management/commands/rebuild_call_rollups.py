@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from callregister.rollups import rebuild_call_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild CallDailyRollup rows from CallRegister for a date range (all days by default)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-date', help="First day to rebuild (YYYY-MM-DD)")
+        parser.add_argument('--end-date', help="Last day to rebuild (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        dates = {}
+        for name in ('start_date', 'end_date'):
+            value = options[name]
+            if value:
+                dates[name] = parse_date(value)
+                if dates[name] is None:
+                    raise CommandError(f"Invalid --{name.replace('_', '-')}: {value}")
+
+        written = rebuild_call_rollups(**dates)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} call rollup buckets."))
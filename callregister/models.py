@@ -1,6 +1,9 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import OuterRef, Subquery
 from lead.models import Enquiry
 from tellecaller.models import Telecaller
+from branch.models import Branch
+from tellecaller.counters import CounterDeltas
 # Create your models here.
 class CallRegister(models.Model):
     CALL_TYPE_CHOICES = [
@@ -56,6 +59,26 @@ class CallRegister(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Call Register'
         verbose_name_plural = 'Call Registers'
+        indexes = [
+            # Keyset pagination: newest first, overall and per telecaller
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['telecaller', '-created_at', '-id']),
+            # Newest call of an enquiry (see sync_latest_calls)
+            models.Index(fields=['enquiry', '-created_at', '-id']),
+        ]
+
+    # Fields whose stored values the signals need after an edit or delete
+    TRACKED_FIELDS = ('enquiry_id', 'telecaller_id', 'created_at', 'call_status', 'call_outcome', 'call_duration')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_loaded_values()
+        return instance
+
+    def remember_loaded_values(self):
+        # Values as stored, so moving/editing a call can undo its old enquiry and rollup bucket
+        self._loaded_values = {f: self.__dict__.get(f) for f in self.TRACKED_FIELDS}
 
     def __str__(self):
         return f"{self.telecaller.name} - {self.enquiry.candidate_name} - {self.call_start_time}"
@@ -65,7 +88,67 @@ class CallRegister(models.Model):
         if self.call_start_time and self.call_end_time:
             duration = (self.call_end_time - self.call_start_time).total_seconds()
             self.call_duration = int(duration)
-        super().save(*args, **kwargs)
+        # The row and the Enquiry/rollup copies updated by the signals commit together
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class CallDailyRollup(models.Model):
+    """
+    Calls per telecaller and day (``created_at`` in the current time zone),
+    split by status and outcome. Maintained by ``callregister.signals`` and
+    rebuilt with ``manage.py rebuild_call_rollups``.
+    """
+    telecaller = models.ForeignKey(Telecaller, on_delete=models.CASCADE, related_name='call_rollups')
+    # Telecaller's branch when the bucket was last written
+    branch = models.ForeignKey(Branch, on_delete=models.SET_NULL, null=True, blank=True, related_name='call_rollups')
+    day = models.DateField()
+    call_status = models.CharField(max_length=20)
+    # '' for calls without an outcome, so the bucket key has no NULLs
+    call_outcome = models.CharField(max_length=30, blank=True, default='')
+    call_count = models.IntegerField(default=0)
+    total_duration = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['telecaller', 'day', 'call_status', 'call_outcome'],
+                name='callregister_rollup_bucket',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['day']),
+            models.Index(fields=['branch', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.telecaller_id} - {self.day} - {self.call_status}/{self.call_outcome}: {self.call_count}"
 
 
+def sync_latest_calls(enquiry_ids):
+    """
+    Recompute the ``Enquiry.latest_call*`` copies for ``enquiry_ids`` with a
+    single UPDATE. The newest call is the one with the highest
+    ``(created_at, id)``; enquiries without calls are cleared. The assignees'
+    pending follow-up/walk-in counters move with the changed outcomes.
+    """
+    latest = CallRegister.objects.filter(enquiry=OuterRef('pk')).order_by('-created_at', '-id')
+    enquiries = Enquiry.objects.filter(pk__in=enquiry_ids)
+    with transaction.atomic():
+        before = list(enquiries.select_for_update().values_list('assigned_by_id', 'latest_call_outcome'))
+        updated = enquiries.update(
+            latest_call=Subquery(latest.values('id')[:1]),
+            latest_call_status=Subquery(latest.values('call_status')[:1]),
+            latest_call_outcome=Subquery(latest.values('call_outcome')[:1]),
+            last_called_at=Subquery(latest.values('created_at')[:1]),
+            latest_follow_up_date=Subquery(latest.values('follow_up_date')[:1]),
+        )
+        after = enquiries.values_list('assigned_by_id', 'latest_call_outcome')
 
+        deltas = CounterDeltas()
+        for assigned_by_id, outcome in before:
+            deltas.add_pending(assigned_by_id, outcome, sign=-1)
+        for assigned_by_id, outcome in after:
+            deltas.add_pending(assigned_by_id, outcome)
+        deltas.apply()
+    return updated
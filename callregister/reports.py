@@ -0,0 +1,55 @@
+from django.db.models import Q, Count, Max, Subquery
+
+from .models import CallRegister
+
+
+def call_date_q(start_date=None, end_date=None, prefix=''):
+    """Q limiting calls to ``created_at`` dates within the (optional) range."""
+    condition = Q()
+    if start_date:
+        condition &= Q(**{f'{prefix}created_at__date__gte': start_date})
+    if end_date:
+        condition &= Q(**{f'{prefix}created_at__date__lte': end_date})
+    return condition
+
+
+def has_outcome_q(field='latest_call_outcome'):
+    """
+    Q for a non-blank outcome in ``field``: not NULL and not only whitespace
+    (tabs and newlines included, as ``str.strip`` would see it).
+    """
+    return Q(**{f'{field}__isnull': False}) & ~Q(**{f'{field}__regex': r'^\s*$'})
+
+
+def latest_calls(calls):
+    """
+    The latest call (highest id) per (telecaller, enquiry) within ``calls``.
+
+    The ids stay in SQL as a grouped ``MAX(id)`` subquery rather than being
+    materialized in Python.
+    """
+    latest_ids = (
+        calls
+        .order_by()
+        .values('telecaller_id', 'enquiry_id')
+        .annotate(latest_id=Max('id'))
+        .values('latest_id')
+    )
+    return CallRegister.objects.filter(id__in=Subquery(latest_ids))
+
+
+def latest_call_buckets(calls, buckets):
+    """
+    Count the latest calls of ``calls`` per telecaller in one grouped query.
+
+    ``buckets`` maps an output key to the ``Q`` a latest call must match.
+    Returns ``{telecaller_id: {key: count, ...}}``; telecallers without any
+    call in ``calls`` are absent.
+    """
+    rows = (
+        latest_calls(calls)
+        .order_by()
+        .values('telecaller_id')
+        .annotate(**{key: Count('id', filter=condition) for key, condition in buckets.items()})
+    )
+    return {row.pop('telecaller_id'): row for row in rows}
@@ -0,0 +1,146 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum, Count, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from tellecaller.counters import CALL_ROLLUPS, is_backfilled, mark_backfilled
+from .models import CallRegister, CallDailyRollup
+from .reports import call_date_q
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def rollup_bucket(values):
+    """Bucket key for a call, given its tracked field values."""
+    return {
+        'telecaller_id': values['telecaller_id'],
+        'day': timezone.localdate(values['created_at']),
+        'call_status': values['call_status'],
+        'call_outcome': values['call_outcome'] or '',
+    }
+
+
+def add_to_rollup(values, sign=1, branch_id=None):
+    """
+    Add (``sign=1``) or remove (``sign=-1``) one call from its daily bucket.
+
+    Removal never creates a bucket: a missing one means the rollups were
+    not built yet for that day, and a rebuild will count it correctly.
+    """
+    bucket = rollup_bucket(values)
+    duration = sign * (values['call_duration'] or 0)
+    changes = {
+        'call_count': F('call_count') + sign,
+        'total_duration': F('total_duration') + duration,
+    }
+    if sign > 0:
+        changes['branch_id'] = branch_id
+
+    rows = CallDailyRollup.objects.filter(**bucket)
+    if rows.update(**changes) or sign < 0:
+        return
+    try:
+        with transaction.atomic():
+            CallDailyRollup.objects.create(**bucket, branch_id=branch_id, call_count=1, total_duration=duration)
+    except IntegrityError:
+        # Created concurrently by another call write
+        rows.update(**changes)
+
+
+def rollup_totals(buckets, prefix='', condition=None):
+    """
+    ``Sum`` aggregates of ``call_count`` per bucket, for ``aggregate()`` or
+    ``annotate()``. ``buckets`` maps an output key to ``call_status`` /
+    ``call_outcome`` lookups (``{}`` counts every call); ``prefix`` is the
+    path to the rollup model (e.g. ``'call_rollups__'``) and ``condition``
+    an extra ``Q`` every sum must satisfy.
+    """
+    condition = condition or Q()
+    return {
+        key: Coalesce(Sum(
+            f'{prefix}call_count',
+            filter=condition & Q(**{f'{prefix}{lookup}': value for lookup, value in lookups.items()}),
+        ), 0)
+        for key, lookups in buckets.items()
+    }
+
+
+def call_totals(buckets, prefix='', condition=None):
+    """
+    ``rollup_totals`` counted from the calls themselves; ``prefix`` is the
+    path to ``CallRegister`` (e.g. ``'call_logs__'``) and ``condition`` an
+    extra ``Q`` every count must satisfy.
+    """
+    condition = condition or Q()
+    return {
+        key: Count(f'{prefix}id', filter=condition & Q(**{
+            f'{prefix}{lookup}': value for lookup, value in lookups.items()
+        }))
+        for key, lookups in buckets.items()
+    }
+
+
+def telecaller_call_totals(buckets, start_date=None, end_date=None):
+    """
+    ``annotate()`` arguments for a ``Telecaller`` queryset: calls per bucket
+    on days within the (optional) range. Summed from the daily rollups once a
+    full ``rebuild_call_rollups`` has run; counted from the calls until then.
+    """
+    if is_backfilled(CALL_ROLLUPS):
+        return rollup_totals(buckets, 'call_rollups__', rollup_date_q(start_date, end_date, 'call_rollups__'))
+    return call_totals(buckets, 'call_logs__', call_date_q(start_date, end_date, 'call_logs__'))
+
+
+def rollup_date_q(start_date=None, end_date=None, prefix=''):
+    """Q limiting rollups to days within the (optional) range."""
+    condition = Q()
+    if start_date:
+        condition &= Q(**{f'{prefix}day__gte': start_date})
+    if end_date:
+        condition &= Q(**{f'{prefix}day__lte': end_date})
+    return condition
+
+
+def rebuild_call_rollups(start_date=None, end_date=None):
+    """
+    Recompute the rollups for days in ``[start_date, end_date]`` (either
+    bound optional) from ``CallRegister`` in one transaction. Returns the
+    number of buckets written.
+    """
+    calls = CallRegister.objects.order_by()
+    if start_date:
+        calls = calls.filter(created_at__date__gte=start_date)
+    if end_date:
+        calls = calls.filter(created_at__date__lte=end_date)
+
+    rows = (
+        calls
+        .annotate(bucket_day=TruncDate('created_at'), outcome=Coalesce('call_outcome', Value('')))
+        .values('telecaller_id', 'telecaller__branch_id', 'bucket_day', 'call_status', 'outcome')
+        .annotate(calls=Count('id'), duration=Coalesce(Sum('call_duration'), 0))
+    )
+
+    written = 0
+    with transaction.atomic():
+        CallDailyRollup.objects.filter(rollup_date_q(start_date, end_date)).delete()
+        batch = []
+        for row in rows.iterator(chunk_size=REBUILD_BATCH_SIZE):
+            batch.append(CallDailyRollup(
+                telecaller_id=row['telecaller_id'],
+                branch_id=row['telecaller__branch_id'],
+                day=row['bucket_day'],
+                call_status=row['call_status'],
+                call_outcome=row['outcome'],
+                call_count=row['calls'],
+                total_duration=row['duration'],
+            ))
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                CallDailyRollup.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            CallDailyRollup.objects.bulk_create(batch)
+            written += len(batch)
+    if not (start_date or end_date):
+        mark_backfilled(CALL_ROLLUPS)
+    return written
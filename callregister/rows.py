@@ -0,0 +1,121 @@
+from functools import lru_cache
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import F
+from rest_framework.settings import ISO_8601, api_settings
+
+from .serializers import CallRegisterSerializer
+
+# Columns of the call itself, read under their own names
+CALL_ROW_FIELDS = (
+    'id', 'call_type', 'call_status', 'call_outcome', 'call_duration',
+    'call_start_time', 'call_end_time', 'notes', 'follow_up_date', 'next_action',
+    'created_at', 'updated_at',
+)
+
+# Related columns CallRegisterSerializer reads, as values() aliases
+CALL_ROW_RELATED = {
+    'enquiry_pk': F('enquiry_id'),
+    'enquiry_candidate_name': F('enquiry__candidate_name'),
+    'enquiry_phone': F('enquiry__phone'),
+    'enquiry_email': F('enquiry__email'),
+    'enquiry_enquiry_status': F('enquiry__enquiry_status'),
+    'telecaller_name_value': F('telecaller__name'),
+    'branch_name_value': F('telecaller__branch__branch_name'),
+}
+
+
+def call_rows(queryset):
+    """``queryset`` read as values() rows holding exactly the columns ``call_row_mapper`` needs."""
+    return queryset.values(*CALL_ROW_FIELDS, **CALL_ROW_RELATED)
+
+
+_EMPTY_ROW = dict.fromkeys((*CALL_ROW_FIELDS, *CALL_ROW_RELATED))
+
+
+@lru_cache(maxsize=None)
+def _serializer_fields():
+    return CallRegisterSerializer().fields
+
+
+@lru_cache(maxsize=None)
+def _readable_fields():
+    return [name for name, field in _serializer_fields().items() if not field.write_only]
+
+
+def _timestamp(field):
+    """
+    ``field.to_representation`` for aware datetimes in ISO 8601 with the time
+    zone looked up once, not per value; anything else goes through the field.
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or tz is None:
+        return field.to_representation
+
+    def to_representation(value):
+        if not value:
+            return None
+        if value.utcoffset() is None:
+            return field.to_representation(value)
+        try:
+            value = value.astimezone(tz).isoformat()
+        except OverflowError:
+            return field.to_representation(value)
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return to_representation
+
+
+def _date(field):
+    """``field.to_representation`` for dates, without the per-value format lookup."""
+    output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+    return lambda value: value.isoformat() if value else None
+
+
+def call_row_mapper():
+    """
+    Function turning a ``call_rows`` row into ``CallRegisterSerializer``
+    output for that call, key for key and value for value, without model
+    instances or per-field dispatch. Build one per request: timestamps are
+    rendered in the time zone active when it is built, as the serializer does.
+    """
+    fields = _serializer_fields()
+    call_start_time = _timestamp(fields['call_start_time'])
+    call_end_time = _timestamp(fields['call_end_time'])
+    follow_up_date = _date(fields['follow_up_date'])
+    created_at = _timestamp(fields['created_at'])
+    updated_at = _timestamp(fields['updated_at'])
+
+    def to_representation(row):
+        duration = row['call_duration']
+        return {
+            'id': row['id'],
+            'enquiry_details': {
+                'id': row['enquiry_pk'],
+                'candidate_name': row['enquiry_candidate_name'],
+                'phone': row['enquiry_phone'],
+                'email': row['enquiry_email'],
+                'enquiry_status': row['enquiry_enquiry_status'],
+            },
+            'telecaller_name': row['telecaller_name_value'],
+            'branch_name': row['branch_name_value'],
+            'call_type': row['call_type'],
+            'call_status': row['call_status'],
+            'call_outcome': row['call_outcome'],
+            'call_duration': duration,
+            'call_duration_formatted': f"{duration // 60}m {duration % 60}s" if duration else None,
+            'call_start_time': call_start_time(row['call_start_time']),
+            'call_end_time': call_end_time(row['call_end_time']),
+            'notes': row['notes'],
+            'follow_up_date': follow_up_date(row['follow_up_date']),
+            'next_action': row['next_action'],
+            'created_at': created_at(row['created_at']),
+            'updated_at': updated_at(row['updated_at']),
+        }
+
+    # The serializer is the reference: refuse to run once its fields drift from the mapper
+    if list(to_representation(_EMPTY_ROW)) != _readable_fields():
+        raise ImproperlyConfigured("call_row_mapper is out of step with CallRegisterSerializer.Meta.fields")
+    return to_representation
@@ -8,6 +8,7 @@ from rest_framework import serializers
 from .models import CallRegister
 from lead.models import Enquiry
 from tellecaller.models import Telecaller
+from login.identity import get_identity
 from django.utils import timezone
 
 
@@ -68,12 +69,9 @@ class CallRegisterSerializer(serializers.ModelSerializer):
         return None
 
     def validate(self, data):
-        request_user = self.context['request'].user
-        
-        # Get telecaller for the current user
-        try:
-            telecaller = Telecaller.objects.get(account=request_user)
-        except Telecaller.DoesNotExist:
+        # Telecaller of the current user, resolved once per request at authentication
+        telecaller = get_identity(self.context['request']).telecaller
+        if telecaller is None:
             raise serializers.ValidationError("Only telecallers can create call logs.")
         
         # Set the telecaller
@@ -81,7 +79,7 @@ class CallRegisterSerializer(serializers.ModelSerializer):
         
         # Validate enquiry assignment
         enquiry = data.get('enquiry')
-        if enquiry.assigned_by != telecaller:
+        if enquiry.assigned_by_id != telecaller.pk:
             raise serializers.ValidationError({
                 'enquiry_id': 'You can only create call logs for enquiries assigned to you.'
             })
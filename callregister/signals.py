@@ -0,0 +1,72 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from crmtel.report_cache import invalidate_reports_on_commit
+from lead.models import Enquiry
+from tellecaller.counters import CounterDeltas, bump_global
+from .models import CallRegister, sync_latest_calls
+from .rollups import add_to_rollup, rollup_bucket
+
+
+def _current_values(instance):
+    return {f: getattr(instance, f) for f in CallRegister.TRACKED_FIELDS}
+
+
+def _rollup_changed(loaded, current):
+    return (rollup_bucket(loaded) != rollup_bucket(current)
+            or loaded['call_duration'] != current['call_duration'])
+
+
+@receiver(post_save, sender=CallRegister)
+def call_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    current = _current_values(instance)
+    loaded = None if created else getattr(instance, '_loaded_values', None)
+
+    # ✅ Latest-call copies on the enquiry (and on the one it was moved from)
+    enquiry_ids = {current['enquiry_id'], loaded and loaded['enquiry_id']} - {None}
+    sync_latest_calls(enquiry_ids)
+
+    # ✅ Daily rollups: move the call from its stored bucket to the new one
+    if loaded is None or loaded['created_at'] is None:
+        add_to_rollup(current, sign=1, branch_id=instance.telecaller.branch_id)
+    elif _rollup_changed(loaded, current):
+        add_to_rollup(loaded, sign=-1)
+        add_to_rollup(current, sign=1, branch_id=instance.telecaller.branch_id)
+
+    # ✅ Telecaller call counters
+    deltas = CounterDeltas()
+    if loaded is None:
+        deltas.add_call(current['telecaller_id'], current['call_outcome'])
+        bump_global('calls', 1)
+    elif (loaded['telecaller_id'], loaded['call_outcome']) != (current['telecaller_id'], current['call_outcome']):
+        deltas.add_call(loaded['telecaller_id'], loaded['call_outcome'], sign=-1)
+        deltas.add_call(current['telecaller_id'], current['call_outcome'])
+    deltas.apply()
+
+    instance.remember_loaded_values()
+
+
+@receiver(post_delete, sender=CallRegister)
+def call_deleted(sender, instance, origin=None, **kwargs):
+    stored = getattr(instance, '_loaded_values', None) or _current_values(instance)
+    add_to_rollup(stored, sign=-1)
+
+    deltas = CounterDeltas()
+    deltas.add_call(stored['telecaller_id'], stored['call_outcome'], sign=-1)
+    deltas.apply()
+    bump_global('calls', -1)
+
+    # Calls cascading from a deleted enquiry have no latest-call copy left to update
+    if isinstance(origin, Enquiry) or (isinstance(origin, QuerySet) and origin.model is Enquiry):
+        return
+    sync_latest_calls([instance.enquiry_id])
+
+
+@receiver(post_save, sender=CallRegister)
+@receiver(post_delete, sender=CallRegister)
+def invalidate_cached_reports(sender, raw=False, **kwargs):
+    if not raw:
+        invalidate_reports_on_commit()
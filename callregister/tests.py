@@ -1,3 +1,359 @@
-from django.test import TestCase
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.db.models.expressions import Col
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from branch.models import Branch
+from crmtel import report_cache
+from lead.models import Enquiry
+from login.models import Account
+from roles.models import Role
+from tellecaller.counters import CALL_ROLLUPS, TELECALLER_COUNTERS, is_backfilled, mark_backfilled
+from tellecaller.models import GlobalCounter, Telecaller
+from callregister.filters import CallDateRangeFilter
+from callregister.views import callsPagination
+from callregister.models import CallDailyRollup, CallRegister
+from callregister.rollups import rebuild_call_rollups, telecaller_call_totals
+
+
+class CallRegisterTestData(TestCase):
+    """One branch with two telecallers, and helpers to add calls for them."""
+
+    @classmethod
+    def setUpTestData(cls):
+        role = Role.objects.create(name='Telecaller')
+        branch = Branch.objects.create(branch_name='Main', address='-', city='-', email='main@example.com', contact='0')
+        cls.telecallers = []
+        for i in range(2):
+            account = Account.objects.create_user(f'caller{i}@example.com', 'pw', role)
+            cls.telecallers.append(Telecaller.objects.create(
+                account=account, branch=branch, email=account.email, name=f'Caller {i}',
+                contact='0', address='-', role=role,
+            ))
+
+    def setUp(self):
+        cache.clear()
+        report_cache._local_version = None  # the version row is rolled back with each test
+
+    def client_for(self, telecaller):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(telecaller.account).access_token}')
+        return client
+
+    def add_calls(self, telecaller, count, **fields):
+        outcomes = ['Follow Up', 'walk_in_list', 'Interested', 'Converted', 'Not Interested', None]
+        statuses = ['contacted', 'Not Answered', 'Busy']
+        now = timezone.now()
+        enquiries = [
+            Enquiry.objects.create(candidate_name=f'Lead {i}', phone=f'9{i:09d}', email=f'lead{i}@example.com',
+                                   assigned_by=telecaller)
+            for i in range(max(count // 5, 1))
+        ]
+        CallRegister.objects.bulk_create([
+            CallRegister(
+                enquiry=enquiries[i % len(enquiries)], telecaller=telecaller,
+                call_status=statuses[i % len(statuses)], call_outcome=outcomes[i % len(outcomes)],
+                call_duration=60 * i, call_start_time=now - timedelta(days=i % 40),
+                follow_up_date=(now - timedelta(days=i % 3)).date(), **fields,
+            )
+            for i in range(count)
+        ])
+
+
+class TelecallerCallStatsQueryTests(CallRegisterTestData):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        mark_backfilled(TELECALLER_COUNTERS)
+
+    def stats_queries(self, telecaller):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_for(telecaller).get('/api/calls/stats/')
+        self.assertEqual(response.status_code, 200)
+        return response.json(), [q['sql'] for q in queries]
+
+    def test_stats_are_one_query(self):
+        telecaller = self.telecallers[0]
+        self.add_calls(telecaller, 1)
+        self.stats_queries(telecaller)  # first use creates the report version row
+        stats, few = self.stats_queries(telecaller)
+        self.assertEqual(stats['total_calls'], 1)
+
+        self.add_calls(telecaller, 300)
+        self.add_calls(self.telecallers[1], 100)
+        stats, many = self.stats_queries(telecaller)
+        self.assertEqual(stats['total_calls'], 301)
+        self.assertEqual(len(many), len(few))
+
+        # Everything but the identity and report-version lookups is the one aggregate
+        figures = [sql for sql in many if 'login_account' not in sql and 'tellecaller_globalcounter' not in sql]
+        self.assertEqual(len(figures), 1, figures)
+        self.assertIn('callregister_callregister', figures[0])
+
+    def test_figures_come_from_the_callers_own_calls(self):
+        self.add_calls(self.telecallers[0], 30)
+        self.add_calls(self.telecallers[1], 12)
+        stats, _ = self.stats_queries(self.telecallers[1])
+        calls = CallRegister.objects.filter(telecaller=self.telecallers[1])
+        self.assertEqual(stats['total_calls'], 12)
+        self.assertEqual(stats['connected_calls'], calls.filter(call_status='contacted').count())
+        self.assertEqual(stats['follow_ups_required'], calls.filter(call_outcome='Follow Up').count())
+        self.assertEqual(stats['assigned_enquiries'], Enquiry.objects.filter(assigned_by=self.telecallers[1]).count())
+
+
+class CallDateRangeFilterTests(CallRegisterTestData):
+    KOLKATA = ZoneInfo('Asia/Kolkata')
+
+    def filtered(self, **params):
+        return CallDateRangeFilter(params, queryset=CallRegister.objects.all()).qs
+
+    def conditions(self, queryset):
+        """``(column, lookup, value)`` of every WHERE condition, failing on anything but a bare column."""
+        found = []
+        for lookup in queryset.query.where.children:
+            self.assertIsInstance(lookup.lhs, Col, f"{lookup.lhs!r} wraps the column")
+            found.append((lookup.lhs.target.name, lookup.lookup_name, lookup.rhs))
+        return found
+
+    def test_dates_become_a_half_open_created_at_range(self):
+        with timezone.override(self.KOLKATA):
+            queryset = self.filtered(start_date='2026-10-02', end_date='2026-10-04')
+        self.assertEqual(sorted(self.conditions(queryset)), [
+            ('created_at', 'gte', datetime(2026, 10, 2, tzinfo=self.KOLKATA)),
+            ('created_at', 'lt', datetime(2026, 10, 5, tzinfo=self.KOLKATA)),
+        ])
+
+    def test_each_bound_is_optional(self):
+        self.assertEqual(self.conditions(self.filtered(end_date='2026-10-04')), [
+            ('created_at', 'lt', datetime(2026, 10, 5, tzinfo=timezone.get_current_timezone())),
+        ])
+        self.assertEqual(self.conditions(self.filtered(start_date='not-a-date')), [])
+
+    def test_same_calls_as_created_at_date_lookups(self):
+        self.add_calls(self.telecallers[0], 48)
+        start = timezone.make_aware(datetime(2026, 10, 1), self.KOLKATA)
+        for i, call in enumerate(CallRegister.objects.order_by('id')):
+            CallRegister.objects.filter(pk=call.pk).update(created_at=start + timedelta(hours=3 * i, minutes=29))
+
+        with timezone.override(self.KOLKATA):
+            for first, last in [(date(2026, 10, 2), date(2026, 10, 4)), (date(2026, 10, 3), date(2026, 10, 3))]:
+                expected = CallRegister.objects.filter(created_at__date__gte=first, created_at__date__lte=last)
+                actual = self.filtered(start_date=first.isoformat(), end_date=last.isoformat())
+                self.assertTrue(expected.exists())
+                self.assertQuerySetEqual(actual.order_by('id'), expected.order_by('id'))
+
+    def test_range_is_served_by_the_created_at_index(self):
+        vendor = connection.vendor
+        if vendor not in ('sqlite', 'postgresql'):
+            self.skipTest(f"no plan expectations for {vendor}")
+        self.add_calls(self.telecallers[0], 200)
+        index = next(i.name for i in CallRegister._meta.indexes if i.fields[0] == '-created_at')
+        queryset = self.filtered(start_date='2026-10-02', end_date='2026-10-04')
+
+        if vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                # A table this small is cheaper to scan; ask whether the index can serve the range
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = queryset.explain()
+            self.assertIn(index, plan)
+            self.assertIn('Index Cond', plan)
+        else:
+            plan = queryset.explain()
+            self.assertIn(f'SEARCH callregister_callregister USING INDEX {index} (created_at>? AND created_at<?)', plan)
+
+        # The __date lookup it replaces casts the column and can only scan
+        old_plan = CallRegister.objects.filter(created_at__date__gte=date(2026, 10, 2)).explain()
+        self.assertNotIn('Index Cond', old_plan)
+        self.assertNotIn('SEARCH', old_plan)
+
+
+class KeysetPaginationTests(CallRegisterTestData):
+
+    def setUp(self):
+        super().setUp()
+        self.telecaller = self.telecallers[0]
+        self.add_calls(self.telecaller, 23)
+        # Three calls per timestamp, so pages have to break ties on id
+        start = timezone.now() - timedelta(days=1)
+        for i, pk in enumerate(CallRegister.objects.order_by('id').values_list('id', flat=True)):
+            CallRegister.objects.filter(pk=pk).update(created_at=start + timedelta(minutes=i // 3))
+        self.newest_first = list(CallRegister.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def get_page(self, cursor='', limit=4):
+        response = self.client_for(self.telecaller).get('/api/calls/', {'cursor': cursor, 'limit': limit})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        return [row['id'] for row in body['data']], body['pagination']
+
+    def paginate(self, queryset, cursor='', limit=4):
+        paginator = callsPagination()
+        request = Request(APIRequestFactory().get('/', {'cursor': cursor, 'limit': limit}))
+        return paginator, paginator.paginate_queryset(queryset, request)
+
+    def test_next_cursors_walk_every_call_once_across_tied_timestamps(self):
+        seen, pages = [], []
+        ids, pagination = self.get_page()
+        self.assertFalse(pagination['hasPrevious'])
+        while True:
+            seen += ids
+            pages.append((ids, pagination))
+            if not pagination['hasNext']:
+                break
+            ids, pagination = self.get_page(pagination['next'])
+
+        self.assertEqual(seen, self.newest_first)
+        self.assertEqual([len(ids) for ids, _ in pages], [4, 4, 4, 4, 4, 3])
+        self.assertIsNone(pagination['next'])
+
+        # previous cursors lead back through the same pages
+        for n in range(len(pages) - 1, 0, -1):
+            previous_ids, previous = self.get_page(pages[n][1]['previous'])
+            self.assertEqual(previous_ids, pages[n - 1][0])
+        self.assertFalse(previous['hasPrevious'])
+        self.assertIsNone(previous['previous'])
+
+    def test_cursor_round_trips(self):
+        paginator, page = self.paginate(CallRegister.objects.all())
+        direction, position = paginator.decode_cursor(paginator.next_cursor)
+        self.assertEqual((direction, position), ('next', (page[-1].created_at, page[-1].id)))
+        self.assertEqual(paginator.decode_cursor(paginator.encode_cursor('previous', page[0])),
+                         ('previous', (page[0].created_at, page[0].id)))
+
+    def test_values_rows_page_like_model_instances(self):
+        rows = CallRegister.objects.values('id', 'created_at', 'call_status')
+        paginator, page = self.paginate(rows)
+        self.assertTrue(paginator.cursor_mode)
+        self.assertEqual([row['id'] for row in page], self.newest_first[:4])
+        _, page = self.paginate(rows, paginator.next_cursor)
+        self.assertEqual([row['id'] for row in page], self.newest_first[4:8])
+
+        # Rows without the cursor key fall back to page numbers
+        paginator, page = self.paginate(CallRegister.objects.order_by('-id').values('id', 'call_status'))
+        self.assertFalse(paginator.cursor_mode)
+        self.assertEqual(len(page), 4)
+
+    def test_malformed_cursor_is_not_found(self):
+        response = self.client_for(self.telecaller).get('/api/calls/', {'cursor': 'bm90IGEgY3Vyc29y'})
+        self.assertEqual(response.status_code, 404)
+
+
+class CallRollupTests(CallRegisterTestData):
+
+    def buckets(self):
+        return sorted(
+            CallDailyRollup.objects.exclude(call_count=0)
+            .values_list('telecaller_id', 'branch_id', 'day', 'call_status', 'call_outcome', 'call_count', 'total_duration')
+        )
+
+    def assert_matches_rebuild(self):
+        incremental = self.buckets()
+        rebuild_call_rollups()
+        self.assertEqual(incremental, self.buckets())
+        return incremental
+
+    def test_incremental_rollups_match_a_rebuild_after_creates_updates_and_deletes(self):
+        first, second = self.telecallers
+        self.add_calls(first, 10)  # bulk_create: no signals, so start from a rebuild
+        rebuild_call_rollups()
+
+        enquiry = Enquiry.objects.create(candidate_name='Lead', phone='9111111111', email='lead@example.com')
+        calls = [
+            CallRegister.objects.create(enquiry=enquiry, telecaller=first, call_status='contacted',
+                                        call_outcome=outcome, call_duration=30, call_start_time=timezone.now())
+            for outcome in ('Follow Up', None, 'Interested')
+        ]
+        self.assert_matches_rebuild()
+
+        calls[0].call_outcome = 'walk_in_list'
+        calls[0].call_duration = 95
+        calls[0].save()
+        calls[1].telecaller = second
+        calls[1].save()
+        calls[2].created_at = calls[2].created_at - timedelta(days=2)
+        calls[2].save()
+        self.assert_matches_rebuild()
+
+        calls[0].delete()
+        CallRegister.objects.filter(pk=calls[2].pk).delete()
+        buckets = self.assert_matches_rebuild()
+        self.assertEqual(sum(bucket[5] for bucket in buckets), 11)
+
+
+class CallTotalsFallbackTests(CallRegisterTestData):
+
+    def totals(self, **dates):
+        buckets = {'calls': {}, 'contacted': {'call_status': 'contacted'}}
+        return list(
+            Telecaller.objects.annotate(**telecaller_call_totals(buckets, **dates))
+            .order_by('id').values_list('calls', 'contacted')
+        )
+
+    def assert_totals(self, expected):
+        today = timezone.localdate()
+        self.assertEqual(self.totals(), expected)
+        self.assertEqual(self.totals(start_date=today, end_date=today), expected)
+        self.assertEqual(self.totals(end_date=today - timedelta(days=1)), [(0, 0), (0, 0)])
+
+    def test_totals_are_counted_from_calls_until_the_rollups_are_built(self):
+        self.add_calls(self.telecallers[0], 9)  # bulk_create: no rollups yet
+        self.assert_totals([(9, 3), (0, 0)])
+
+        rebuild_call_rollups(start_date=timezone.localdate())  # a partial rebuild proves nothing
+        self.assertFalse(is_backfilled(CALL_ROLLUPS))
+
+        rebuild_call_rollups()
+        self.assertTrue(is_backfilled(CALL_ROLLUPS))
+        with CaptureQueriesContext(connection) as queries:
+            self.assert_totals([(9, 3), (0, 0)])
+        self.assertIn('callregister_calldailyrollup', queries[0]['sql'])
+
+
+class ReportVersionTests(CallRegisterTestData):
+
+    def stats(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_for(self.telecallers[0]).get('/api/calls/stats/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['total_calls'], [q['sql'] for q in queries]
+
+    def test_a_transaction_bumps_the_version_once(self):
+        self.add_calls(self.telecallers[0], 10)  # creates two enquiries
+        Enquiry.objects.create(candidate_name='Lead', phone='9111111111', email='lead@example.com')
+        queued = [func for _, func, _ in connection.run_on_commit if func is report_cache.bump_report_version]
+        self.assertEqual(len(queued), 1)
+
+    @override_settings(REPORT_VERSION_TTL=60)
+    def test_cache_hits_do_not_read_the_version_again(self):
+        self.stats()
+        _, queries = self.stats()
+        self.assertFalse([sql for sql in queries if 'tellecaller_globalcounter' in sql], queries)
+
+        # This process's own bumps are seen at once
+        self.add_calls(self.telecallers[0], 5)
+        report_cache.bump_report_version()
+        self.assertEqual(self.stats()[0], 5)
+
+    def test_bumps_by_other_processes_are_seen_after_the_ttl(self):
+        self.stats()
+        CallRegister.objects.bulk_create([CallRegister(
+            enquiry=Enquiry.objects.create(candidate_name='Lead', phone='9111111111', email='lead@example.com'),
+            telecaller=self.telecallers[0], call_status='contacted', call_start_time=timezone.now(),
+        )])
+        # Another worker's bump, which this process has not seen yet
+        GlobalCounter.objects.filter(name=report_cache.VERSION_COUNTER).update(value=F('value') + 1)
+
+        with override_settings(REPORT_VERSION_TTL=60):
+            self.assertEqual(self.stats()[0], 0)
+        with override_settings(REPORT_VERSION_TTL=0):
+            self.assertEqual(self.stats()[0], 1)
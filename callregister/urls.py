@@ -2,6 +2,7 @@ from django.urls import path
 from .views import (
     CallRegisterListCreateView,
     CallRegisterDetailView,
+    CallRegisterExportView,
     TelecallerCallStatsView,
     FollowUpCallsView,
     WalkInListView,
@@ -11,6 +12,7 @@ from .views import (
 urlpatterns = [
     # Basic CRUD operations
     path('calls/', CallRegisterListCreateView.as_view(), name='call-register-list-create'),
+    path('calls/export/', CallRegisterExportView.as_view(), name='call-register-export'),
     path('calls/<int:pk>/', CallRegisterDetailView.as_view(), name='call-register-detail'),
     
     # Statistics and Dashboard
@@ -7,18 +7,30 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter 
 from .serializers import CallRegisterSerializer
 from .models import CallRegister
+from .filters import (
+    CallRegisterFilter, FollowUpCallsFilter, WalkInListFilter,
+    NotAnsweredCallsFilter, InterestedCallsFilter,
+)
+from .rows import call_rows, call_row_mapper
+from .reports import has_outcome_q
 from lead.models import Enquiry
 from tellecaller.models import Telecaller
 from datetime import timedelta
 from rest_framework.pagination import PageNumberPagination
+from crmtel.pagination import KeysetPaginationMixin, CountStrategyMixin
 from rest_framework.generics import ListAPIView ,GenericAPIView
 from rest_framework import serializers
 from collections import defaultdict
-from datetime import datetime
 from rest_framework.views import APIView
-from django.db.models import Q  
+from lead.exports import export_response
+from lead.search import IndexedSearchFilter, enquiry_text_q
+from .rollups import telecaller_call_totals
+from tellecaller.counters import counter_values, global_counts
+from crmtel.report_cache import cached_report
+from django.db.models import Q, Count, Sum, F
+from django.db.models.functions import Coalesce, TruncDate
 # ✅ Custom Pagination Class
-class callsPagination(PageNumberPagination):
+class callsPagination(KeysetPaginationMixin, CountStrategyMixin, PageNumberPagination):
     page_size = 10
     page_size_query_param = 'limit'
     max_page_size = 100
@@ -28,8 +40,9 @@ class callsPagination(PageNumberPagination):
             "code": 200,
             "message": "Data fetched successfully",
             "data": data,
-            "pagination": {
+            "pagination": self.get_cursor_pagination() if self.cursor_mode else {
                 "total": self.page.paginator.count,
+                "totalExact": self.page.paginator.count_is_exact,
                 "page": self.page.number,
                 "limit": self.get_page_size(self.request),
                 "totalPages": self.page.paginator.num_pages,
@@ -38,31 +51,45 @@ class callsPagination(PageNumberPagination):
             }
         })
 
+class CallRowsListMixin:
+    """
+    Read path of the call lists: the filtered, ordered queryset is read with
+    values() and rendered by ``call_row_mapper``, giving the same JSON as
+    ``CallRegisterSerializer`` without building model instances.
+    """
+
+    def list(self, request, *args, **kwargs):
+        rows = call_rows(self.filter_queryset(self.get_queryset()))
+        to_representation = call_row_mapper()
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response([to_representation(row) for row in page])
+        return Response([to_representation(row) for row in rows])
+
 # ✅ List and Create Call Logs
-class CallRegisterListCreateView(generics.ListCreateAPIView):
+class CallRegisterListCreateView(CallRowsListMixin, generics.ListCreateAPIView):
     serializer_class = CallRegisterSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = callsPagination
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['call_type', 'call_status', 'call_outcome', 'enquiry__enquiry_status']
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, OrderingFilter]
+    filterset_class = CallRegisterFilter
     search_fields = ['enquiry__candidate_name', 'enquiry__phone', 'notes']
     ordering_fields = ['call_start_time', 'created_at', 'call_duration']
     ordering = ['-created_at']
 
     def get_queryset(self):
-        user = self.request.user
-        if user.role and user.role.name == 'Admin':
+        identity = self.request.crm_identity
+        if identity.is_admin:
             queryset = CallRegister.objects.select_related(
                 'enquiry', 'telecaller', 'telecaller__branch'
             ).all()
+        elif identity.telecaller_id:
+            queryset = CallRegister.objects.select_related(
+                'enquiry', 'telecaller', 'telecaller__branch'
+            ).filter(telecaller_id=identity.telecaller_id)
         else:
-            try:
-                telecaller = Telecaller.objects.get(account=user)
-                queryset = CallRegister.objects.select_related(
-                    'enquiry', 'telecaller', 'telecaller__branch'
-                ).filter(telecaller=telecaller)
-            except Telecaller.DoesNotExist:
-                return CallRegister.objects.none()
+            return CallRegister.objects.none()
         
         # Custom filtering for call outcomes
         call_outcome = self.request.query_params.get('call_outcome', None)
@@ -78,13 +105,21 @@ class CallRegisterListCreateView(generics.ListCreateAPIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+# ✅ Export Call Logs (CSV stream or queued XLSX)
+class CallRegisterExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return export_response(request, 'calls')
+
 # ✅ Follow Up Calls View with Pagination
 
-class FollowUpCallsView(generics.ListAPIView):
+class FollowUpCallsView(CallRowsListMixin, generics.ListAPIView):
     serializer_class = CallRegisterSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = callsPagination
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, OrderingFilter]
+    filterset_class = FollowUpCallsFilter
 
     search_fields = [
         'enquiry__candidate_name',
@@ -97,155 +132,69 @@ class FollowUpCallsView(generics.ListAPIView):
     ordering = ['-created_at']
 
     def get_queryset(self):
-        user = self.request.user
-        query_params = self.request.query_params
-        filters = Q()
+        identity = self.request.crm_identity
+        filters = Q()  # outcome defaults to "Follow Up" in the filter
 
         # 🔐 Restrict to current telecaller if not admin
-        if user.role and user.role.name != 'Admin':
-            try:
-                telecaller = Telecaller.objects.get(account=user)
-                filters &= Q(telecaller=telecaller)
-            except Telecaller.DoesNotExist:
+        if not identity.is_admin:
+            if not identity.telecaller_id:
                 return CallRegister.objects.none()
+            filters &= Q(telecaller_id=identity.telecaller_id)
 
-        # 🔍 Query params
-        candidate_name  = query_params.get('candidate_name', '').strip()
-        telecaller_name = query_params.get('telecaller_name', '').strip()
-        branch_name     = query_params.get('branch_name', '').strip()
-        call_status     = query_params.get('call_status', '').strip()
-        start_date      = query_params.get('start_date', '').strip()
-        end_date        = query_params.get('end_date', '').strip()
-
-        # 🗓️ Date filtering (created_at)
-        if start_date:
-            try:
-                start = datetime.strptime(start_date, '%Y-%m-%d').date()
-                filters &= Q(created_at__date__gte=start)
-            except ValueError:
-                raise ValidationError({"error": "Invalid start_date format. Use YYYY-MM-DD."})
-
-        if end_date:
-            try:
-                end = datetime.strptime(end_date, '%Y-%m-%d').date()
-                filters &= Q(created_at__date__lte=end)
-            except ValueError:
-                raise ValidationError({"error": "Invalid end_date format. Use YYYY-MM-DD."})
-
-        # 📌 Outcome filter
-        if call_status:
-            filters &= Q(call_outcome__iexact=call_status)
-        else:
-            filters &= Q(call_outcome='Follow Up')
-
-        if candidate_name:
-            filters &= Q(enquiry__candidate_name__icontains=candidate_name)
-
-        if telecaller_name:
-            filters &= Q(telecaller__name__icontains=telecaller_name)
-
-        if branch_name:
-            filters &= Q(telecaller__branch__name__icontains=branch_name)
-
+        # 🔍 Query params (incl. start_date / end_date) are applied by FollowUpCallsFilter
         return CallRegister.objects.select_related(
             'enquiry', 'telecaller', 'telecaller__branch'
         ).filter(filters)
 # ✅ Walk-in List View with Pagination
-class WalkInListView(generics.ListAPIView):
+class WalkInListView(CallRowsListMixin, generics.ListAPIView):
     serializer_class = CallRegisterSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = callsPagination
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, OrderingFilter]
+    filterset_class = WalkInListFilter
 
     search_fields = ['enquiry__candidate_name', 'enquiry__phone', 'enquiry__email']
     ordering_fields = ['call_start_time', 'created_at']
     ordering = ['-created_at']  # Default ordering
 
     def get_queryset(self):
-        user = self.request.user
-        query_params = self.request.query_params
-
+        identity = self.request.crm_identity
         filters = Q(call_outcome='walk_in_list')
 
-        if user.role and user.role.name != 'Admin':
-            try:
-                telecaller = Telecaller.objects.get(account=user)
-                filters &= Q(telecaller=telecaller)
-            except Telecaller.DoesNotExist:
+        # 🔐 Restrict to current telecaller if not admin
+        if not identity.is_admin:
+            if not identity.telecaller_id:
                 return CallRegister.objects.none()
+            filters &= Q(telecaller_id=identity.telecaller_id)
 
-        # 🧠 Optional filters
-        branch_name     = query_params.get('branch_name', '').strip()
-        telecaller_name = query_params.get('telecaller_name', '').strip()
-        enquiry_date    = query_params.get('enquiry_date', '').strip()
-        enquiry_status  = query_params.get('enquiry_status', '').strip()
-        call_status     = query_params.get('call_status', '').strip()
-        start_date      = query_params.get('start_date', '').strip()
-        end_date        = query_params.get('end_date', '').strip()
-
-        if branch_name:
-            filters &= Q(telecaller__branch__branch_name__icontains=branch_name)
-
-        if telecaller_name:
-            filters &= Q(telecaller__name__icontains=telecaller_name)
-
-        if enquiry_date:
-            try:
-                date_obj = datetime.strptime(enquiry_date, '%Y-%m-%d').date()
-                filters &= Q(enquiry__created_at__date=date_obj)
-            except ValueError:
-                pass
-
-        if enquiry_status:
-            filters &= Q(enquiry__enquiry_status__iexact=enquiry_status)
-
-        if call_status:
-            filters &= Q(call_status__iexact=call_status)
-
-        # 🗓️ Date range filtering (based on `created_at`)
-        if start_date:
-            try:
-                start = datetime.strptime(start_date, '%Y-%m-%d')
-                filters &= Q(created_at__date__gte=start)
-            except ValueError:
-                pass
-
-        if end_date:
-            try:
-                end = datetime.strptime(end_date, '%Y-%m-%d')
-                filters &= Q(created_at__date__lte=end)
-            except ValueError:
-                pass
-
+        # 🔍 Query params (incl. start_date / end_date) are applied by WalkInListFilter
         return CallRegister.objects.select_related(
             'enquiry', 'telecaller', 'telecaller__branch'
         ).filter(filters)
 # ✅ Call Outcome Filter View (Generic for all outcomes)
-class CallOutcomeFilterView(generics.ListAPIView):
+class CallOutcomeFilterView(CallRowsListMixin, generics.ListAPIView):
     serializer_class = CallRegisterSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = callsPagination
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, OrderingFilter]
     search_fields = ['enquiry__candidate_name', 'enquiry__phone', 'notes']
     ordering_fields = ['call_start_time', 'created_at', 'call_duration']
     ordering = ['-created_at']
 
     def get_queryset(self):
-        user = self.request.user
+        identity = self.request.crm_identity
         outcome = self.kwargs.get('outcome')  # Get outcome from URL parameter
         
-        if user.role and user.role.name == 'Admin':
+        if identity.is_admin:
             queryset = CallRegister.objects.select_related(
                 'enquiry', 'telecaller', 'telecaller__branch'
             ).all()
+        elif identity.telecaller_id:
+            queryset = CallRegister.objects.select_related(
+                'enquiry', 'telecaller', 'telecaller__branch'
+            ).filter(telecaller_id=identity.telecaller_id)
         else:
-            try:
-                telecaller = Telecaller.objects.get(account=user)
-                queryset = CallRegister.objects.select_related(
-                    'enquiry', 'telecaller', 'telecaller__branch'
-                ).filter(telecaller=telecaller)
-            except Telecaller.DoesNotExist:
-                return CallRegister.objects.none()
+            return CallRegister.objects.none()
         
         # Filter by outcome if provided
         if outcome:
@@ -259,72 +208,67 @@ class CallRegisterDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
-        if user.role and user.role.name == 'Admin':
+        identity = self.request.crm_identity
+        if identity.is_admin:
             return CallRegister.objects.select_related(
                 'enquiry', 'telecaller', 'telecaller__branch'
             ).all()
-        try:
-            telecaller = Telecaller.objects.get(account=user)
-            return CallRegister.objects.select_related(
-                'enquiry', 'telecaller', 'telecaller__branch'
-            ).filter(telecaller=telecaller)
-        except Telecaller.DoesNotExist:
+        if not identity.telecaller_id:
             return CallRegister.objects.none()
+        return CallRegister.objects.select_related(
+            'enquiry', 'telecaller', 'telecaller__branch'
+        ).filter(telecaller_id=identity.telecaller_id)
 
 # ✅ Telecaller Call Statistics View with Outcome Breakdown
 class TelecallerCallStatsView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
 
+    @cached_report('call-stats')
     def get(self, request):
-        user = request.user
-        try:
-            telecaller = Telecaller.objects.get(account=user)
-        except Telecaller.DoesNotExist:
+        telecaller = request.crm_identity.telecaller
+        if telecaller is None:
             return Response(
                 {'error': 'Only telecallers can access call stats.'}, 
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        call_logs = CallRegister.objects.filter(telecaller=telecaller)
         today = timezone.now().date()
-        today_calls = call_logs.filter(call_start_time__date=today)
         week_start = today - timedelta(days=today.weekday())
-        week_calls = call_logs.filter(call_start_time__date__gte=week_start)
-        month_calls = call_logs.filter(
-            call_start_time__year=today.year,
-            call_start_time__month=today.month
-        )
-
-        stats = {
-            'total_calls': call_logs.count(),
-            'today_calls': today_calls.count(),
-            'week_calls': week_calls.count(),
-            'month_calls': month_calls.count(),
-
-            'connected_calls': call_logs.filter(call_status='contacted').count(),
-            'not_answered_calls': call_logs.filter(call_status='Not Answered').count(),
-            'busy_calls': call_logs.filter(call_status='Busy').count(),
+        today_q = Q(call_start_time__date=today)
+
+        # ✅ Every call-log figure in a single conditional-aggregation query
+        stats = CallRegister.objects.filter(telecaller=telecaller).aggregate(
+            total_calls=Count('id'),
+            today_calls=Count('id', filter=today_q),
+            week_calls=Count('id', filter=Q(call_start_time__date__gte=week_start)),
+            month_calls=Count('id', filter=Q(
+                call_start_time__year=today.year,
+                call_start_time__month=today.month
+            )),
+
+            connected_calls=Count('id', filter=Q(call_status='contacted')),
+            not_answered_calls=Count('id', filter=Q(call_status='Not Answered')),
+            busy_calls=Count('id', filter=Q(call_status='Busy')),
 
             # Enhanced outcome statistics
-            'interested_prospects': call_logs.filter(call_outcome='Interested').count(),
-            'converted_leads': call_logs.filter(call_outcome='Converted').count(),
-            'follow_ups_required': call_logs.filter(call_outcome='Follow Up').count(),
-            'walk_in_list': call_logs.filter(call_outcome='walk_in_list').count(),
-            'not_interested': call_logs.filter(call_outcome='Not Interested').count(),
-            'callback_requested': call_logs.filter(call_outcome='Callback Requested').count(),
-            'information_provided': call_logs.filter(call_outcome='Information Provided').count(),
-            'do_not_call': call_logs.filter(call_outcome='Do Not Call').count(),
-
-            'total_call_time': sum([log.call_duration or 0 for log in call_logs]),
-            'today_call_time': sum([log.call_duration or 0 for log in today_calls]),
-
-            'assigned_enquiries': Enquiry.objects.filter(assigned_by=telecaller).count(),
-            'pending_follow_ups': call_logs.filter(
-                call_outcome='Follow Up',
-                follow_up_date__lte=today
-            ).count(),
-        }
+            interested_prospects=Count('id', filter=Q(call_outcome='Interested')),
+            converted_leads=Count('id', filter=Q(call_outcome='Converted')),
+            follow_ups_required=Count('id', filter=Q(call_outcome='Follow Up')),
+            walk_in_list=Count('id', filter=Q(call_outcome='walk_in_list')),
+            not_interested=Count('id', filter=Q(call_outcome='Not Interested')),
+            callback_requested=Count('id', filter=Q(call_outcome='Callback Requested')),
+            information_provided=Count('id', filter=Q(call_outcome='Information Provided')),
+            do_not_call=Count('id', filter=Q(call_outcome='Do Not Call')),
+
+            total_call_time=Coalesce(Sum('call_duration'), 0),
+            today_call_time=Coalesce(Sum('call_duration', filter=today_q), 0),
+
+            pending_follow_ups=Count('id', filter=Q(call_outcome='Follow Up', follow_up_date__lte=today)),
+        )
+        # Keep the established key order of the response
+        pending_follow_ups = stats.pop('pending_follow_ups')
+        stats['assigned_enquiries'] = counter_values(telecaller)['assigned_enquiries_count']
+        stats['pending_follow_ups'] = pending_follow_ups
 
         def format_time(seconds):
             if seconds:
@@ -349,54 +293,36 @@ class TelecallerCallStatsView(generics.GenericAPIView):
 class TelecallerDashboardView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
 
+    @cached_report('calls-dashboard')
     def get(self, request):
-        user = request.user
+        identity = request.crm_identity
 
-        if user.role and user.role.name == 'Admin':
-            total_calls = CallRegister.objects.count()
-            total_leads = Enquiry.objects.count()
-            total_telecallers = Telecaller.objects.count()
+        if identity.is_admin:
+            counts = global_counts()
 
             return Response({
                 'dashboard_type': 'admin',
-                'total_calls': total_calls,
-                'total_leads': total_leads,
-                'total_telecallers': total_telecallers,
+                'total_calls': counts['calls'],
+                'total_leads': counts['enquiries'],
+                'total_telecallers': counts['telecallers'],
             })
 
         # If telecaller
-        try:
-            telecaller = Telecaller.objects.get(account=user)
-        except Telecaller.DoesNotExist:
+        telecaller = identity.telecaller
+        if telecaller is None:
             return Response(
                 {'error': 'Only telecallers can access dashboard.'},
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        # ✅ Total calls made by this telecaller
-        total_calls = CallRegister.objects.filter(telecaller=telecaller).count()
-
-        # ✅ Enquiries assigned to this telecaller
-        total_leads = Enquiry.objects.filter(assigned_by=telecaller).count()
-
-        # ✅ All follow-up calls regardless of date
-        total_followups = CallRegister.objects.filter(
-            telecaller=telecaller,
-            call_outcome='Follow Up'
-        ).count()
-
-        # ✅ All walk-in list calls regardless of date
-        walkin_count = CallRegister.objects.filter(
-            telecaller=telecaller,
-            call_outcome='walk_in_list'
-        ).count()
-
+        # ✅ Counter columns on the telecaller row, kept current on every enquiry/call write
+        counters = counter_values(telecaller)
         return Response({
             'dashboard_type': 'telecaller',
-            'total_calls': total_calls,
-            'total_leads': total_leads,
-            'total_followups': total_followups,
-            'walkin_list': walkin_count,
+            'total_calls': counters['calls_count'],
+            'total_leads': counters['assigned_enquiries_count'],
+            'total_followups': counters['follow_up_calls_count'],  # all follow-up calls regardless of date
+            'walkin_list': counters['walk_in_calls_count'],  # all walk-in list calls regardless of date
         })
     
 class TelecallerCallSummaryView(ListAPIView):
@@ -404,14 +330,25 @@ class TelecallerCallSummaryView(ListAPIView):
     pagination_class = callsPagination
 
     def get_queryset(self):
-        if not self.request.user.role or self.request.user.role.name != 'Admin':
+        if not self.request.crm_identity.is_admin:
             return Telecaller.objects.none()
 
         branch_name = self.request.query_params.get('branch_name', '').strip()
         telecaller_name = self.request.query_params.get('telecaller_name', '').strip()
         search = self.request.query_params.get('search', '').strip()  # <- use 'search'
 
-        telecallers = Telecaller.objects.select_related('branch').all()
+        # ✅ All counts summed from the daily rollups, on the telecaller row
+        telecallers = Telecaller.objects.select_related('branch').annotate(**telecaller_call_totals({
+            'total_calls': {},
+            'total_follow_ups': {'call_outcome': 'Follow Up'},
+            'contacted': {'call_status': 'contacted'},
+            'not_contacted': {'call_status': 'not_contacted'},
+            'answered': {'call_status': 'answered'},
+            'not_answered': {'call_status': 'Not Answered'},
+            'walk_in_list': {'call_outcome': 'walk_in_list'},
+            'positive': {'call_outcome__in': ['Interested', 'Converted']},
+            'negative': {'call_outcome__in': ['Not Interested', 'Do Not Call']},
+        })).order_by('id')
 
         if branch_name:
             telecallers = telecallers.filter(branch__branch_name__icontains=branch_name)
@@ -424,29 +361,28 @@ class TelecallerCallSummaryView(ListAPIView):
 
         return telecallers
 
+    @cached_report('call-summary')
     def list(self, request, *args, **kwargs):
-        if not request.user.role or request.user.role.name != 'Admin':
+        if not request.crm_identity.is_admin:
             return Response({'error': 'Only admin can access this data.'}, status=403)
 
         queryset = self.paginate_queryset(self.get_queryset())
 
         response_data = []
         for telecaller in queryset:
-            calls = CallRegister.objects.filter(telecaller=telecaller)
-
             summary = {
                 'telecaller_id': telecaller.id,
                 'telecaller_name': telecaller.name,
                 'branch_name': telecaller.branch.branch_name if telecaller.branch else None,
-                'total_calls': calls.count(),
-                'total_follow_ups': calls.filter(call_outcome='Follow Up').count(),
-                'contacted': calls.filter(call_status='contacted').count(),
-                'not_contacted': calls.filter(call_status='not_contacted').count(),
-                'answered': calls.filter(call_status='answered').count(),
-                'not_answered': calls.filter(call_status='Not Answered').count(),
-                'walk_in_list': calls.filter(call_outcome='walk_in_list').count(),
-                'positive': calls.filter(call_outcome__in=['Interested', 'Converted']).count(),
-                'negative': calls.filter(call_outcome__in=['Not Interested', 'Do Not Call']).count(),
+                'total_calls': telecaller.total_calls,
+                'total_follow_ups': telecaller.total_follow_ups,
+                'contacted': telecaller.contacted,
+                'not_contacted': telecaller.not_contacted,
+                'answered': telecaller.answered,
+                'not_answered': telecaller.not_answered,
+                'walk_in_list': telecaller.walk_in_list,
+                'positive': telecaller.positive,
+                'negative': telecaller.negative,
             }
 
             response_data.append(summary)
@@ -463,71 +399,58 @@ class AdminJobsView(GenericAPIView):
         if getattr(self, 'swagger_fake_view', False):
             return Response()
 
-        user = request.user
-        if not user.role or user.role.name != 'Admin':
+        if not request.crm_identity.is_admin:
             return Response({'error': 'Only admins can access this data.'}, status=403)
 
         # Filters
         filter_status = request.query_params.get("status", "").lower()
-        branch_name_filter = request.query_params.get("branch_name", "").strip().lower()
-        telecaller_name_filter = request.query_params.get("telecaller_name", "").strip().lower()
-
-        enquiries = Enquiry.objects.select_related('assigned_by__branch').order_by('-created_at')
-        grouped_data = defaultdict(list)
-
-        for enquiry in enquiries:
-            telecaller = enquiry.assigned_by
-            if not telecaller:
-                continue
-
-            branch_name = telecaller.branch.branch_name.lower() if telecaller.branch else ""
-
-            # Apply filters
-            if telecaller_name_filter and telecaller.name.lower() != telecaller_name_filter:
-                continue
-            if branch_name_filter and branch_name != branch_name_filter:
-                continue
-
-            assigned_date = enquiry.created_at.date()
-            key = (telecaller.id, assigned_date, telecaller.name, branch_name)
-
-            call = CallRegister.objects.filter(enquiry=enquiry).first()
-            has_outcome = call and call.call_outcome and call.call_outcome.strip() != ""
-
-            grouped_data[key].append(has_outcome)
-
-        final_data = []
-        for (telecaller_id, assigned_date, telecaller_name, branch_name), outcomes in grouped_data.items():
-            total_jobs = len(outcomes)
-            completed_jobs = sum(1 for status in outcomes if status)
-            progress = f"{completed_jobs}/{total_jobs}"
-            status = "Completed" if completed_jobs == total_jobs else "Remaining"
-
-            # Filter by status
-            if filter_status == "completed" and status != "Completed":
-                continue
-            if filter_status == "remining" and status != "Remaining":
-                continue
-
-            final_data.append({
-                "telecaller_id": telecaller_id,
-                "telecaller_name": telecaller_name,
-                "branch_name": branch_name,
-                "assigned_date": str(assigned_date),
-                "progress": progress,
-                "status": status
-            })
+        branch_name_filter = request.query_params.get("branch_name", "").strip()
+        telecaller_name_filter = request.query_params.get("telecaller_name", "").strip()
+
+        enquiries = Enquiry.objects.filter(assigned_by__isnull=False)
+        if telecaller_name_filter:
+            enquiries = enquiries.filter(assigned_by__name__iexact=telecaller_name_filter)
+        if branch_name_filter:
+            enquiries = enquiries.filter(assigned_by__branch__branch_name__iexact=branch_name_filter)
+
+        # ✅ Group by (telecaller, assigned day) in the database; a job is completed
+        # when the enquiry's latest call has a non-empty outcome
+        jobs = (
+            enquiries
+            .annotate(assigned_date=TruncDate('created_at'))
+            .values('assigned_by_id', 'assigned_date', 'assigned_by__name', 'assigned_by__branch__branch_name')
+            .annotate(
+                total_jobs=Count('id'),
+                completed_jobs=Count('id', filter=has_outcome_q()),
+            )
+            .order_by('-assigned_date', 'assigned_by_id')
+        )
 
-        # Sort and paginate
-        final_data.sort(key=lambda x: x["assigned_date"], reverse=True)
-        page = self.paginate_queryset(final_data)
+        # Filter by status
+        if filter_status == "completed":
+            jobs = jobs.filter(completed_jobs=F('total_jobs'))
+        elif filter_status in ("remining", "remaining"):
+            jobs = jobs.filter(completed_jobs__lt=F('total_jobs'))
+
+        def format_job(job):
+            completed = job['completed_jobs'] == job['total_jobs']
+            return {
+                "telecaller_id": job['assigned_by_id'],
+                "telecaller_name": job['assigned_by__name'],
+                "branch_name": (job['assigned_by__branch__branch_name'] or "").lower(),
+                "assigned_date": str(job['assigned_date']),
+                "progress": f"{job['completed_jobs']}/{job['total_jobs']}",
+                "status": "Completed" if completed else "Remaining"
+            }
+
+        page = self.paginate_queryset(jobs)
         if page is not None:
-            return self.get_paginated_response(page)
+            return self.get_paginated_response([format_job(job) for job in page])
 
         return Response({
             "code": 200,
             "message": "Data fetched successfully",
-            "data": final_data
+            "data": [format_job(job) for job in jobs]
         })
     
 
@@ -536,64 +459,62 @@ class TelecallerJobsView(GenericAPIView):
     pagination_class = callsPagination
 
     def get(self, request):
-        user = request.user
-        try:
-            telecaller = Telecaller.objects.get(account=user)
-        except Telecaller.DoesNotExist:
+        telecaller = request.crm_identity.telecaller
+        if telecaller is None:
             return Response({"error": "Only telecallers can access this."}, status=403)
 
         filter_status = request.query_params.get('status', "").lower()
         name_filter = request.query_params.get("name", "").strip().lower()
 
-        all_leads = Enquiry.objects.filter(assigned_by=telecaller).order_by('-created_at')
-
-        result = []
-
-        for lead in all_leads:
-            if name_filter and name_filter not in lead.candidate_name.lower():
-                continue
-
-            assigned_date = lead.created_at.date()
-            call = CallRegister.objects.filter(enquiry=lead).first()
+        # ✅ Outcome of the enquiry's latest call, as kept on Enquiry
+        leads = (
+            Enquiry.objects
+            .filter(assigned_by=telecaller)
+            .annotate(
+                outcome=F('latest_call_outcome'),
+                has_outcome=has_outcome_q(),
+            )
+            .order_by('-created_at', '-id')
+        )
 
-            # ✅ Make sure this returns only True/False
-            has_outcome = bool(call and call.call_outcome and call.call_outcome.strip())
+        if name_filter:
+            leads = leads.filter(enquiry_text_q(['candidate_name'], name_filter, leads.db))
 
-            # ✅ Correct status filtering
-            if filter_status == "completed" and not has_outcome:
-                continue
-            if filter_status == "remining" and has_outcome:
-                continue
+        # ✅ Correct status filtering
+        if filter_status == "completed":
+            leads = leads.filter(has_outcome=True)
+        elif filter_status in ("remining", "remaining"):
+            leads = leads.filter(has_outcome=False)
 
-            result.append({
+        def format_lead(lead):
+            return {
                 "enquiry_id": lead.id,
                 "name": lead.candidate_name,
                 "contact": lead.phone,
                 "email": lead.email,
-                "status": "Completed" if has_outcome else "Remaining",
-                "outcome": call.call_outcome if call else None,
+                "status": "Completed" if lead.has_outcome else "Remaining",
+                "outcome": lead.outcome,
                 "telecaller_name": telecaller.name,
-                "assigned_date": str(assigned_date),
-            })
-
-        result.sort(key=lambda x: x["assigned_date"], reverse=True)
+                "assigned_date": str(lead.created_at.date()),
+            }
 
-        page = self.paginate_queryset(result)
+        page = self.paginate_queryset(leads)
         if page is not None:
-            return self.get_paginated_response(page)
+            return self.get_paginated_response([format_lead(lead) for lead in page])
 
         return Response({
             "code": 200,
             "message": "Data fetched successfully",
-            "data": result
+            "data": [format_lead(lead) for lead in leads]
         })
 
 
-class NotAnsweredCallsView(generics.ListAPIView):
+class NotAnsweredCallsView(CallRowsListMixin, generics.ListAPIView):
     serializer_class = CallRegisterSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = callsPagination
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, OrderingFilter]
+    filterset_class = NotAnsweredCallsFilter
 
     search_fields = [
         'enquiry__candidate_name',
@@ -606,70 +527,16 @@ class NotAnsweredCallsView(generics.ListAPIView):
     ordering = ['-created_at']
 
     def get_queryset(self):
-        user = self.request.user
-        query_params = self.request.query_params
-
+        identity = self.request.crm_identity
         filters = Q(call_status__iexact='Not Answered')
 
-        if user.role and user.role.name != 'Admin':
-            try:
-                telecaller = Telecaller.objects.get(account=user)
-                filters &= Q(telecaller=telecaller)
-            except Telecaller.DoesNotExist:
+        # 🔐 Restrict to current telecaller if not admin
+        if not identity.is_admin:
+            if not identity.telecaller_id:
                 return CallRegister.objects.none()
+            filters &= Q(telecaller_id=identity.telecaller_id)
 
-        # Query parameters
-        call_status      = query_params.get('call_status', '').strip()
-        telecaller_name  = query_params.get('telecaller_name', '').strip()
-        enquiry_email    = query_params.get('email', '').strip()
-        enquiry_phone    = query_params.get('phone', '').strip()
-        candidate_name   = query_params.get('candidate_name', '').strip()
-        enquiry_status   = query_params.get('enquiry_status', '').strip()
-        enquiry_date     = query_params.get('enquiry_date', '').strip()
-
-        # ✅ Date range filters
-        start_date = query_params.get('start_date', '').strip()
-        end_date   = query_params.get('end_date', '').strip()
-
-        if call_status:
-            filters &= Q(call_status__iexact=call_status)
-
-        if telecaller_name:
-            filters &= Q(telecaller__name__icontains=telecaller_name)
-
-        if enquiry_email:
-            filters &= Q(enquiry__email__icontains=enquiry_email)
-
-        if enquiry_phone:
-            filters &= Q(enquiry__phone__icontains=enquiry_phone)
-
-        if candidate_name:
-            filters &= Q(enquiry__candidate_name__icontains=candidate_name)
-
-        if enquiry_status:
-            filters &= Q(enquiry__enquiry_status__iexact=enquiry_status)
-
-        if enquiry_date:
-            try:
-                date_obj = datetime.strptime(enquiry_date, '%Y-%m-%d').date()
-                filters &= Q(enquiry__created_at__date=date_obj)
-            except ValueError:
-                pass
-
-        if start_date:
-            try:
-                start = datetime.strptime(start_date, '%Y-%m-%d').date()
-                filters &= Q(created_at__date__gte=start)
-            except ValueError:
-                pass
-
-        if end_date:
-            try:
-                end = datetime.strptime(end_date, '%Y-%m-%d').date()
-                filters &= Q(created_at__date__lte=end)
-            except ValueError:
-                pass
-
+        # 🔍 Query params (incl. start_date / end_date) are applied by NotAnsweredCallsFilter
         return CallRegister.objects.select_related(
             'enquiry', 'telecaller', 'telecaller__branch'
         ).filter(filters)
@@ -706,81 +573,27 @@ class EnquiryCallHistoryView(APIView):
 
 
 
-class InterestedCallsView(generics.ListAPIView):
+class InterestedCallsView(CallRowsListMixin, generics.ListAPIView):
     serializer_class = CallRegisterSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = callsPagination
     filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_class = InterestedCallsFilter
 
     ordering_fields = ['call_start_time', 'created_at', 'follow_up_date']
     ordering = ['-created_at']
 
     def get_queryset(self):
-        user = self.request.user
-        query_params = self.request.query_params
+        identity = self.request.crm_identity
         filters = Q(call_outcome__iexact='Interested')
 
-        if user.role and user.role.name != 'Admin':
-            try:
-                telecaller = Telecaller.objects.get(account=user)
-                filters &= Q(telecaller=telecaller)
-            except Telecaller.DoesNotExist:
+        # 🔐 Restrict to current telecaller if not admin
+        if not identity.is_admin:
+            if not identity.telecaller_id:
                 return CallRegister.objects.none()
+            filters &= Q(telecaller_id=identity.telecaller_id)
 
-        # ✅ Field filters
-        candidate_name = query_params.get('candidate_name', '').strip()
-        branch_name = query_params.get('branch_name', '').strip()
-        telecaller_name = query_params.get('telecaller_name', '').strip()
-        call_status = query_params.get('call_status', '').strip()
-        follow_up_date = query_params.get('follow_up_date', '').strip()
-
-        phone_number = query_params.get('phone_number', '').strip()
-        email = query_params.get('email', '').strip()
-
-        # ✅ Date filters
-        start_date = query_params.get('start_date', '').strip()
-        end_date = query_params.get('end_date', '').strip()
-
-        if candidate_name:
-            filters &= Q(enquiry__candidate_name__icontains=candidate_name)
-
-        if branch_name:
-            filters &= Q(telecaller__branch__branch_name__icontains=branch_name)
-
-        if telecaller_name:
-            filters &= Q(telecaller__name__icontains=telecaller_name)
-
-        if call_status:
-            filters &= Q(call_status__iexact=call_status)
-
-        if follow_up_date:
-            try:
-                follow_up_obj = datetime.strptime(follow_up_date, '%Y-%m-%d').date()
-                filters &= Q(follow_up_date=follow_up_obj)
-            except ValueError:
-                pass
-
-        if start_date:
-            try:
-                start = datetime.strptime(start_date, '%Y-%m-%d').date()
-                filters &= Q(created_at__date__gte=start)
-            except ValueError:
-                pass
-
-        if end_date:
-            try:
-                end = datetime.strptime(end_date, '%Y-%m-%d').date()
-                filters &= Q(created_at__date__lte=end)
-            except ValueError:
-                pass
-
-        # ✅ Search by phone_number and email (related to enquiry)
-        if phone_number:
-            filters &= Q(enquiry__phone__icontains=phone_number)
-
-        if email:
-            filters &= Q(enquiry__email__icontains=email)
-
+        # 🔍 Query params (incl. start_date / end_date) are applied by InterestedCallsFilter
         return CallRegister.objects.select_related(
             'enquiry', 'telecaller', 'telecaller__branch'
         ).filter(filters)
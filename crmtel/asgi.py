@@ -2,6 +2,9 @@
 ASGI config for crmtel project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve the project through it (e.g. ``uvicorn crmtel.asgi:application``) so the
+``/api/events/`` server-sent-events stream can hold connections open without
+tying up a worker thread each.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -0,0 +1,243 @@
+import base64
+import hashlib
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.db.models.query import ModelIterable, ValuesIterable
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+
+from tellecaller.counters import GLOBAL_COUNTERS, global_count
+
+# Model label -> name of the global counter holding its row count
+COUNTED_MODELS = {label: name for name, label in GLOBAL_COUNTERS.items()}
+
+
+class ExactCount:
+    """Plain ``COUNT(*)`` on every request (Django's default behaviour)."""
+
+    def count(self, queryset):
+        return queryset.count(), True
+
+
+class CachedEstimatedCount:
+    """
+    Cheap totals for paginated responses. Returns ``(total, is_exact)``.
+
+    * Unfiltered querysets of a model with a global counter (enquiries,
+      calls, telecallers; see tellecaller.counters) read that counter.
+    * Filtered querysets on PostgreSQL use the planner's row estimate when it
+      is above ``PAGINATION_ESTIMATE_THRESHOLD``.
+    * Otherwise the exact count is computed and cached briefly per filter
+      combination (keyed on the generated SQL and its parameters); a total
+      served from that cache may be stale and is reported as not exact.
+    """
+
+    def __init__(self):
+        self.timeout = getattr(settings, 'PAGINATION_COUNT_CACHE_TIMEOUT', 30)
+        self.threshold = getattr(settings, 'PAGINATION_ESTIMATE_THRESHOLD', 10000)
+
+    def count(self, queryset):
+        queryset = queryset.order_by()
+        model = queryset.model._meta.label_lower
+
+        counter = COUNTED_MODELS.get(queryset.model._meta.label)
+        if counter and self.is_whole_table(queryset):
+            return global_count(counter), True
+
+        sql, params = queryset.query.sql_with_params()
+        if queryset.query.where and connections[queryset.db].vendor == 'postgresql':
+            estimate = self.planner_estimate(queryset.db, sql, params)
+            if estimate >= self.threshold:
+                return estimate, False
+
+        key = f'pagination:count:{model}:{hashlib.md5(f"{sql}|{params!r}".encode()).hexdigest()}'
+        total = cache.get(key)
+        if total is not None:
+            return total, False
+        total = queryset.count()
+        cache.set(key, total, self.timeout)
+        return total, True
+
+    @staticmethod
+    def is_whole_table(queryset):
+        """True when ``queryset`` has one row per row of its table."""
+        query = queryset.query
+        return not (
+            query.where or query.distinct or query.combinator or query.group_by is not None
+            or query.low_mark or query.high_mark is not None
+        )
+
+    def planner_estimate(self, using, sql, params):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class StrategyPaginator(Paginator):
+    """Paginator whose ``count`` comes from a count strategy and may be an estimate."""
+
+    def __init__(self, object_list, per_page, count_strategy=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_strategy = count_strategy
+
+    @cached_property
+    def _counted(self):
+        if self.count_strategy is None or not isinstance(self.object_list, QuerySet):
+            return super().count, True
+        return self.count_strategy.count(self.object_list)
+
+    @property
+    def count(self):
+        return self._counted[0]
+
+    @property
+    def count_is_exact(self):
+        return self._counted[1]
+
+    def validate_number(self, number):
+        if self.count_is_exact:
+            return super().validate_number(number)
+        # An estimated total must not hide pages that really exist.
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        return number
+
+    def page(self, number):
+        if self.count_is_exact:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(self.object_list[bottom:bottom + self.per_page], number, self)
+
+
+class CountStrategyMixin:
+    """
+    Lets a page-number paginator take its total from ``count_strategy``.
+
+    The envelope exposes ``totalExact`` so clients can tell an exact total
+    from a planner estimate.
+    """
+
+    count_strategy = CachedEstimatedCount
+
+    def django_paginator_class(self, object_list, per_page):
+        return StrategyPaginator(object_list, per_page, count_strategy=self.count_strategy())
+
+
+class KeysetPaginationMixin:
+    """
+    Adds a keyset ("cursor") mode to a page-number paginator.
+
+    Sending ``?cursor=`` (empty for the first page) switches to keyset
+    pagination on ``(created_at, id)``, newest first: every page is a
+    ``WHERE (created_at, id) < (...)`` range read with ``LIMIT limit + 1``, so
+    page 500 costs the same as page 1 and no ``COUNT(*)`` is issued. Lists and
+    querysets without the cursor fields keep the page-number behaviour.
+    """
+
+    cursor_query_param = 'cursor'
+    cursor_fields = ('created_at', 'id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    cursor_mode = False
+
+    def _supports_cursor(self, queryset):
+        # Model instances, or values() rows that carry the key; grouped rows have no (created_at, id)
+        if not isinstance(queryset, QuerySet) or queryset.query.group_by is not None:
+            return False
+        if issubclass(queryset._iterable_class, ValuesIterable):
+            if not set(self.cursor_fields) <= set(queryset._fields):
+                return False
+        elif not issubclass(queryset._iterable_class, ModelIterable):
+            return False
+        try:
+            for field in self.cursor_fields:
+                queryset.model._meta.get_field(field)
+        except FieldDoesNotExist:
+            return False
+        return True
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = (
+            self.cursor_query_param in request.query_params
+            and self._supports_cursor(queryset)
+        )
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_page_size(request)
+        direction, position = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+        key, tiebreak = self.cursor_fields
+
+        if direction == 'previous':
+            queryset = queryset.order_by(key, tiebreak)
+            if position:
+                queryset = queryset.filter(
+                    Q(**{f'{key}__gt': position[0]}) | Q(**{key: position[0], f'{tiebreak}__gt': position[1]})
+                )
+        else:
+            queryset = queryset.order_by(f'-{key}', f'-{tiebreak}')
+            if position:
+                queryset = queryset.filter(
+                    Q(**{f'{key}__lt': position[0]}) | Q(**{key: position[0], f'{tiebreak}__lt': position[1]})
+                )
+
+        results = list(queryset[:self.limit + 1])
+        has_more = len(results) > self.limit
+        results = results[:self.limit]
+
+        if direction == 'previous':
+            results.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.next_cursor = self.encode_cursor('next', results[-1]) if self.has_next and results else None
+        self.previous_cursor = self.encode_cursor('previous', results[0]) if self.has_previous and results else None
+        return results
+
+    def encode_cursor(self, direction, obj):
+        key, tiebreak = self.cursor_fields
+        if isinstance(obj, dict):
+            key_value, tiebreak_value = obj[key], obj[tiebreak]
+        else:
+            key_value, tiebreak_value = getattr(obj, key), getattr(obj, tiebreak)
+        raw = f"{direction}|{key_value.isoformat()}|{tiebreak_value}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return 'next', None
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            direction, key_value, tiebreak_value = raw.split('|')
+            if direction not in ('next', 'previous'):
+                raise ValueError(direction)
+            return direction, (datetime.fromisoformat(key_value), int(tiebreak_value))
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_cursor_pagination(self):
+        """``pagination`` block of the response envelope in cursor mode."""
+        return {
+            "limit": self.limit,
+            "next": self.next_cursor,
+            "previous": self.previous_cursor,
+            "hasNext": self.has_next,
+            "hasPrevious": self.has_previous,
+        }
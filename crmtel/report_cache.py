@@ -0,0 +1,123 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+from rest_framework.response import Response
+
+from login.identity import get_identity
+from tellecaller.models import GlobalCounter
+
+# GlobalCounter row holding the report version. It lives in the database,
+# not the cache, so a bump reaches every worker process.
+VERSION_COUNTER = 'report_version'
+POLL_INTERVAL = 0.05
+
+_MISSING = object()
+
+# This process's copy of the version: (read at, value)
+_local_version = None
+
+
+def report_version():
+    """
+    Current report version. Each process reads the database at most once
+    every ``REPORT_VERSION_TTL`` seconds; its own bumps are seen at once.
+    """
+    global _local_version
+    cached = _local_version
+    if cached is not None and time.monotonic() - cached[0] < settings.REPORT_VERSION_TTL:
+        return cached[1]
+    counter, _ = GlobalCounter.objects.get_or_create(name=VERSION_COUNTER, defaults={'value': 1})
+    _local_version = (time.monotonic(), counter.value)
+    return counter.value
+
+
+def bump_report_version():
+    """Invalidate every cached report by moving all keys to a new version."""
+    global _local_version
+    if not GlobalCounter.objects.filter(name=VERSION_COUNTER).update(value=F('value') + 1):
+        GlobalCounter.objects.get_or_create(name=VERSION_COUNTER, defaults={'value': 2})
+    _local_version = None
+
+
+def invalidate_reports_on_commit():
+    """
+    Bump the report version when the current transaction commits, once per
+    transaction however many rows it writes.
+    """
+    # A queued bump covers this write too: savepoints are nested, so whatever
+    # rollback would discard that bump discards this write as well
+    if any(func is bump_report_version for _, func, _ in connection.run_on_commit):
+        return
+    transaction.on_commit(bump_report_version)
+
+
+def get_or_compute(key, compute, timeout):
+    """
+    ``cache.get_or_set`` with single-flight: concurrent misses wait for the
+    one caller holding ``<key>:lock`` instead of all computing the value.
+    ``compute`` returns ``(value, cacheable)``.
+    """
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    lock_key = f'{key}:lock'
+    deadline = time.monotonic() + settings.REPORT_CACHE_LOCK_WAIT
+    while not cache.add(lock_key, 1, timeout=settings.REPORT_CACHE_LOCK_TIMEOUT):
+        time.sleep(POLL_INTERVAL)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if time.monotonic() > deadline:
+            # The holder is stuck or gone; compute without the lock
+            value, _ = compute()
+            return value
+
+    try:
+        value = cache.get(key, _MISSING)
+        if value is _MISSING:
+            value, cacheable = compute()
+            if cacheable:
+                cache.set(key, value, timeout)
+    finally:
+        cache.delete(lock_key)
+    return value
+
+
+def report_scope(request):
+    """Admins share one cached copy; everyone else gets their own."""
+    identity = get_identity(request)
+    if identity.is_admin:
+        return 'admin'
+    return f'user:{identity.account.pk}' if identity.is_authenticated else 'anonymous'
+
+
+def cached_report(name, shared=False, timeout=None):
+    """
+    Cache a report view method's successful ``Response`` data.
+
+    The key holds the report name, the current report version, the caller's
+    scope (role/user, unless ``shared``) and the query parameters, so every
+    filter set is cached separately and any enquiry/call write invalidates it.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            scope = 'all' if shared else report_scope(request)
+            params = sorted((k, sorted(v)) for k, v in request.query_params.lists())
+            digest = hashlib.sha1(repr((scope, args, sorted(kwargs.items()), params)).encode()).hexdigest()
+            key = f'report:{name}:v{report_version()}:{digest}'
+
+            def compute():
+                response = method(self, request, *args, **kwargs)
+                return (response.status_code, response.data), response.status_code == 200
+
+            status_code, data = get_or_compute(key, compute, timeout or settings.REPORT_CACHE_TIMEOUT)
+            return Response(data, status=status_code)
+        return wrapper
+    return decorator
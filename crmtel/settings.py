@@ -59,6 +59,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'login.middleware.CrmIdentityMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     
@@ -93,10 +94,33 @@ AUTH_USER_MODEL = 'login.Account'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWT plus one joined account/role/telecaller load -> request.crm_identity
+        'login.authentication.CrmJWTAuthentication',
     )
 }
 
+# Local memory by default. Report invalidation still reaches every worker: the
+# report version is kept in the database (crmtel.report_cache) and re-read
+# every REPORT_VERSION_TTL seconds. FileBasedCache
+# (or any shared backend) also shares the cached reports and their
+# single-flight lock between worker processes.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'crmtel',
+    }
+}
+
+# Cached report responses (crmtel.report_cache.cached_report)
+REPORT_CACHE_TIMEOUT = 300  # seconds; writes to enquiries/calls invalidate sooner
+REPORT_CACHE_LOCK_TIMEOUT = 30  # max seconds one computation holds the single-flight lock
+REPORT_CACHE_LOCK_WAIT = 10  # max seconds a concurrent miss waits for that computation
+REPORT_VERSION_TTL = 2  # seconds other worker processes may serve reports cached before a write
+
+# Paginated totals (crmtel.pagination.CachedEstimatedCount)
+PAGINATION_COUNT_CACHE_TIMEOUT = 30  # seconds an exact total is reused
+PAGINATION_ESTIMATE_THRESHOLD = 10000  # above this planner estimate, skip COUNT(*)
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
@@ -163,6 +187,19 @@ USE_I18N = True
 
 USE_TZ = True
 
+# Caller-ID phone keys (lead.phones.normalize_phone)
+PHONE_DEFAULT_COUNTRY_CODE = '91'
+PHONE_NATIONAL_NUMBER_LENGTH = 10
+
+# Telecaller reminders (notification.views.TelecallerRemindersView)
+REMINDER_LOOKAHEAD_DAYS = 2  # default ?days= window after today
+REMINDER_MAX_LOOKAHEAD_DAYS = 30
+REMINDERS_PRECOMPUTED = False  # serve from notification.Reminder (refreshed by manage.py refresh_reminders)
+
+# Server-sent events (notification.views.telecaller_events, served through crmtel.asgi)
+EVENT_BROKER = 'notification.events.LocalBroker'  # swap for a cross-process broker with several workers
+SSE_HEARTBEAT_SECONDS = 15
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
@@ -0,0 +1,67 @@
+import heapq
+from django.db.models import Count, Max, Q
+from tellecaller.models import Telecaller
+
+
+class LeadAssigner:
+    """
+    Least-loaded lead assignment.
+
+    Every eligible (active) telecaller's open ``Active`` enquiry count is
+    loaded with one grouped query and kept in a min-heap keyed on
+    ``(open_leads, assignment_sequence, id)``. Ties go to whoever was assigned
+    least recently; the sequence is persisted on ``Telecaller`` so the rotation
+    carries over between imports instead of restarting at the first telecaller.
+    """
+
+    def __init__(self, branch_id=None, exclude_ids=()):
+        telecallers = Telecaller.objects.filter(status='active')
+        if branch_id:
+            telecallers = telecallers.filter(branch_id=branch_id)
+        if exclude_ids:
+            telecallers = telecallers.exclude(id__in=exclude_ids)
+
+        telecallers = telecallers.annotate(
+            open_leads=Count('assigned_enquiries', filter=Q(assigned_enquiries__enquiry_status='Active'))
+        )
+
+        self.telecallers = {t.id: t for t in telecallers}
+        self._heap = [(t.open_leads, t.assignment_sequence, t.id) for t in self.telecallers.values()]
+        heapq.heapify(self._heap)
+
+        self._sequence = Telecaller.objects.aggregate(last=Max('assignment_sequence'))['last'] or 0
+        self._touched = set()
+
+    def __bool__(self):
+        return bool(self._heap)
+
+    def next(self):
+        """Return the least-loaded telecaller and count one more lead against them."""
+        if not self._heap:
+            return None
+        load, _, telecaller_id = self._heap[0]
+        self._sequence += 1
+        heapq.heapreplace(self._heap, (load + 1, self._sequence, telecaller_id))
+
+        telecaller = self.telecallers[telecaller_id]
+        telecaller.assignment_sequence = self._sequence
+        self._touched.add(telecaller_id)
+        return telecaller
+
+    def plan(self, count):
+        """Distribute ``count`` leads; returns ``{telecaller_id: number_of_leads}``."""
+        allocation = {}
+        for _ in range(count):
+            telecaller = self.next()
+            if telecaller is None:
+                break
+            allocation[telecaller.id] = allocation.get(telecaller.id, 0) + 1
+        return allocation
+
+    def save_rotation(self):
+        """Persist the rotation position of every telecaller assigned since the last save."""
+        if self._touched:
+            Telecaller.objects.bulk_update(
+                [self.telecallers[i] for i in self._touched], ['assignment_sequence']
+            )
+            self._touched.clear()
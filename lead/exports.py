@@ -0,0 +1,168 @@
+import csv
+import logging
+from datetime import date, datetime
+from tempfile import SpooledTemporaryFile
+
+from django.core.files import File
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from openpyxl import Workbook
+from rest_framework import status
+from rest_framework.response import Response
+
+from login.identity import load_identity
+from .filters import EnquiryBaseFilter
+from .jobs import Heartbeat, LeaseLost, hold_lease
+from .models import Enquiry, ExportJob
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = 2000
+
+# kind -> callable(identity, params) returning (headers, values_list queryset)
+EXPORT_SOURCES = {
+    'enquiries': 'lead.exports.enquiry_export_source',
+    'calls': 'callregister.exports.call_export_source',
+}
+
+ENQUIRY_EXPORT_COLUMNS = [
+    ('ID', 'id'),
+    ('Name', 'candidate_name'),
+    ('Phone', 'phone'),
+    ('Phone 2', 'phone2'),
+    ('Email', 'email'),
+    ('Status', 'enquiry_status'),
+    ('Mettad', 'Mettad__name'),
+    ('Preferred Course', 'preferred_course__name'),
+    ('Service', 'required_service__name'),
+    ('Telecaller', 'assigned_by__name'),
+    ('Branch', 'assigned_by__branch__branch_name'),
+    ('Feedback', 'feedback'),
+    ('Follow Up On', 'follow_up_on'),
+    ('Created At', 'created_at'),
+]
+
+
+def enquiry_export_source(identity, params):
+    queryset = Enquiry.objects.all()
+
+    # ✅ Same scoping as the enquiry list: telecallers only see their own leads
+    if not identity.is_admin:
+        if not identity.telecaller_id:
+            queryset = Enquiry.objects.none()
+        else:
+            queryset = queryset.filter(assigned_by_id=identity.telecaller_id)
+
+    queryset = EnquiryBaseFilter(params, queryset=queryset).qs.order_by('-created_at', '-id')
+    headers = [header for header, _ in ENQUIRY_EXPORT_COLUMNS]
+    return headers, queryset.values_list(*[path for _, path in ENQUIRY_EXPORT_COLUMNS])
+
+
+def get_export_source(kind, identity, params):
+    return import_string(EXPORT_SOURCES[kind])(identity, params)
+
+
+def format_cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return timezone.localtime(value).strftime('%Y-%m-%d %H:%M:%S') if timezone.is_aware(value) else value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def iter_export_rows(headers, queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Header row followed by formatted data rows, read through a server-side cursor."""
+    yield headers
+    for row in queryset.iterator(chunk_size=chunk_size):
+        yield [format_cell(value) for value in row]
+
+
+class _Echo:
+    """File-like object whose write() hands the line straight back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def csv_streaming_response(headers, queryset, filename):
+    writer = csv.writer(_Echo())
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in iter_export_rows(headers, queryset)),
+        content_type='text/csv',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def export_response(request, kind):
+    """
+    ``?file_format=csv`` (default) streams the export in this response;
+    ``?file_format=xlsx`` queues an ``ExportJob`` for the run_export_worker command.
+    Every other query parameter is passed to the export's filterset.
+    """
+    from .serializers import ExportJobSerializer
+
+    params = request.query_params.dict()
+    file_format = params.pop('file_format', 'csv').lower()
+
+    if file_format == 'xlsx':
+        job = ExportJob.objects.create(kind=kind, params=params, created_by=request.user)
+        return Response({
+            "code": 202,
+            "message": "Export queued successfully",
+            "job_id": job.id,
+            "data": ExportJobSerializer(job, context={'request': request}).data
+        }, status=status.HTTP_202_ACCEPTED)
+
+    if file_format != 'csv':
+        return Response({"code": 400, "message": "file_format must be csv or xlsx"}, status=400)
+
+    headers, queryset = get_export_source(kind, request.crm_identity, params)
+    filename = f"{kind}_{timezone.localtime().strftime('%Y%m%d_%H%M%S')}.csv"
+    return csv_streaming_response(headers, queryset, filename)
+
+
+def run_export_job(job):
+    """
+    Build the XLSX for an ``ExportJob`` (claimed with ``claim_next_job``)
+    with a write-only workbook. The result is only recorded while the job's
+    lease is still held.
+    """
+    try:
+        with Heartbeat(job):
+            headers, queryset = get_export_source(job.kind, load_identity(job.created_by_id), job.params)
+
+            workbook = Workbook(write_only=True)
+            sheet = workbook.create_sheet(title=job.get_kind_display())
+            rows_written = -1  # header row
+            for row in iter_export_rows(headers, queryset):
+                sheet.append(row)
+                rows_written += 1
+
+            # Spools to disk once the workbook grows past 10 MB
+            buffer = SpooledTemporaryFile(max_size=10 * 1024 * 1024)
+            workbook.save(buffer)
+            buffer.seek(0)
+            with File(buffer) as content:
+                filename = f"{job.kind}_{timezone.localtime(job.created_at).strftime('%Y%m%d_%H%M%S')}_{job.id}.xlsx"
+                job.file.save(filename, content, save=False)
+            job.rows_written = rows_written
+            job.status = 'completed'
+    except Exception as e:
+        logger.exception("Export job %s (%s) failed", job.pk, job.kind)
+        job.status = 'failed'
+        job.error = str(e)
+
+    job.finished_at = timezone.now()
+    try:
+        with transaction.atomic():
+            hold_lease(job)
+            job.save()
+    except LeaseLost:
+        logger.warning("Export job %s was claimed by another worker, stopping", job.pk)
+    return job
+
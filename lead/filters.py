@@ -0,0 +1,31 @@
+# lead/filters.py
+
+from django_filters import rest_framework as django_filters
+from .models import Enquiry
+from .search import enquiry_text_q
+
+# ✅ Updated Filter with Mettad
+class EnquiryBaseFilter(django_filters.FilterSet):
+    start_date = django_filters.DateFilter(field_name='created_at', lookup_expr='gte')
+    end_date = django_filters.DateFilter(field_name='created_at', lookup_expr='lte')
+    enquiry_source = django_filters.CharFilter(field_name='enquiry_source', lookup_expr='iexact')
+    branch = django_filters.NumberFilter(field_name='assigned_by__branch')
+    branch_name = django_filters.CharFilter(field_name='assigned_by__branch__branch_name', lookup_expr='icontains')
+    telecaller = django_filters.NumberFilter(field_name='assigned_by')
+    telecaller_name = django_filters.CharFilter(field_name='assigned_by__name', lookup_expr='icontains')
+    enquiry_status = django_filters.CharFilter(field_name='enquiry_status', lookup_expr='iexact')
+    candidate_name = django_filters.CharFilter(field_name='candidate_name', method='filter_indexed_text')
+    phone = django_filters.CharFilter(field_name='phone', method='filter_indexed_text')
+
+    # Mettad filters
+    mettad = django_filters.NumberFilter(field_name='Mettad')
+    mettad_name = django_filters.CharFilter(field_name='Mettad__name', lookup_expr='icontains')
+
+    class Meta:
+        model = Enquiry
+        fields = ['enquiry_source', 'branch', 'branch_name', 'telecaller', 'telecaller_name', 'candidate_name','phone',
+                 'enquiry_status', 'start_date', 'end_date', 'mettad', 'mettad_name']
+
+    def filter_indexed_text(self, queryset, name, value):
+        """Substring match on an indexed enquiry column (trigram / FTS5 backed)."""
+        return queryset.filter(enquiry_text_q([name], value, queryset.db))
@@ -0,0 +1,275 @@
+import logging
+
+import pandas as pd
+from openpyxl import load_workbook
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from crmtel.report_cache import invalidate_reports_on_commit
+from tellecaller.counters import CounterDeltas, bump_global
+from .assignment import LeadAssigner
+from .jobs import Heartbeat, LeaseLost, hold_lease
+from .models import Enquiry, Course, Service
+
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 5000
+
+
+def _iter_csv_chunks(file, chunk_size):
+    # read_csv keeps a running RangeIndex across chunks.
+    for chunk in pd.read_csv(file, chunksize=chunk_size):
+        yield chunk
+
+
+def _iter_xlsx_chunks(file, chunk_size):
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c).strip() if c is not None else f"Unnamed: {i}" for i, c in enumerate(header)]
+
+        width = len(columns)
+        buffer, index = [], []
+        for position, values in enumerate(rows):
+            if all(v is None for v in values):
+                continue
+            values = tuple(values[:width])
+            buffer.append(values + (None,) * (width - len(values)))
+            index.append(position)
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame(buffer, columns=columns, index=index)
+                buffer, index = [], []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=columns, index=index)
+    finally:
+        workbook.close()
+
+
+def iter_upload_chunks(file, chunk_size=READ_CHUNK_SIZE):
+    """
+    Yield the uploaded lead file as DataFrames of at most ``chunk_size`` rows.
+
+    CSV is read with ``read_csv(chunksize=...)`` and XLSX with openpyxl's
+    read-only row iterator, so only one chunk is held in memory at a time.
+    """
+    if file.name.endswith('.xlsx'):
+        return _iter_xlsx_chunks(file, chunk_size)
+    return _iter_csv_chunks(file, chunk_size)
+
+
+class EnquiryImporter:
+    """
+    Set-based enquiry import.
+
+    Rows are validated column-wise, course/service names are resolved with one
+    ``name__in`` query per batch and enquiries are written with ``bulk_create``
+    in chunks, each inside its own transaction. Warnings keep the
+    ``Row N: ...`` format used by the upload endpoint.
+    """
+
+    REQUIRED_COLUMNS = ['Name', 'Phone']
+    CHUNK_SIZE = 1000
+
+    def __init__(self, user, chunk_size=None, branch_id=None):
+        self.user = user
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+        self.created_count = 0
+        self.warnings = []
+        # Data rows of the file consumed so far (position of the last row + 1)
+        self.rows_processed = 0
+
+        # ✅ Least-loaded assignment among active telecallers (optionally one branch)
+        self.assigner = LeadAssigner(branch_id=branch_id)
+
+        self._courses = {}
+        self._services = {}
+
+    # ---------- helpers ----------
+
+    @staticmethod
+    def _clean_text(series):
+        """Column -> stripped strings, with NaN/blank as ''."""
+        series = series.where(series.notna(), '')
+        series = series.map(lambda v: format(v, '.0f') if isinstance(v, float) and v.is_integer() else str(v))
+        return series.str.strip()
+
+    def _column(self, df, name):
+        if name in df.columns:
+            return self._clean_text(df[name])
+        return pd.Series([''] * len(df), index=df.index)
+
+    def _resolve(self, model, cache, names):
+        """Resolve unseen names with a single query and memoise the result."""
+        missing = {n for n in names if n and n not in cache}
+        if missing:
+            found = dict(model.objects.filter(name__in=missing).values_list('name', 'id'))
+            for name in missing:
+                cache[name] = found.get(name)
+        return cache
+
+    # ---------- public API ----------
+
+    def import_dataframe(self, df):
+        """
+        Import one DataFrame (the whole file or one chunk of it).
+
+        The index holds 0-based data row positions in the file, so warnings
+        point at the right spreadsheet row across chunks.
+        """
+        if df.empty:
+            return
+
+        row_numbers = df.index + 2
+        missing_columns = [c for c in self.REQUIRED_COLUMNS if c not in df.columns]
+
+        names = self._column(df, 'Name')
+        phones = self._column(df, 'Phone')
+        emails = self._column(df, 'Email')
+        feedback = self._column(df, 'Feedback')
+        course_names = self._column(df, 'Preferred Course')
+        service_names = self._column(df, 'Service')
+
+        courses = self._resolve(Course, self._courses, course_names.unique())
+        services = self._resolve(Service, self._services, service_names.unique())
+
+        # ✅ Whole-column validation
+        phone_limit = Enquiry._meta.get_field('phone').max_length
+        name_limit = Enquiry._meta.get_field('candidate_name').max_length
+        errors = pd.Series([''] * len(df), index=df.index)
+        errors = errors.mask(names == '', 'Name is required')
+        errors = errors.mask((errors == '') & (phones == ''), 'Phone is required')
+        errors = errors.mask((errors == '') & (phones.str.len() > phone_limit),
+                             f'Phone must be at most {phone_limit} characters')
+        errors = errors.mask((errors == '') & (names.str.len() > name_limit),
+                             f'Name must be at most {name_limit} characters')
+        if missing_columns:
+            errors[:] = f"Missing column(s): {', '.join(missing_columns)}"
+
+        pending = []
+        rows = zip(row_numbers, errors.tolist(), names.tolist(), phones.tolist(), emails.tolist(),
+                   feedback.tolist(), course_names.tolist(), service_names.tolist())
+        for row_number, error, name, phone, email, notes, course_name, service_name in rows:
+            if error:
+                self.warnings.append(f"Row {row_number}: Failed - {error}")
+                continue
+
+            assigned_by = self.assigner.next()
+
+            preferred_course_id = courses.get(course_name) if course_name else None
+            if course_name and preferred_course_id is None:
+                self.warnings.append(f"Row {row_number}: Course '{course_name}' not found.")
+
+            required_service_id = services.get(service_name) if service_name else None
+            if service_name and required_service_id is None:
+                self.warnings.append(f"Row {row_number}: Service '{service_name}' not found.")
+
+            enquiry = Enquiry(
+                candidate_name=name,
+                phone=phone,
+                email=email,
+                preferred_course_id=preferred_course_id,
+                required_service_id=required_service_id,
+                enquiry_status='Active',
+                follow_up_on=None,
+                created_by=self.user,
+                assigned_by=assigned_by,
+                feedback=notes,
+            )
+            # bulk_create skips save(), so fill the caller-ID keys here
+            enquiry.refresh_phone_keys()
+            pending.append((row_number, enquiry))
+
+        self.rows_processed = int(df.index[-1]) + 1
+
+        for start in range(0, len(pending), self.chunk_size):
+            self._write_chunk(pending[start:start + self.chunk_size])
+        self.assigner.save_rotation()
+
+    def import_file(self, file, chunk_size=READ_CHUNK_SIZE):
+        """Stream ``file`` through :meth:`import_dataframe` chunk by chunk."""
+        for df in iter_upload_chunks(file, chunk_size):
+            self.import_dataframe(df)
+
+    def _write_chunk(self, chunk):
+        try:
+            with transaction.atomic():
+                Enquiry.objects.bulk_create([enquiry for _, enquiry in chunk])
+                # bulk_create sends no signals, so count the new assignments here
+                deltas = CounterDeltas()
+                for _, enquiry in chunk:
+                    deltas.add_enquiry(enquiry.assigned_by_id)
+                deltas.apply()
+                bump_global('enquiries', len(chunk))
+                invalidate_reports_on_commit()
+            self.created_count += len(chunk)
+            return
+        except DatabaseError as e:
+            logger.warning("Bulk insert of rows %s-%s rejected, retrying row by row: %s",
+                           chunk[0][0], chunk[-1][0], e)
+
+        # ✅ Chunk rejected by the database: retry row by row to pinpoint failures
+        for row_number, enquiry in chunk:
+            enquiry.pk = None
+            try:
+                with transaction.atomic():
+                    enquiry.save(force_insert=True)
+                self.created_count += 1
+            except DatabaseError as e:
+                self.warnings.append(f"Row {row_number}: Failed - {str(e)}")
+
+
+def run_import_job(job, chunk_size=READ_CHUNK_SIZE):
+    """
+    Run (or resume) an ``EnquiryImportJob`` claimed with ``claim_next_job``.
+
+    Each chunk is imported and its progress recorded in one transaction that
+    holds the job's lease, so a job interrupted half way restarts after the
+    last committed row, and a worker whose job was re-claimed stops without
+    importing any row twice.
+    """
+    importer = EnquiryImporter(job.created_by, branch_id=job.branch_id)
+    importer.created_count = job.successfully_imported
+    importer.warnings = list(job.warnings)
+    importer.rows_processed = job.rows_processed
+
+    # What the job was doing when it failed, for the error message
+    stage = "read file"
+    try:
+        with Heartbeat(job), job.file.open('rb') as file:
+            for df in iter_upload_chunks(file, chunk_size):
+                df = df[df.index >= job.rows_processed]
+                if df.empty:
+                    continue
+                stage = f"import rows {df.index[0] + 2}-{df.index[-1] + 2}"
+                with transaction.atomic():
+                    hold_lease(job)
+                    importer.import_dataframe(df)
+                    job.rows_processed = importer.rows_processed
+                    job.successfully_imported = importer.created_count
+                    job.warnings = importer.warnings
+                    job.save(update_fields=['rows_processed', 'successfully_imported', 'warnings', 'updated_at'])
+                stage = "read file"
+        job.status = 'completed'
+    except LeaseLost:
+        logger.warning("Import job %s was claimed by another worker, stopping", job.pk)
+        return job
+    except Exception as e:
+        logger.exception("Import job %s failed to %s", job.pk, stage)
+        job.status = 'failed'
+        job.error = f"Failed to {stage}: {str(e)}"
+
+    job.finished_at = timezone.now()
+    try:
+        with transaction.atomic():
+            hold_lease(job)
+            job.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+    except LeaseLost:
+        logger.warning("Import job %s was claimed by another worker, stopping", job.pk)
+        return job
+
+    if job.status == 'completed':
+        job.file.delete(save=False)
+    return job
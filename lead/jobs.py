@@ -0,0 +1,93 @@
+import threading
+import uuid
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+# Seconds between heartbeats of a running job; workers' --stale-after must be well above it
+HEARTBEAT_INTERVAL = 30
+
+
+class LeaseLost(Exception):
+    """Another worker claimed the job after this one did."""
+
+
+def claim_next_job(model, stale_after):
+    """
+    Lock and mark the oldest pending job of ``model`` as running.
+
+    Running jobs whose worker stopped updating them for ``stale_after`` are
+    picked up again, so an interrupted job is resumed rather than lost. Each
+    claim stores a new ``lease`` token; the previous worker, if still alive,
+    finds it changed at its next ``hold_lease`` and stops.
+    """
+    stale_before = timezone.now() - stale_after
+    with transaction.atomic():
+        job = (
+            model.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pending')
+            .first()
+        ) or (
+            model.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='running', updated_at__lt=stale_before)
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = 'running'
+        job.lease = uuid.uuid4().hex
+        job.started_at = job.started_at or timezone.now()
+        job.save(update_fields=['status', 'lease', 'started_at', 'updated_at'])
+        return job
+
+
+def hold_lease(job):
+    """
+    Lock ``job``'s row until the current transaction ends, raising
+    ``LeaseLost`` if it has been claimed again since ``job`` was. Call it
+    first in every transaction that commits work for the job: while the row
+    is locked ``claim_next_job`` skips it, however long the transaction takes.
+    """
+    if not type(job).objects.select_for_update().filter(pk=job.pk, lease=job.lease).exists():
+        raise LeaseLost(f"{type(job).__name__} {job.pk} was claimed by another worker")
+
+
+class Heartbeat:
+    """
+    Keeps a claimed job's ``updated_at`` fresh from a background thread while
+    the ``with`` block runs, so a slow but live job is never taken for stale.
+    """
+
+    def __init__(self, job, interval=HEARTBEAT_INTERVAL):
+        self.job = job
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'heartbeat-{job.pk}', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+    def beat(self):
+        """Touch the job; False once another worker holds it."""
+        return bool(
+            type(self.job).objects
+            .filter(pk=self.job.pk, lease=self.job.lease)
+            .update(updated_at=timezone.now())
+        )
+
+    def _run(self):
+        try:
+            while not self._stopped.wait(self.interval):
+                if not self.beat():
+                    return
+        finally:
+            # Connections are per thread; don't leave this one open
+            connection.close()
@@ -0,0 +1,120 @@
+import threading
+import time
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class LookupTableCache:
+    """
+    Whole small lookup tables (Mettad, Course, Service, checklist) as
+    ``{pk: instance}``, kept per process.
+
+    Tables expire after ``ttl`` seconds so other worker processes see edits
+    quickly; this process also drops a table when one of its rows is saved
+    or deleted (lead.signals).
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def get(self, model):
+        with self._lock:
+            entry = self._tables.get(model)
+        if entry is not None and entry[0] >= time.monotonic():
+            return entry[1]
+        table = {obj.pk: obj for obj in model._default_manager.all()}
+        with self._lock:
+            self._tables[model] = (time.monotonic() + self.ttl, table)
+        return table
+
+    def discard(self, model):
+        with self._lock:
+            self._tables.pop(model, None)
+
+
+lookup_tables = LookupTableCache()
+
+
+class BatchedManyRelatedField(serializers.ManyRelatedField):
+    """``many=True`` relation that hands the whole id list to its child at once."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        return self.child_relation.to_internal_values(list(data))
+
+
+class BatchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    ``PrimaryKeyRelatedField`` whose ``many=True`` form resolves every id
+    with one ``pk__in`` query instead of one ``get()`` per id. Errors and
+    their order match the stock field.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BatchedManyRelatedField(**list_kwargs)
+
+    def resolve(self, pks):
+        """``{pk: instance}`` for the ids in ``pks`` that exist."""
+        return self.get_queryset().in_bulk(pks)
+
+    def to_pk(self, data):
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        try:
+            if isinstance(data, bool):
+                raise TypeError
+            return self.get_queryset().model._meta.pk.to_python(data)
+        except (TypeError, DjangoValidationError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+    def to_internal_value(self, data):
+        return self.to_internal_values([data])[0]
+
+    def to_internal_values(self, data):
+        pks = []
+        for value in data:
+            try:
+                pks.append(self.to_pk(value))
+            except serializers.ValidationError:
+                break  # raised again below, after any missing id listed before it
+        found = self.resolve(set(pks))
+        for value, pk in zip(data, pks):
+            if pk not in found:
+                self.fail('does_not_exist', pk_value=value)
+        if len(pks) < len(data):
+            self.to_pk(data[len(pks)])
+        return [found[pk] for pk in pks]
+
+
+class CachedPrimaryKeyRelatedField(BatchedPrimaryKeyRelatedField):
+    """
+    Related-id field for a small lookup table: ids are resolved from
+    ``lookup_tables`` without a query. An id missing from the cached table
+    may have been added by another worker, so misses are looked up in the
+    database before being rejected. The field's queryset only names the
+    model, so it must not be filtered.
+    """
+
+    def resolve(self, pks):
+        model = self.get_queryset().model
+        table = lookup_tables.get(model)
+        found = {pk: table[pk] for pk in pks if pk in table}
+        missing = set(pks) - found.keys()
+        if missing and self.get_queryset().filter(pk__in=missing).exists():
+            # The cached table is behind the database: reload it once
+            lookup_tables.discard(model)
+            table = lookup_tables.get(model)
+            found = {pk: table[pk] for pk in pks if pk in table}
+        return found
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from lead.models import Enquiry
+from lead.phones import normalize_phone
+
+
+class Command(BaseCommand):
+    help = "Fill or repair Enquiry.phone_key / phone2_key for existing rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        changed, scanned = [], 0
+        updated = 0
+
+        rows = Enquiry.objects.only('id', 'phone', 'phone2', 'phone_key', 'phone2_key').order_by('id')
+        for enquiry in rows.iterator(chunk_size=batch_size):
+            scanned += 1
+            phone_key, phone2_key = normalize_phone(enquiry.phone), normalize_phone(enquiry.phone2)
+            if (enquiry.phone_key, enquiry.phone2_key) != (phone_key, phone2_key):
+                enquiry.phone_key, enquiry.phone2_key = phone_key, phone2_key
+                changed.append(enquiry)
+            if len(changed) >= batch_size:
+                Enquiry.objects.bulk_update(changed, ['phone_key', 'phone2_key'])
+                updated += len(changed)
+                changed = []
+
+        if changed:
+            Enquiry.objects.bulk_update(changed, ['phone_key', 'phone2_key'])
+            updated += len(changed)
+
+        self.stdout.write(self.style.SUCCESS(f"Scanned {scanned} enquiries, updated {updated}."))
@@ -0,0 +1,69 @@
+import csv
+import os
+import tempfile
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from login.models import Account
+from lead.importer import EnquiryImporter, READ_CHUNK_SIZE
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Measure peak Python memory of the streaming enquiry import for growing CSV sizes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', default='10000,50000,200000',
+                            help='Comma separated row counts to benchmark.')
+        parser.add_argument('--chunk-size', type=int, default=READ_CHUNK_SIZE)
+        parser.add_argument('--email', help='Account used as created_by (defaults to the first account).')
+
+    def handle(self, *args, **options):
+        # DEBUG keeps every executed query in memory, which would skew the numbers.
+        settings.DEBUG = False
+        user = (Account.objects.get(email=options['email']) if options['email']
+                else Account.objects.order_by('id').first())
+        sizes = [int(n) for n in options['rows'].split(',') if n.strip()]
+
+        self.stdout.write(f"{'rows':>10} {'file MB':>9} {'peak MB':>9} {'seconds':>9}")
+        for rows in sizes:
+            path = self._write_csv(rows)
+            try:
+                peak, elapsed = self._measure(path, user, options['chunk_size'])
+                size_mb = os.path.getsize(path) / 1024 / 1024
+                self.stdout.write(f"{rows:>10} {size_mb:>9.1f} {peak / 1024 / 1024:>9.1f} {elapsed:>9.2f}")
+            finally:
+                os.remove(path)
+
+    def _write_csv(self, rows):
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w', newline='') as fh:
+            writer = csv.writer(fh)
+            writer.writerow(['Name', 'Phone', 'Email', 'Preferred Course', 'Service', 'Feedback'])
+            for i in range(rows):
+                writer.writerow([f'Candidate {i}', f'9{i:09d}', f'candidate{i}@example.com', '', '', 'Imported lead'])
+        return path
+
+    def _measure(self, path, user, chunk_size):
+        tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            # Import for real, then roll back so the benchmark leaves no rows behind.
+            with transaction.atomic():
+                with open(path, 'rb') as fh:
+                    EnquiryImporter(user).import_file(File(fh, name=os.path.basename(path)), chunk_size)
+                raise _Rollback
+        except _Rollback:
+            pass
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak, elapsed
@@ -0,0 +1,68 @@
+import random
+import statistics
+import string
+import time
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from lead.models import Enquiry
+from lead.search import text_search_q
+from lead.views import BaseEnquiryListCreateView
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare indexed enquiry search with plain icontains as the table grows (rolled back afterwards)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000,50000,100000',
+                            help='Comma separated table sizes to measure at.')
+        parser.add_argument('--repeat', type=int, default=20, help='Searches per size.')
+
+    def handle(self, *args, **options):
+        settings.DEBUG = False
+        sizes = sorted(int(n) for n in options['sizes'].split(',') if n.strip())
+        fields = BaseEnquiryListCreateView.search_fields
+        rng = random.Random(42)
+
+        self.stdout.write(f"{'rows':>10} {'indexed ms':>11} {'icontains ms':>13}")
+        try:
+            with transaction.atomic():
+                inserted = Enquiry.objects.count()
+                for size in sizes:
+                    batch = [
+                        Enquiry(
+                            candidate_name=''.join(rng.choices(string.ascii_lowercase, k=10)),
+                            phone=''.join(rng.choices(string.digits, k=10)),
+                            email=''.join(rng.choices(string.ascii_lowercase, k=8)) + '@example.com',
+                        )
+                        for _ in range(max(size - inserted, 0))
+                    ]
+                    Enquiry.objects.bulk_create(batch, batch_size=2000)
+                    inserted = max(size, inserted)
+
+                    terms = [''.join(rng.choices(string.ascii_lowercase, k=4)) for _ in range(options['repeat'])]
+                    indexed = self._median_ms(terms, lambda t: text_search_q(Enquiry, fields, t))
+                    plain = self._median_ms(
+                        terms, lambda t: reduce(or_, (Q(**{f'{f}__icontains': t}) for f in fields))
+                    )
+                    self.stdout.write(f"{size:>10} {indexed:>11.2f} {plain:>13.2f}")
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _median_ms(self, terms, build_q):
+        timings = []
+        for term in terms:
+            started = time.perf_counter()
+            list(Enquiry.objects.filter(build_q(term)).order_by('-created_at')[:10].values_list('id', flat=True))
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
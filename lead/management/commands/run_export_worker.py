@@ -0,0 +1,35 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lead.exports import run_export_job
+from lead.jobs import HEARTBEAT_INTERVAL, claim_next_job
+from lead.models import ExportJob
+
+
+class Command(BaseCommand):
+    help = "Build queued XLSX exports. Runs until stopped unless --once is given."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty.')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--stale-after', type=int, default=1800,
+                            help='Seconds without a heartbeat after which a running export is considered abandoned and restarted.')
+
+    def handle(self, *args, **options):
+        if options['stale_after'] < 2 * HEARTBEAT_INTERVAL:
+            # Running jobs are touched every HEARTBEAT_INTERVAL seconds; leave room for a missed beat
+            raise CommandError(f"--stale-after must be at least {2 * HEARTBEAT_INTERVAL} seconds.")
+        stale_after = timedelta(seconds=options['stale_after'])
+        while True:
+            job = claim_next_job(ExportJob, stale_after)
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['sleep'])
+                continue
+
+            self.stdout.write(f"Export job {job.id}: {job.kind}")
+            run_export_job(job)
+            self.stdout.write(f"Export job {job.id}: {job.status}, {job.rows_written} rows")
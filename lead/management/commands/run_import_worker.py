@@ -0,0 +1,38 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lead.importer import run_import_job
+from lead.jobs import HEARTBEAT_INTERVAL, claim_next_job
+from lead.models import EnquiryImportJob
+
+
+class Command(BaseCommand):
+    help = "Process queued enquiry import jobs. Runs until stopped unless --once is given."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty.')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help='Seconds without a heartbeat after which a running job is resumed.')
+
+    def handle(self, *args, **options):
+        if options['stale_after'] < 2 * HEARTBEAT_INTERVAL:
+            # Running jobs are touched every HEARTBEAT_INTERVAL seconds; leave room for a missed beat
+            raise CommandError(f"--stale-after must be at least {2 * HEARTBEAT_INTERVAL} seconds.")
+        stale_after = timedelta(seconds=options['stale_after'])
+        while True:
+            job = claim_next_job(EnquiryImportJob, stale_after)
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['sleep'])
+                continue
+
+            self.stdout.write(f"Import job {job.id}: {job.file_name} (from row {job.rows_processed})")
+            run_import_job(job)
+            self.stdout.write(
+                f"Import job {job.id}: {job.status}, {job.successfully_imported} imported, "
+                f"{len(job.warnings)} warnings"
+            )
@@ -1,9 +1,10 @@
 # enquiry/models.py
 
-from django.db import models
+from django.db import models, transaction
 from branch.models import Branch
 from login.models import Account
 from tellecaller.models import Telecaller
+from .phones import normalize_phone
 
 class Mettad(models.Model):
     name = models.CharField(max_length=255)
@@ -52,6 +53,9 @@ class Enquiry(models.Model):
     Mettad = models.ForeignKey(Mettad, on_delete=models.CASCADE, related_name='enquiries', null=True, blank=True)
     phone = models.CharField(max_length=15)
     phone2 = models.CharField(max_length=15, blank=True, null=True)
+    # Normalized (E.164-style) copies of phone/phone2 for caller-ID lookups
+    phone_key = models.CharField(max_length=20, blank=True, null=True, db_index=True, editable=False)
+    phone2_key = models.CharField(max_length=20, blank=True, null=True, db_index=True, editable=False)
     email = models.EmailField()
     checklist = models.ManyToManyField(checklist, blank=True, related_name='enquiries')
     # Updated fields to use ForeignKey relationships
@@ -65,5 +69,118 @@ class Enquiry(models.Model):
     created_by = models.ForeignKey(Account, on_delete=models.SET_NULL, null=True, blank=True, related_name='created_enquiries')
     assigned_by = models.ForeignKey(Telecaller, on_delete=models.SET_NULL, null=True, blank=True, related_name='assigned_enquiries')
 
+    # Copy of the newest CallRegister row, kept in sync by callregister.signals
+    latest_call = models.ForeignKey('callregister.CallRegister', on_delete=models.SET_NULL, null=True, blank=True, related_name='+', editable=False)
+    latest_call_status = models.CharField(max_length=20, blank=True, null=True, editable=False)
+    latest_call_outcome = models.CharField(max_length=30, blank=True, null=True, editable=False)
+    last_called_at = models.DateTimeField(blank=True, null=True, editable=False)
+    latest_follow_up_date = models.DateField(blank=True, null=True, editable=False)
+
+    LATEST_CALL_FIELDS = ('latest_call', 'latest_call_status', 'latest_call_outcome', 'last_called_at', 'latest_follow_up_date')
+
+    class Meta:
+        indexes = [
+            # Keyset pagination: newest first, overall and per telecaller
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['assigned_by', '-created_at', '-id']),
+            # Latest-call reports (dashboards, jobs, reminders)
+            models.Index(fields=['assigned_by', 'latest_call_outcome']),
+            models.Index(fields=['latest_call_outcome', 'latest_follow_up_date']),
+        ]
+
+    def __str__(self):
+        return self.candidate_name
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Assignee as stored, so a reassignment can move the telecaller counters
+        instance._loaded_assigned_by_id = instance.__dict__.get('assigned_by_id')
+        return instance
+
+    def refresh_phone_keys(self):
+        self.phone_key = normalize_phone(self.phone)
+        self.phone2_key = normalize_phone(self.phone2)
+
+    def save(self, *args, **kwargs):
+        # Keys as last stored, so cached caller-ID lookups for an old number can be dropped
+        self._previous_phone_keys = (self.phone_key, self.phone2_key)
+        self.refresh_phone_keys()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None and not self._state.adding and not kwargs.get('force_insert'):
+            # Never write back a stale in-memory copy of the latest-call fields
+            update_fields = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.LATEST_CALL_FIELDS
+            ]
+            kwargs['update_fields'] = update_fields
+        if update_fields is not None and ({'phone', 'phone2'} & set(update_fields)):
+            kwargs['update_fields'] = set(update_fields) | {'phone_key', 'phone2_key'}
+        # The row and the counters updated by the signals commit together
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+class EnquiryImportJob(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    file = models.FileField(upload_to='enquiry_imports/')
+    file_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    created_by = models.ForeignKey(Account, on_delete=models.SET_NULL, null=True, blank=True, related_name='enquiry_import_jobs')
+    # Restrict lead assignment to the active telecallers of one branch
+    branch = models.ForeignKey(Branch, on_delete=models.SET_NULL, null=True, blank=True, related_name='enquiry_import_jobs')
+
+    # Progress, committed together with each imported chunk so a job can resume
+    rows_processed = models.PositiveIntegerField(default=0)
+    successfully_imported = models.PositiveIntegerField(default=0)
+    warnings = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True, null=True)
+    # Token of the worker's current claim (lead.jobs.claim_next_job)
+    lease = models.CharField(max_length=32, blank=True, default='', editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f"{self.file_name} ({self.status})"
+
+
+class ExportJob(models.Model):
+    KIND_CHOICES = [
+        ('enquiries', 'Enquiries'),
+        ('calls', 'Call logs'),
+    ]
+    STATUS_CHOICES = EnquiryImportJob.STATUS_CHOICES
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    created_by = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='export_jobs')
+    file = models.FileField(upload_to='exports/', blank=True)
+    rows_written = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+    # Token of the worker's current claim (lead.jobs.claim_next_job)
+    lease = models.CharField(max_length=32, blank=True, default='', editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
     def __str__(self):
-        return self.candidate_name
\ No newline at end of file
+        return f"{self.kind} export ({self.status})"
@@ -0,0 +1,83 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+_NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_phone(raw):
+    """
+    E.164-style key for a stored or dialled number: ``+`` followed by digits.
+
+    Spaces, dashes, brackets and dots are dropped; ``00`` is read as an
+    international prefix; a national number (optionally with a trunk ``0``)
+    gets ``PHONE_DEFAULT_COUNTRY_CODE``. Returns ``None`` when no digits remain.
+    """
+    if raw is None:
+        return None
+    raw = str(raw).strip()
+    digits = _NON_DIGITS.sub('', raw)
+    if not digits:
+        return None
+
+    country_code = getattr(settings, 'PHONE_DEFAULT_COUNTRY_CODE', '91')
+    national_length = getattr(settings, 'PHONE_NATIONAL_NUMBER_LENGTH', 10)
+
+    if raw.startswith('+'):
+        return f'+{digits}'
+    if digits.startswith('00'):
+        return f'+{digits[2:]}'
+
+    national = digits.lstrip('0')
+    if len(national) == national_length:
+        return f'+{country_code}{national}'
+    # Already carries a country code (e.g. 91XXXXXXXXXX) or is a short/service number
+    return f'+{national}'
+
+
+class PhoneLookupCache:
+    """
+    Small thread-safe LRU of caller-ID results, keyed on ``(phone key, scope)``.
+
+    ``scope`` names whose view of the enquiries the result is (e.g. all, or
+    one telecaller's). The scopes of a phone key are stored and dropped
+    together, so ``discard`` only needs the phone keys. Entries expire after
+    ``ttl`` seconds so other worker processes see edits quickly; this process
+    also drops the keys of any enquiry it saves or deletes.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, scope=None):
+        with self._lock:
+            scopes = self._data.get(key)
+            if scopes is None or scope not in scopes:
+                return None
+            expires_at, value = scopes[scope]
+            if expires_at < time.monotonic():
+                del scopes[scope]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, scope=None):
+        with self._lock:
+            self._data.setdefault(key, {})[scope] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+
+phone_lookup_cache = PhoneLookupCache()
@@ -0,0 +1,163 @@
+import logging
+from functools import reduce
+from operator import or_
+
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+
+from .models import Enquiry
+
+logger = logging.getLogger(__name__)
+
+# Enquiry columns served by the search index
+INDEXED_COLUMNS = ('candidate_name', 'email', 'phone')
+# Trigram indexes (pg_trgm and FTS5 alike) need at least three characters
+MIN_INDEXED_TERM_LENGTH = 3
+
+FTS_TABLE = 'lead_enquiry_search'
+
+_fts_available = {}
+
+
+# ---------- index installation ----------
+
+def _postgres_statements(table):
+    statements = ['CREATE EXTENSION IF NOT EXISTS pg_trgm']
+    for column in INDEXED_COLUMNS:
+        # icontains compiles to UPPER(col::text) LIKE UPPER('%term%'), so index that expression
+        statements.append(
+            f'CREATE INDEX IF NOT EXISTS {table}_{column}_trgm '
+            f'ON {table} USING gin ((UPPER({column}::text)) gin_trgm_ops)'
+        )
+    return statements
+
+
+def _sqlite_statements(table):
+    columns = ', '.join(INDEXED_COLUMNS)
+    new_values = ', '.join(f'new.{c}' for c in INDEXED_COLUMNS)
+    old_values = ', '.join(f'old.{c}' for c in INDEXED_COLUMNS)
+    delete_old = (
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+    insert_new = f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"{columns}, content='{table}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {table} BEGIN {delete_old} {insert_new} END",
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+    ]
+
+
+def install_search_indexes(using='default', **kwargs):
+    """
+    Create the substring-search structures for ``Enquiry``.
+
+    PostgreSQL gets pg_trgm GIN indexes on ``UPPER(column)``; SQLite gets an
+    FTS5 trigram table kept in sync by triggers. Connected to ``post_migrate``
+    and safe to run repeatedly.
+    """
+    connection = connections[using]
+    table = Enquiry._meta.db_table
+    if connection.vendor == 'postgresql':
+        statements = _postgres_statements(table)
+    elif connection.vendor == 'sqlite':
+        statements = _sqlite_statements(table)
+    else:
+        return
+
+    try:
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+    except DatabaseError as e:
+        logger.warning("Enquiry search indexes not installed, falling back to plain icontains: %s", e)
+    _fts_available.pop(using, None)
+
+
+def _has_fts_table(using):
+    if using not in _fts_available:
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            _fts_available[using] = cursor.fetchone() is not None
+    return _fts_available[using]
+
+
+# ---------- query building ----------
+
+def _icontains_q(fields, term):
+    return reduce(or_, (Q(**{f'{field}__icontains': term}) for field in fields))
+
+
+def enquiry_text_q(fields, term, using='default'):
+    """
+    Q matching ``term`` as a case-insensitive substring of any of ``fields``
+    (a subset of ``INDEXED_COLUMNS``) through the search index.
+    """
+    connection = connections[using]
+    if (connection.vendor == 'sqlite' and len(term) >= MIN_INDEXED_TERM_LENGTH
+            and _has_fts_table(using)):
+        phrase = '"' + term.replace('"', '""') + '"'
+        match = '{' + ' '.join(fields) + '} : ' + phrase
+        return Q(id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]))
+
+    # PostgreSQL: icontains is served by the UPPER(...) gin_trgm_ops indexes.
+    return _icontains_q(fields, term)
+
+
+def text_search_q(model, fields, term, using='default'):
+    """
+    Q for ``term`` across ``fields`` of ``model`` (DRF ``search_fields`` paths).
+
+    Indexed enquiry columns go through :func:`enquiry_text_q`. Each related
+    path becomes ``fk IN (SELECT pk ... WHERE ...)`` instead of an OR across
+    joins, so every branch of the OR can use its own index.
+    """
+    local, related = [], {}
+    for field in fields:
+        head, _, rest = field.partition('__')
+        if rest:
+            related.setdefault(head, []).append(rest)
+        else:
+            local.append(field)
+
+    conditions = []
+    if model is Enquiry:
+        indexed = [f for f in local if f in INDEXED_COLUMNS]
+        local = [f for f in local if f not in INDEXED_COLUMNS]
+        if indexed:
+            conditions.append(enquiry_text_q(indexed, term, using))
+    if local:
+        conditions.append(_icontains_q(local, term))
+
+    for head, rest in related.items():
+        related_model = model._meta.get_field(head).related_model
+        matches = related_model.objects.using(using).filter(
+            text_search_q(related_model, rest, term, using)
+        ).values('pk')
+        conditions.append(Q(**{f'{head}__in': matches}))
+
+    return reduce(or_, conditions)
+
+
+class IndexedSearchFilter(SearchFilter):
+    """
+    ``SearchFilter`` drop-in that routes enquiry name/email/phone matching
+    through the trigram (PostgreSQL) or FTS5 (SQLite) index. Every search term
+    must match at least one field, as with DRF's own filter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_fields or not search_terms:
+            return queryset
+
+        fields = [field.lstrip('^=@$') for field in search_fields]
+        for term in search_terms:
+            queryset = queryset.filter(text_search_q(queryset.model, fields, term, queryset.db))
+        return queryset
@@ -1,10 +1,13 @@
 from rest_framework import serializers
-from .models import Enquiry, Mettad, Course, Service, checklist
+from .models import Enquiry, Mettad, Course, Service, checklist, EnquiryImportJob, ExportJob
 from branch.models import Branch
 from login.models import Account
+from login.identity import ANONYMOUS, get_identity, identity_for
 from tellecaller.models import Telecaller
 from tellecaller.serializers import TelecallerSerializer
+from django.db import transaction
 from django.utils import timezone
+from .lookups import CachedPrimaryKeyRelatedField
 
 class BranchSerializer(serializers.ModelSerializer):
     class Meta:
@@ -31,6 +34,32 @@ class ChecklistSerializer(serializers.ModelSerializer):
         model = checklist
         fields = ['id', 'name']
 
+class EnquiryImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EnquiryImportJob
+        fields = [
+            'id', 'file_name', 'branch', 'status', 'rows_processed', 'successfully_imported',
+            'warnings', 'error', 'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = fields
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    file_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            'id', 'kind', 'params', 'status', 'rows_written', 'file_url',
+            'error', 'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = fields
+
+    def get_file_url(self, obj):
+        if not obj.file:
+            return None
+        request = self.context.get('request')
+        return request.build_absolute_uri(obj.file.url) if request else obj.file.url
+
 class EnquirySerializer(serializers.ModelSerializer):
     assigned_by_id = serializers.PrimaryKeyRelatedField(
         queryset=Telecaller.objects.all(), source='assigned_by', required=False
@@ -42,23 +71,24 @@ class EnquirySerializer(serializers.ModelSerializer):
     created_by_name = serializers.SerializerMethodField()
     
     # Mettad fields
-    mettad_id = serializers.PrimaryKeyRelatedField(
+    mettad_id = CachedPrimaryKeyRelatedField(
         queryset=Mettad.objects.all(), source='Mettad', write_only=True, required=False
     )
     mettad_name = serializers.SerializerMethodField()
     
     # Course fields
-    preferred_course_id = serializers.PrimaryKeyRelatedField(
+    preferred_course_id = CachedPrimaryKeyRelatedField(
         queryset=Course.objects.all(), source='preferred_course', write_only=True, required=False
     )
-    required_service_id = serializers.PrimaryKeyRelatedField(
+    required_service_id = CachedPrimaryKeyRelatedField(
         queryset=Service.objects.all(), source='required_service', write_only=True, required=False
     )
     preferred_course_name = serializers.SerializerMethodField()
     required_service_name = serializers.SerializerMethodField()
 
     # Checklist
-    checklist_ids = serializers.PrimaryKeyRelatedField(
+    # ✅ Ids of the small lookup tables resolve from the process cache, all checklist ids at once
+    checklist_ids = CachedPrimaryKeyRelatedField(
         many=True, queryset=checklist.objects.all(), source='checklist', write_only=True, required=False
     )
     checklist = ChecklistSerializer(many=True, read_only=True)
@@ -115,32 +145,62 @@ class EnquirySerializer(serializers.ModelSerializer):
             'data' in kwargs and
             hasattr(request, 'POST')):
             
-            data = request.POST.copy()  # make mutable
+            data = request.POST
 
-            checklist_ids = []
-            for key in list(data.keys()):
-                if key.startswith('checklist') and key != 'checklist_ids':
-                    value = data.get(key)
-                    if value and value.isdigit():
-                        checklist_ids.append(int(value))
+            checklist_ids = [
+                int(value) for key, value in data.items()
+                if key.startswith('checklist') and key != 'checklist_ids' and value and value.isdigit()
+            ]
 
             if checklist_ids:
+                data = data.copy()  # make mutable, only when there is something to merge
                 data.setlist('checklist_ids', checklist_ids)
 
             kwargs['data'] = data
 
         super().__init__(*args, **kwargs)
+        self._creators = {}  # created_by_id -> CrmIdentity, see _creator_identity
+
+    @staticmethod
+    def eager_load(queryset):
+        """
+        Load everything the serializer reads with ``queryset``: the creator's
+        role and telecaller row are joined in, the checklist is prefetched,
+        so a page costs the same few queries at any size.
+        """
+        return queryset.select_related(
+            'Mettad', 'assigned_by__branch', 'preferred_course', 'required_service',
+            'created_by__role', 'created_by__telecaller',
+        ).prefetch_related('checklist')
+
+    def _creator_identity(self, obj):
+        """
+        Role and telecaller of ``obj.created_by``, memoised per creator for
+        the whole page. The requester's own identity costs no query, other
+        creators none either when loaded through ``eager_load``.
+        """
+        if obj.created_by_id is None:
+            return ANONYMOUS
+        creators = self._creators
+        if obj.created_by_id not in creators:
+            request = self.context.get('request')
+            identity = get_identity(request) if request else ANONYMOUS
+            if not (identity.is_authenticated and identity.account.pk == obj.created_by_id):
+                identity = identity_for(obj.created_by)
+            creators[obj.created_by_id] = identity
+        return creators[obj.created_by_id]
 
     def get_created_by_role(self, obj):
-        return obj.created_by.role.name if obj.created_by and obj.created_by.role else None
+        identity = self._creator_identity(obj)
+        return identity.role_name if identity.is_authenticated else None
 
     def get_created_by_name(self, obj):
-        if obj.created_by:
-            if obj.created_by.role.name == 'Admin':
-                return "Admin"
-            telecaller = Telecaller.objects.filter(account=obj.created_by).first()
-            return telecaller.name if telecaller else obj.created_by.email
-        return None
+        identity = self._creator_identity(obj)
+        if not identity.is_authenticated:
+            return None
+        if identity.is_admin:
+            return "Admin"
+        return identity.telecaller.name if identity.telecaller else identity.account.email
 
     def get_assigned_by_name(self, obj):
         return obj.assigned_by.name if obj.assigned_by else None
@@ -158,16 +218,15 @@ class EnquirySerializer(serializers.ModelSerializer):
         return obj.required_service.name if obj.required_service else None
 
     def validate(self, data):
-        request_user = self.context['request'].user
-        role = request_user.role.name if request_user.role else None
+        identity = get_identity(self.context['request'])
 
-        if role == 'Admin':
+        if identity.is_admin:
             if not data.get('assigned_by'):
                 raise serializers.ValidationError({
                     'assigned_by_id': 'assigned_by is required when created_by is Admin.'
                 })
         else:
-            telecaller = Telecaller.objects.filter(account=request_user).first()
+            telecaller = identity.telecaller
             if telecaller:
                 data['assigned_by'] = telecaller
             else:
@@ -176,4 +235,14 @@ class EnquirySerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data['created_by'] = self.context['request'].user
-        return super().create(validated_data)
\ No newline at end of file
+        items = validated_data.pop('checklist', None)
+        with transaction.atomic():
+            enquiry = super().create(validated_data)
+            if items:
+                # A new enquiry has no checklist rows yet: one INSERT, no diffing as in set()
+                through = Enquiry.checklist.through
+                through.objects.bulk_create([
+                    through(enquiry_id=enquiry.pk, checklist_id=pk)
+                    for pk in dict.fromkeys(item.pk for item in items)
+                ])
+        return enquiry
\ No newline at end of file
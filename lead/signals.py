@@ -0,0 +1,73 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from crmtel.report_cache import invalidate_reports_on_commit
+from tellecaller.counters import CounterDeltas, bump_global
+from .lookups import lookup_tables
+from .models import Enquiry, Mettad, Course, Service, checklist
+from .phones import phone_lookup_cache
+
+
+@receiver(post_save, sender=Enquiry)
+@receiver(post_delete, sender=Enquiry)
+def forget_cached_phone_lookups(sender, instance, **kwargs):
+    previous_keys = getattr(instance, '_previous_phone_keys', ())
+    phone_lookup_cache.discard(instance.phone_key, instance.phone2_key, *previous_keys)
+
+
+@receiver(post_save, sender=Enquiry)
+def count_enquiry_assignment(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    deltas = CounterDeltas()
+    if created:
+        deltas.add_enquiry(instance.assigned_by_id, instance.latest_call_outcome)
+        bump_global('enquiries', 1)
+    else:
+        previous = getattr(instance, '_loaded_assigned_by_id', instance.assigned_by_id)
+        if previous != instance.assigned_by_id:
+            # save() never writes the latest-call copies, so the stored outcome may differ from ours
+            outcome = stored_latest_call_outcome(instance)
+            deltas.add_enquiry(previous, outcome, sign=-1)
+            deltas.add_enquiry(instance.assigned_by_id, outcome)
+    deltas.apply()
+    instance._loaded_assigned_by_id = instance.assigned_by_id
+
+
+def stored_latest_call_outcome(instance):
+    return Enquiry.objects.filter(pk=instance.pk).values_list('latest_call_outcome', flat=True).first()
+
+
+@receiver(pre_delete, sender=Enquiry)
+def remember_stored_outcome(sender, instance, origin=None, **kwargs):
+    # Rows collected for a queryset delete were just read; an instance deleted directly may be stale
+    if origin is instance:
+        instance.latest_call_outcome = stored_latest_call_outcome(instance)
+
+
+@receiver(post_delete, sender=Enquiry)
+def uncount_enquiry(sender, instance, **kwargs):
+    deltas = CounterDeltas()
+    deltas.add_enquiry(instance.assigned_by_id, instance.latest_call_outcome, sign=-1)
+    deltas.apply()
+    bump_global('enquiries', -1)
+
+
+@receiver(post_save, sender=Enquiry)
+@receiver(post_delete, sender=Enquiry)
+def invalidate_cached_reports(sender, raw=False, **kwargs):
+    if not raw:
+        invalidate_reports_on_commit()
+
+
+@receiver(post_save, sender=Mettad)
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Service)
+@receiver(post_save, sender=checklist)
+@receiver(post_delete, sender=Mettad)
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Service)
+@receiver(post_delete, sender=checklist)
+def forget_cached_lookup_table(sender, **kwargs):
+    transaction.on_commit(lambda: lookup_tables.discard(sender))
@@ -1,3 +1,312 @@
+import io
+from datetime import timedelta
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.db import IntegrityError
 from django.test import TestCase
+from django.utils import timezone
+from openpyxl import Workbook
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from branch.models import Branch
+from login.models import Account
+from roles.models import Role
+from tellecaller.models import Telecaller
+from lead.assignment import LeadAssigner
+from lead.exports import run_export_job
+from lead.importer import EnquiryImporter, run_import_job
+from lead.jobs import Heartbeat, claim_next_job
+from lead.models import Enquiry, EnquiryImportJob, ExportJob
+from lead.phones import phone_lookup_cache
+
+
+class LeadTestData(TestCase):
+    """An admin and three active telecallers in one branch."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_role = Role.objects.create(name='Admin')
+        cls.telecaller_role = Role.objects.create(name='Telecaller')
+        cls.admin = Account.objects.create_user('admin@example.com', 'pw', cls.admin_role)
+        cls.branch = Branch.objects.create(branch_name='Main', address='-', city='-', email='main@example.com', contact='0')
+        cls.telecallers = [cls.make_telecaller(f'Caller {i}') for i in range(3)]
+
+    @classmethod
+    def make_telecaller(cls, name, branch=None, status='active'):
+        email = f"{name.lower().replace(' ', '.')}@example.com"
+        account = Account.objects.create_user(email, 'pw', cls.telecaller_role)
+        return Telecaller.objects.create(
+            account=account, branch=branch or cls.branch, email=email, name=name,
+            contact='0', address='-', role=cls.telecaller_role, status=status,
+        )
+
+    @staticmethod
+    def client_for(account):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(account).access_token}')
+        return client
+
+    @staticmethod
+    def add_leads(telecaller, count, status='Active'):
+        Enquiry.objects.bulk_create([
+            Enquiry(candidate_name=f'{telecaller.name} lead {i}', phone=f'9{telecaller.pk:03d}{i:06d}',
+                    email='lead@example.com', assigned_by=telecaller, enquiry_status=status)
+            for i in range(count)
+        ])
+
+
+def csv_file(*rows, name='leads.csv'):
+    lines = ['Name,Phone,Email'] + [','.join(row) for row in rows]
+    return ContentFile('\n'.join(lines).encode(), name=name)
+
+
+def xlsx_file(*rows, name='leads.xlsx'):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['Name', 'Phone', 'Email'])
+    for row in rows:
+        sheet.append(list(row))
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return ContentFile(buffer.getvalue(), name=name)
+
+
+class EnquiryImporterTests(LeadTestData):
+
+    def test_warnings_number_rows_across_chunks(self):
+        rows = [(f'Lead {i}', f'90000000{i:02d}', '') for i in range(7)]
+        rows[1] = ('', '9000000001', '')    # spreadsheet row 3
+        rows[5] = ('Lead 5', '', '')        # spreadsheet row 7, in the third chunk of two
+        importer = EnquiryImporter(self.admin, chunk_size=2)
+        importer.import_file(csv_file(*rows), chunk_size=2)
+
+        self.assertEqual(importer.warnings, [
+            'Row 3: Failed - Name is required',
+            'Row 7: Failed - Phone is required',
+        ])
+        self.assertEqual(importer.created_count, 5)
+        self.assertEqual(importer.rows_processed, 7)
+        self.assertEqual(Enquiry.objects.count(), 5)
+
+    def test_xlsx_rows_keep_their_numbers_when_blank_rows_are_skipped(self):
+        rows = [('Lead 0', '9000000000', ''), (None, None, None), ('', '9000000002', ''), ('Lead 3', '9000000003', '')]
+        importer = EnquiryImporter(self.admin)
+        importer.import_file(xlsx_file(*rows), chunk_size=2)
+
+        self.assertEqual(importer.warnings, ['Row 4: Failed - Name is required'])
+        self.assertEqual(importer.created_count, 2)
+
+    def test_rejected_chunk_is_retried_row_by_row(self):
+        rows = [(f'Lead {i}', f'90000000{i:02d}', '') for i in range(4)]
+        save = Enquiry.save
+
+        def save_or_fail(enquiry, *args, **kwargs):
+            if enquiry.candidate_name == 'Lead 2':
+                raise IntegrityError('duplicate phone')
+            return save(enquiry, *args, **kwargs)
+
+        importer = EnquiryImporter(self.admin)
+        with mock.patch.object(type(Enquiry.objects), 'bulk_create', side_effect=IntegrityError('duplicate phone')), \
+                mock.patch.object(Enquiry, 'save', save_or_fail), \
+                self.assertLogs('lead.importer', 'WARNING') as logs:
+            importer.import_file(csv_file(*rows))
+
+        self.assertIn('rows 2-5 rejected', logs.output[0])
+
+        self.assertEqual(importer.warnings, ['Row 4: Failed - duplicate phone'])
+        self.assertEqual(importer.created_count, 3)
+        self.assertEqual(
+            sorted(Enquiry.objects.values_list('candidate_name', flat=True)),
+            ['Lead 0', 'Lead 1', 'Lead 3'],
+        )
+
+    def test_programming_errors_are_not_swallowed(self):
+        importer = EnquiryImporter(self.admin)
+        with mock.patch.object(type(Enquiry.objects), 'bulk_create', side_effect=TypeError('bug')):
+            with self.assertRaises(TypeError):
+                importer.import_file(csv_file(('Lead', '9000000000', '')))
+        self.assertFalse(Enquiry.objects.exists())
+
+
+class ImportJobClaimTests(LeadTestData):
+    STALE_AFTER = timedelta(minutes=10)
+
+    def setUp(self):
+        rows = [(f'Lead {i}', f'90000000{i:02d}', '') for i in range(6)]
+        self.job = EnquiryImportJob(file_name='leads.csv', created_by=self.admin)
+        self.job.file.save('leads.csv', csv_file(*rows), save=False)
+        self.job.save()
+
+    def age(self, job, minutes):
+        EnquiryImportJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(minutes=minutes))
+
+    def test_pending_job_is_claimed_once(self):
+        job = claim_next_job(EnquiryImportJob, self.STALE_AFTER)
+        self.assertEqual((job.pk, job.status), (self.job.pk, 'running'))
+        self.assertTrue(job.lease)
+        self.assertIsNone(claim_next_job(EnquiryImportJob, self.STALE_AFTER))
+
+    def test_live_job_is_not_reclaimed_while_its_heartbeat_runs(self):
+        job = claim_next_job(EnquiryImportJob, self.STALE_AFTER)
+        self.age(job, 30)  # one very slow chunk, say
+        self.assertTrue(Heartbeat(job).beat())
+        self.assertIsNone(claim_next_job(EnquiryImportJob, self.STALE_AFTER))
+
+    def test_interrupted_job_resumes_after_the_last_committed_row(self):
+        import_dataframe = EnquiryImporter.import_dataframe
+        chunks = []
+
+        def import_then_die(importer, df):
+            # The worker is killed while importing the second chunk
+            chunks.append(df)
+            if len(chunks) == 2:
+                raise KeyboardInterrupt
+            import_dataframe(importer, df)
+
+        first = claim_next_job(EnquiryImportJob, self.STALE_AFTER)
+        with mock.patch.object(EnquiryImporter, 'import_dataframe', import_then_die):
+            with self.assertRaises(KeyboardInterrupt):
+                run_import_job(first, chunk_size=2)
+        self.assertEqual(EnquiryImportJob.objects.get(pk=self.job.pk).rows_processed, 2)
+
+        self.age(first, 30)
+        second = claim_next_job(EnquiryImportJob, self.STALE_AFTER)
+        self.assertEqual(second.pk, first.pk)
+        self.assertNotEqual(second.lease, first.lease)
+        run_import_job(second, chunk_size=2)
+
+        second.refresh_from_db()
+        self.assertEqual((second.status, second.rows_processed, second.successfully_imported), ('completed', 6, 6))
+        self.assertEqual(
+            sorted(Enquiry.objects.values_list('candidate_name', flat=True)),
+            [f'Lead {i}' for i in range(6)],
+        )
+
+    def test_worker_whose_job_was_reclaimed_imports_nothing(self):
+        first = claim_next_job(EnquiryImportJob, self.STALE_AFTER)
+        self.age(first, 30)
+        second = claim_next_job(EnquiryImportJob, self.STALE_AFTER)
+
+        with self.assertLogs('lead.importer', 'WARNING'):
+            run_import_job(first, chunk_size=2)
+        self.assertFalse(Enquiry.objects.exists())
+        self.assertEqual(EnquiryImportJob.objects.get(pk=self.job.pk).status, 'running')
+
+        run_import_job(second, chunk_size=2)
+        self.assertEqual(Enquiry.objects.count(), 6)
+        self.assertEqual(EnquiryImportJob.objects.get(pk=self.job.pk).status, 'completed')
+
+
+class LeadAssignerTests(LeadTestData):
+
+    def test_least_loaded_telecaller_gets_the_next_lead(self):
+        busy, idle, some = self.telecallers
+        self.add_leads(busy, 3)
+        self.add_leads(some, 1)
+        self.add_leads(idle, 5, status='Not interested')  # closed leads are no load
+
+        assigner = LeadAssigner()
+        # idle 0 -> 1, then some and idle alternate at equal load, busy waits at 3
+        self.assertEqual([assigner.next() for _ in range(4)], [idle, some, idle, some])
+        self.assertEqual(assigner.plan(3), {idle.id: 1, busy.id: 1, some.id: 1})
+
+    def test_plan_levels_the_load(self):
+        self.add_leads(self.telecallers[0], 4)
+        allocation = LeadAssigner().plan(8)
+        self.assertEqual(sum(allocation.values()), 8)
+        self.assertEqual(allocation, {self.telecallers[1].id: 4, self.telecallers[2].id: 4})
+
+    def test_ties_rotate_and_the_rotation_is_persisted(self):
+        assigner = LeadAssigner()
+        first_round = [assigner.next().id for _ in range(3)]
+        self.assertEqual(len(set(first_round)), 3)
+        assigner.save_rotation()
+
+        # Equal loads again: the next assigner starts with whoever was assigned longest ago
+        assigner = LeadAssigner()
+        self.assertEqual([assigner.next().id for _ in range(3)], first_round)
+        sequences = dict(Telecaller.objects.values_list('id', 'assignment_sequence'))
+        self.assertEqual(sorted(sequences, key=sequences.get), first_round)
+
+    def test_only_active_telecallers_of_the_branch_are_eligible(self):
+        other_branch = Branch.objects.create(branch_name='Other', address='-', city='-', email='o@example.com', contact='0')
+        outsider = self.make_telecaller('Outsider', branch=other_branch)
+        self.make_telecaller('Gone', status='deactivated')
+
+        self.assertEqual(set(LeadAssigner(branch_id=self.branch.id).plan(9)), {t.id for t in self.telecallers})
+        self.assertEqual(LeadAssigner(branch_id=other_branch.id).plan(2), {outsider.id: 2})
+        self.assertEqual(LeadAssigner(exclude_ids=[t.id for t in self.telecallers], branch_id=self.branch.id).plan(1), {})
+
+
+class AssignmentViewTests(LeadTestData):
+
+    def test_import_rejects_a_non_numeric_branch(self):
+        response = self.client_for(self.admin).post(
+            '/api/enquiries/import/', {'file': csv_file(('Lead', '9000000000', '')), 'branch': 'north'},
+            format='multipart',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(EnquiryImportJob.objects.exists())
+
+    def test_reassign_rejects_non_numeric_ids(self):
+        client = self.client_for(self.admin)
+        for data in ({'telecaller_id': 'abc'}, {'telecaller_id': self.telecallers[0].id, 'branch': 'x'}):
+            self.assertEqual(client.post('/api/enquiries/reassign/', data, format='json').status_code, 400)
+
+    def test_reassign_spreads_open_leads_over_active_colleagues(self):
+        leaving = self.make_telecaller('Leaving', status='deactivated')
+        self.add_leads(leaving, 4)
+        self.add_leads(leaving, 2, status='Not interested')
+        response = self.client_for(self.admin).post(
+            '/api/enquiries/reassign/', {'telecaller_id': leaving.id}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(row['enquiries'] for row in response.json()['data']), 4)
+        self.assertEqual(Enquiry.objects.filter(assigned_by=leaving).count(), 2)
+        self.assertEqual(Enquiry.objects.filter(assigned_by=leaving, enquiry_status='Active').count(), 0)
+
+
+class ExportJobTests(LeadTestData):
+
+    def test_failure_is_logged_and_recorded(self):
+        ExportJob.objects.create(kind='calls', created_by=self.admin)
+        job = claim_next_job(ExportJob, timedelta(minutes=5))
+        with mock.patch('lead.exports.get_export_source', side_effect=RuntimeError('source broke')), \
+                self.assertLogs('lead.exports', level='ERROR') as logs:
+            run_export_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), ('failed', 'source broke'))
+        self.assertIn(f'Export job {job.pk} (calls) failed', logs.output[0])
+        self.assertIn('RuntimeError: source broke', logs.output[0])
+
+
+class PhoneLookupTests(LeadTestData):
+
+    def setUp(self):
+        phone_lookup_cache.discard('9876543210')
+        self.mine, self.theirs = self.telecallers[:2]
+        for telecaller in (self.mine, self.theirs):
+            Enquiry.objects.create(candidate_name=f'{telecaller.name} lead', phone='+91 98765 43210',
+                                   email='lead@example.com', assigned_by=telecaller)
+
+    def lookup(self, account):
+        response = self.client_for(account).get('/api/enquiries/lookup-by-phone/', {'phone': '098765-43210'})
+        self.assertEqual(response.status_code, 200)
+        return sorted(row['assigned_by_id'] for row in response.json()['data'])
+
+    def test_telecallers_only_match_their_own_enquiries(self):
+        self.assertEqual(self.lookup(self.mine.account), [self.mine.id])
+        # Cached per scope: the admin and the other telecaller get their own results
+        self.assertEqual(self.lookup(self.admin), sorted([self.mine.id, self.theirs.id]))
+        self.assertEqual(self.lookup(self.theirs.account), [self.theirs.id])
+        self.assertEqual(self.lookup(self.telecallers[2].account), [])
 
-# Create your tests here.
+    def test_saving_an_enquiry_drops_every_scope(self):
+        self.lookup(self.admin)
+        self.lookup(self.mine.account)
+        Enquiry.objects.filter(assigned_by=self.theirs).get().delete()
+        self.assertEqual(self.lookup(self.admin), [self.mine.id])
+        self.assertEqual(self.lookup(self.theirs.account), [])
@@ -4,6 +4,7 @@ from .views import (
     ActiveEnquiryListView,
     ClosedEnquiryListView,
     EnquiryDetailView,
+    EnquiryPhoneLookupView,
     EnquirySummaryByTelecaller,
     EnquiryStatisticsView,
     MettadListCreateView,
@@ -14,6 +15,10 @@ from .views import (
     ServiceListCreateView,
     ServiceDetailView,
     EnquiryImportAPIView,
+    EnquiryImportStatusAPIView,
+    EnquiryReassignAPIView,
+    EnquiryExportAPIView,
+    ExportJobStatusAPIView,
     ActiveServiceListView,
     ChecklistListCreateView,
     MetaConversionAPIView,
@@ -25,6 +30,7 @@ urlpatterns = [
     path('enquiries/', EnquiryListCreateView.as_view(), name='enquiry-list-create'),
     path('enquiries/active/', ActiveEnquiryListView.as_view(), name='active-enquiry-list'),
     path('enquiries/closed/', ClosedEnquiryListView.as_view(), name='closed-enquiry-list'),
+    path('enquiries/lookup-by-phone/', EnquiryPhoneLookupView.as_view(), name='enquiry-lookup-by-phone'),
     path('enquiries/<int:pk>/', EnquiryDetailView.as_view(), name='enquiry-detail'),
     path('enquiries/summary/', EnquirySummaryByTelecaller.as_view(), name='enquiry-summary'),
     path('enquiries/statistics/', EnquiryStatisticsView.as_view(), name='enquiry-statistics'),
@@ -35,6 +41,10 @@ urlpatterns = [
     path('services/<int:pk>/', ServiceDetailView.as_view(), name='service-detail'),
     path('services/active/', ActiveServiceListView.as_view(), name='active-service-list'),
     path('enquiries/import/', EnquiryImportAPIView.as_view(), name='enquiry-import'),
+    path('enquiries/import/<int:job_id>/', EnquiryImportStatusAPIView.as_view(), name='enquiry-import-status'),
+    path('enquiries/export/', EnquiryExportAPIView.as_view(), name='enquiry-export'),
+    path('exports/<int:job_id>/', ExportJobStatusAPIView.as_view(), name='export-job-status'),
+    path('enquiries/reassign/', EnquiryReassignAPIView.as_view(), name='enquiry-reassign'),
     path('meta-conversion/', MetaConversionAPIView.as_view(), name='meta-conversion'),
 
     path('checklists/', ChecklistListCreateView.as_view(), name='checklist-list'),
@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.pagination import PageNumberPagination
+from crmtel.pagination import KeysetPaginationMixin, CountStrategyMixin
 from django_filters.rest_framework import DjangoFilterBackend
 from django_filters import rest_framework as django_filters
 from rest_framework.views import APIView
@@ -31,10 +32,24 @@ from rest_framework.response import Response
 from rest_framework import status
 import requests
 from .models import checklist  # Import the Checklist model
+from .models import EnquiryImportJob, ExportJob
+from .filters import EnquiryBaseFilter
+from .search import IndexedSearchFilter
+from .phones import normalize_phone, phone_lookup_cache
+from django.db.models import F, DateField
+from django.db.models.functions import TruncDate, TruncWeek, TruncMonth
+from collections import defaultdict
+from .assignment import LeadAssigner
+from tellecaller.counters import CounterDeltas
+from crmtel.report_cache import cached_report, invalidate_reports_on_commit
+from branch.models import Branch
+from django.db import transaction
+from .serializers import EnquiryImportJobSerializer, ExportJobSerializer
+from .exports import export_response
 from django.core.exceptions import ValidationError
 
 # ✅ Pagination
-class LeadsPagination(PageNumberPagination):
+class LeadsPagination(KeysetPaginationMixin, CountStrategyMixin, PageNumberPagination):
     page_size = 10
     page_size_query_param = 'limit'
     max_page_size = 100
@@ -44,8 +59,9 @@ class LeadsPagination(PageNumberPagination):
             "code": 200,
             "message": "Data fetched successfully",
             "data": data,
-            "pagination": {
+            "pagination": self.get_cursor_pagination() if self.cursor_mode else {
                 "total": self.page.paginator.count,
+                "totalExact": self.page.paginator.count_is_exact,
                 "page": self.page.number,
                 "limit": self.get_page_size(self.request),
                 "totalPages": self.page.paginator.num_pages,
@@ -54,35 +70,13 @@ class LeadsPagination(PageNumberPagination):
             }
         })
 
-# ✅ Updated Filter with Mettad
-class EnquiryBaseFilter(django_filters.FilterSet):
-    start_date = django_filters.DateFilter(field_name='created_at', lookup_expr='gte')
-    end_date = django_filters.DateFilter(field_name='created_at', lookup_expr='lte')
-    enquiry_source = django_filters.CharFilter(field_name='enquiry_source', lookup_expr='iexact')
-    branch = django_filters.NumberFilter(field_name='assigned_by__branch')
-    branch_name = django_filters.CharFilter(field_name='assigned_by__branch__branch_name', lookup_expr='icontains')
-    telecaller = django_filters.NumberFilter(field_name='assigned_by')
-    telecaller_name = django_filters.CharFilter(field_name='assigned_by__name', lookup_expr='icontains')
-    enquiry_status = django_filters.CharFilter(field_name='enquiry_status', lookup_expr='iexact')
-    candidate_name = django_filters.CharFilter(field_name='candidate_name', lookup_expr='icontains')
-    phone = django_filters.CharFilter(field_name='phone', lookup_expr='icontains')
-
-    # Mettad filters
-    mettad = django_filters.NumberFilter(field_name='Mettad')
-    mettad_name = django_filters.CharFilter(field_name='Mettad__name', lookup_expr='icontains')
-
-    class Meta:
-        model = Enquiry
-        fields = ['enquiry_source', 'branch', 'branch_name', 'telecaller', 'telecaller_name', 'candidate_name','phone',
-                 'enquiry_status', 'start_date', 'end_date', 'mettad', 'mettad_name']
-
 # ✅ Base View (Updated search fields)
 class BaseEnquiryListCreateView(ListCreateAPIView):
     serializer_class = EnquirySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     pagination_class = LeadsPagination
     filterset_class = EnquiryBaseFilter
-    filter_backends = [DjangoFilterBackend, drf_filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter]
 
     search_fields = [
         'candidate_name',
@@ -94,15 +88,13 @@ class BaseEnquiryListCreateView(ListCreateAPIView):
     ]
 
     def get_queryset(self):
-        user = self.request.user
-        role = getattr(user.role, 'name', None)
+        identity = self.request.crm_identity
         queryset = Enquiry.objects.all()
 
         # ✅ Filter assigned enquiries for non-admin users
-        if role != 'Admin':
-            telecaller = Telecaller.objects.filter(account=user).first()
-            if telecaller:
-                queryset = queryset.filter(assigned_by=telecaller)
+        if not identity.is_admin:
+            if identity.telecaller_id:
+                queryset = queryset.filter(assigned_by_id=identity.telecaller_id)
             else:
                 return Enquiry.objects.none()
 
@@ -111,7 +103,7 @@ class BaseEnquiryListCreateView(ListCreateAPIView):
         if enquiry_status:
             queryset = queryset.filter(enquiry_status=enquiry_status)
 
-        return queryset.select_related('Mettad', 'assigned_by__branch').order_by('-created_at')
+        return EnquirySerializer.eager_load(queryset).order_by('-created_at')
 
     def filter_queryset(self, queryset):
         # Apply default filtering (from EnquiryBaseFilter and SearchFilter)
@@ -407,16 +399,14 @@ class ClosedEnquiryListView(BaseEnquiryListCreateView):
 # ✅ General Enquiry View (same as before)
 class EnquiryListCreateView(BaseEnquiryListCreateView):
     def get_queryset(self):
-        user = self.request.user
-        role = getattr(user.role, 'name', None)
+        identity = self.request.crm_identity
 
         queryset = Enquiry.objects.all()
 
         # Filter based on logged-in telecaller
-        if role != 'Admin':
-            telecaller = Telecaller.objects.filter(account=user).first()
-            if telecaller:
-                queryset = queryset.filter(assigned_by=telecaller)
+        if not identity.is_admin:
+            if identity.telecaller_id:
+                queryset = queryset.filter(assigned_by_id=identity.telecaller_id)
             else:
                 return Enquiry.objects.none()
 
@@ -425,7 +415,7 @@ class EnquiryListCreateView(BaseEnquiryListCreateView):
         if enquiry_status:
             queryset = queryset.filter(enquiry_status=enquiry_status)
 
-        return queryset.select_related('Mettad', 'assigned_by__branch').order_by('-created_at')
+        return EnquirySerializer.eager_load(queryset).order_by('-created_at')
 
     def perform_create(self, serializer):
         enquiry_status = getattr(self, 'enquiry_status', None)
@@ -453,7 +443,7 @@ class EnquiryListCreateView(BaseEnquiryListCreateView):
 
 # ✅ Retrieve / Update / Delete (same as before)
 class EnquiryDetailView(RetrieveUpdateDestroyAPIView):
-    queryset = Enquiry.objects.all().select_related('Mettad', 'assigned_by__branch')
+    queryset = EnquirySerializer.eager_load(Enquiry.objects.all())
     serializer_class = EnquirySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
@@ -473,6 +463,10 @@ class EnquiryDetailView(RetrieveUpdateDestroyAPIView):
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
 
+        if getattr(instance, '_prefetched_objects_cache', None):
+            # The checklist may have changed; render it from the database again
+            instance._prefetched_objects_cache = {}
+
         return Response({
             "code": 200,
             "message": "Enquiry updated successfully",
@@ -487,40 +481,155 @@ class EnquiryDetailView(RetrieveUpdateDestroyAPIView):
             "message": "Enquiry deleted successfully"
         }, status=status.HTTP_200_OK)
 
+# ✅ Caller-ID: match an incoming number against phone / phone2
+class EnquiryPhoneLookupView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        phone_key = normalize_phone(request.query_params.get('phone'))
+        if not phone_key:
+            return Response({"code": 400, "message": "phone is required"}, status=400)
+
+        # ✅ Admins match every enquiry, telecallers only the ones assigned to them
+        identity = request.crm_identity
+        if identity.is_admin:
+            scope, queryset = 'admin', Enquiry.objects.all()
+        elif identity.telecaller_id:
+            scope, queryset = identity.telecaller_id, Enquiry.objects.filter(assigned_by_id=identity.telecaller_id)
+        else:
+            scope, queryset = None, Enquiry.objects.none()
+
+        data = phone_lookup_cache.get(phone_key, scope)
+        if data is None:
+            data = list(
+                queryset
+                .filter(Q(phone_key=phone_key) | Q(phone2_key=phone_key))
+                .order_by('-created_at')
+                .values(
+                    'id', 'candidate_name', 'phone', 'phone2', 'email', 'enquiry_status',
+                    'follow_up_on', 'assigned_by_id', assigned_by_name=F('assigned_by__name'),
+                )
+            )
+            phone_lookup_cache.set(phone_key, data, scope)
+
+        return Response({
+            "code": 200,
+            "message": "Enquiry lookup completed" if data else "No enquiry found for this number",
+            "phone_key": phone_key,
+            "data": data
+        })
+
+# ✅ ?group_by= buckets for the enquiry time series
+ENQUIRY_PERIODS = {
+    'day': TruncDate,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def enquiry_status_counts(prefix='', condition=None):
+    """
+    Total/active/closed enquiry counts as conditional aggregates.
+
+    ``prefix`` is the path from the queried model to ``Enquiry`` (e.g.
+    ``'assigned_enquiries__'``) and ``condition`` an extra ``Q`` every
+    count must satisfy.
+    """
+    condition = condition or Q()
+    return {
+        "total_enquiries": Count(f'{prefix}id', filter=condition),
+        "active": Count(f'{prefix}id', filter=condition & Q(**{f'{prefix}enquiry_status': 'Active'})),
+        "closed": Count(f'{prefix}id', filter=condition & Q(**{f'{prefix}enquiry_status': 'Closed'})),
+    }
+
+
+def enquiry_period_series(queryset, group_by, *fields):
+    """
+    Group ``queryset`` by ``group_by`` period (plus ``fields``) and return
+    ``values()`` rows carrying ``period`` and the status counts.
+    """
+    trunc = ENQUIRY_PERIODS[group_by]
+    return (
+        queryset
+        .annotate(period=trunc('created_at', output_field=DateField()))
+        .values(*fields, 'period')
+        .annotate(**enquiry_status_counts())
+        .order_by(*fields, 'period')
+    )
+
+
+def format_period(row):
+    return {
+        "period": str(row['period']),
+        "total_enquiries": row['total_enquiries'],
+        "active": row['active'],
+        "closed": row['closed'],
+    }
+
+
+def get_group_by(request):
+    group_by = request.query_params.get('group_by', '').strip().lower()
+    if group_by and group_by not in ENQUIRY_PERIODS:
+        return None, Response({
+            "code": 400,
+            "message": f"group_by must be one of: {', '.join(ENQUIRY_PERIODS)}",
+            "data": None
+        }, status=status.HTTP_400_BAD_REQUEST)
+    return group_by, None
+
+
 # ✅ Summary by Telecaller (Updated to include Mettad info)
 class EnquirySummaryByTelecaller(APIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    @cached_report('enquiry-summary', shared=True)
     def get(self, request):
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
         branch_id = request.query_params.get('branch')
         mettad_id = request.query_params.get('mettad')
+        group_by, error = get_group_by(request)
+        if error:
+            return error
 
-        data = []
-        telecallers = Telecaller.objects.all()
+        # ✅ Enquiry filters, expressed from both sides of the assigned_by relation
+        condition = Q()
+        enquiries = Enquiry.objects.filter(assigned_by__isnull=False)
+        if start_date:
+            condition &= Q(assigned_enquiries__created_at__gte=start_date)
+            enquiries = enquiries.filter(created_at__gte=start_date)
+        if end_date:
+            condition &= Q(assigned_enquiries__created_at__lte=end_date)
+            enquiries = enquiries.filter(created_at__lte=end_date)
+        if mettad_id:
+            condition &= Q(assigned_enquiries__Mettad_id=mettad_id)
+            enquiries = enquiries.filter(Mettad_id=mettad_id)
 
+        telecallers = Telecaller.objects.select_related('branch').order_by('id')
         if branch_id:
             telecallers = telecallers.filter(branch_id=branch_id)
+            enquiries = enquiries.filter(assigned_by__branch_id=branch_id)
 
-        for telecaller in telecallers:
-            enquiries = Enquiry.objects.filter(assigned_by=telecaller)
+        # ✅ One grouped query for every telecaller's counts
+        telecallers = telecallers.annotate(**enquiry_status_counts('assigned_enquiries__', condition))
 
-            if start_date:
-                enquiries = enquiries.filter(created_at__gte=start_date)
-            if end_date:
-                enquiries = enquiries.filter(created_at__lte=end_date)
-            if mettad_id:
-                enquiries = enquiries.filter(Mettad_id=mettad_id)
+        series = defaultdict(list)
+        if group_by:
+            for row in enquiry_period_series(enquiries, group_by, 'assigned_by_id'):
+                series[row['assigned_by_id']].append(format_period(row))
 
+        data = []
+        for telecaller in telecallers:
             summary = {
                 "telecaller_id": telecaller.id,
                 "telecaller_name": telecaller.name,
-                "branch_name": telecaller.branch.branch_name if hasattr(telecaller, 'branch') and telecaller.branch else None,
-                "total_enquiries": enquiries.count(),
-                "active": enquiries.filter(enquiry_status="Active").count(),
-                "closed": enquiries.filter(enquiry_status="Closed").count(),
+                "branch_name": telecaller.branch.branch_name if telecaller.branch else None,
+                "total_enquiries": telecaller.total_enquiries,
+                "active": telecaller.active,
+                "closed": telecaller.closed,
             }
+            if group_by:
+                summary["series"] = series[telecaller.id]
             data.append(summary)
 
         return Response({
@@ -534,11 +643,15 @@ class EnquirySummaryByTelecaller(APIView):
 class EnquiryStatisticsView(APIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    @cached_report('enquiry-statistics', shared=True)
     def get(self, request):
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
         branch_id = request.query_params.get('branch')
         mettad_id = request.query_params.get('mettad')
+        group_by, error = get_group_by(request)
+        if error:
+            return error
 
         queryset = Enquiry.objects.all()
 
@@ -551,11 +664,10 @@ class EnquiryStatisticsView(APIView):
         if mettad_id:
             queryset = queryset.filter(Mettad_id=mettad_id)
 
-        stats = {
-            "total_enquiries": queryset.count(),
-            "active": queryset.filter(enquiry_status="Active").count(),
-            "closed": queryset.filter(enquiry_status="Closed").count(),
-        }
+        # ✅ Single pass for all three counts
+        stats = queryset.aggregate(**enquiry_status_counts())
+        if group_by:
+            stats["series"] = [format_period(row) for row in enquiry_period_series(queryset, group_by)]
 
         return Response({
             "code": 200,
@@ -569,6 +681,15 @@ class EnquiryStatisticsView(APIView):
 
 
 
+def optional_id(value):
+    """Request value as an integer id, or None when missing or blank; ValueError otherwise."""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"not an id: {value!r}")
+    return int(value)
+
+
 class EnquiryImportAPIView(APIView):
     parser_classes = [MultiPartParser]
     permission_classes = [IsAuthenticated]
@@ -578,61 +699,141 @@ class EnquiryImportAPIView(APIView):
         if not file:
             return Response({"message": "No file uploaded"}, status=400)
 
+        # ✅ Optional branch: only that branch's active telecallers receive the leads
         try:
-            df = pd.read_excel(file) if file.name.endswith('.xlsx') else pd.read_csv(file)
-        except Exception as e:
-            return Response({"code": 400, "message": f"Failed to read file: {str(e)}"}, status=400)
+            branch_id = optional_id(request.data.get('branch'))
+        except ValueError:
+            return Response({"code": 400, "message": "branch must be a numeric id"}, status=400)
+        if branch_id and not Branch.objects.filter(id=branch_id).exists():
+            return Response({"code": 400, "message": "Branch not found"}, status=400)
+
+        # ✅ Queue the file; the run_import_worker command does the import
+        job = EnquiryImportJob.objects.create(
+            file=file,
+            file_name=file.name,
+            created_by=request.user,
+            branch_id=branch_id or None,
+        )
 
-        # ✅ Fetch all telecallers
-        telecallers = list(Telecaller.objects.all())
-        total_telecallers = len(telecallers)
-        telecaller_index = 0
+        return Response({
+            "code": 202,
+            "message": "Import queued successfully",
+            "job_id": job.id,
+            "data": EnquiryImportJobSerializer(job).data
+        }, status=status.HTTP_202_ACCEPTED)
 
-        created = []
-        warnings = []
 
-        for idx, row in df.iterrows():
-            try:
-                # ✅ Round-robin telecaller assignment
-                assigned_by = telecallers[telecaller_index] if total_telecallers > 0 else None
-                telecaller_index = (telecaller_index + 1) % total_telecallers
-
-                preferred_course = None
-                if pd.notna(row.get('Preferred Course')):
-                    preferred_course = Course.objects.filter(name=row['Preferred Course']).first()
-                    if not preferred_course:
-                        warnings.append(f"Row {idx + 2}: Course '{row['Preferred Course']}' not found.")
-
-                required_service = None
-                if pd.notna(row.get('Service')):
-                    required_service = Service.objects.filter(name=row['Service']).first()
-                    if not required_service:
-                        warnings.append(f"Row {idx + 2}: Service '{row['Service']}' not found.")
-
-                enquiry = Enquiry.objects.create(
-                    candidate_name=row['Name'],
-                    phone=row['Phone'],
-                    email=row.get('Email', ''),
-                    preferred_course=preferred_course,
-                    required_service=required_service,
-                    enquiry_status='Active',
-                    follow_up_on=None,
-                    created_by=request.user,
-                    assigned_by=assigned_by,
-                    feedback=row['Feedback'] if pd.notna(row.get('Feedback')) else '',
+class EnquiryImportStatusAPIView(APIView):
+    permission_classes = [IsAuthenticated]
 
-                )
-                created.append(enquiry)
+    def get(self, request, job_id):
+        jobs = EnquiryImportJob.objects.all()
+        if not request.crm_identity.is_admin:
+            jobs = jobs.filter(created_by=request.user)
 
-            except Exception as e:
-                warnings.append(f"Row {idx + 2}: Failed - {str(e)}")
+        job = jobs.filter(id=job_id).first()
+        if not job:
+            return Response({
+                "code": 404,
+                "message": "Import job not found"
+            }, status=status.HTTP_404_NOT_FOUND)
 
         return Response({
-            "code": 201 if created else 207,
-            "message": f"{len(created)} enquiries imported successfully",
-            "successfully_imported": len(created),
-            "warnings": warnings
-        }, status=201 if created else 207)
+            "code": 200,
+            "message": "Import job fetched successfully",
+            "data": EnquiryImportJobSerializer(job).data
+        })
+class EnquiryExportAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return export_response(request, 'enquiries')
+
+
+class ExportJobStatusAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = ExportJob.objects.filter(id=job_id, created_by=request.user).first()
+        if not job:
+            return Response({
+                "code": 404,
+                "message": "Export job not found"
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            "code": 200,
+            "message": "Export job fetched successfully",
+            "data": ExportJobSerializer(job, context={'request': request}).data
+        })
+
+
+class EnquiryReassignAPIView(APIView):
+    """
+    Move a deactivated telecaller's open (Active) leads to the least-loaded
+    active telecallers, by default within the same branch.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not request.crm_identity.is_admin:
+            return Response({"code": 403, "message": "Only admins can reassign enquiries."}, status=403)
+
+        try:
+            telecaller_id = optional_id(request.data.get('telecaller_id'))
+            branch_id = optional_id(request.data.get('branch'))
+        except ValueError:
+            return Response({"code": 400, "message": "telecaller_id and branch must be numeric ids"}, status=400)
+
+        telecaller = Telecaller.objects.filter(id=telecaller_id).first() if telecaller_id else None
+        if not telecaller:
+            return Response({"code": 404, "message": "Telecaller not found"}, status=404)
+        if telecaller.status != 'deactivated':
+            return Response({"code": 400, "message": "Only a deactivated telecaller's enquiries can be reassigned."}, status=400)
+
+        branch_id = branch_id or telecaller.branch_id
+
+        with transaction.atomic():
+            leads = list(
+                Enquiry.objects.select_for_update()
+                .filter(assigned_by=telecaller, enquiry_status='Active')
+                .order_by('created_at', 'id')
+                .values_list('id', 'latest_call_outcome', 'phone_key', 'phone2_key')
+            )
+            lead_ids = [lead[0] for lead in leads]
+
+            assigner = LeadAssigner(branch_id=branch_id, exclude_ids=[telecaller.id])
+            if lead_ids and not assigner:
+                return Response({"code": 400, "message": "No active telecaller available to take the enquiries."}, status=400)
+
+            # ✅ One UPDATE per receiving telecaller
+            reassigned = {}
+            deltas = CounterDeltas()
+            start = 0
+            for target_id, count in assigner.plan(len(lead_ids)).items():
+                Enquiry.objects.filter(id__in=lead_ids[start:start + count]).update(assigned_by_id=target_id)
+                for _, outcome, _, _ in leads[start:start + count]:
+                    deltas.add_enquiry(telecaller.id, outcome, sign=-1)
+                    deltas.add_enquiry(target_id, outcome)
+                reassigned[target_id] = count
+                start += count
+            deltas.apply()
+            assigner.save_rotation()
+            invalidate_reports_on_commit()
+            # update() sends no post_save, so drop the caller-ID lookups showing the old assignee
+            phone_keys = [key for lead in leads for key in lead[2:] if key]
+            transaction.on_commit(lambda: phone_lookup_cache.discard(*phone_keys))
+
+        return Response({
+            "code": 200,
+            "message": f"{len(lead_ids)} enquiries reassigned successfully",
+            "data": [
+                {"telecaller_id": target_id, "telecaller_name": assigner.telecallers[target_id].name, "enquiries": count}
+                for target_id, count in reassigned.items()
+            ]
+        })
+
+
 # conversions/views.py
 
 
@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+
+from django.core.exceptions import ObjectDoesNotExist
+
+from .models import Account
+
+
+def identity_accounts():
+    """Accounts with the role and telecaller row joined in, for ``identity_for``."""
+    return Account.objects.select_related('role', 'telecaller')
+
+
+@dataclass(frozen=True)
+class CrmIdentity:
+    """
+    Who is calling: the account plus the role and telecaller facts views
+    branch on. Available as ``request.crm_identity``.
+    """
+    account: Account = None
+    role_name: str = None
+    telecaller_id: int = None
+    branch_id: int = None
+
+    @property
+    def is_authenticated(self):
+        return self.account is not None
+
+    @property
+    def is_admin(self):
+        return self.role_name == 'Admin'
+
+    @property
+    def telecaller(self):
+        """The caller's ``Telecaller`` row (loaded with the account), or None."""
+        if self.telecaller_id is None:
+            return None
+        return self.account.telecaller
+
+
+ANONYMOUS = CrmIdentity()
+
+
+def identity_for(account):
+    """
+    Identity of ``account``. Loaded through ``identity_accounts()`` this costs
+    no query; a bare account costs one each for the role and telecaller.
+    """
+    if account is None or not account.is_authenticated:
+        return ANONYMOUS
+    try:
+        telecaller = account.telecaller
+    except ObjectDoesNotExist:
+        telecaller = None
+    return CrmIdentity(
+        account=account,
+        role_name=account.role.name if account.role_id else None,
+        telecaller_id=telecaller.pk if telecaller else None,
+        branch_id=telecaller.branch_id if telecaller else None,
+    )
+
+
+def load_identity(account_id):
+    """Identity of the account with ``account_id``, loaded fresh in one query."""
+    if account_id is None:
+        return ANONYMOUS
+    return identity_for(identity_accounts().filter(pk=account_id).first())
+
+
+def get_identity(request):
+    """``request.crm_identity``, resolving it for requests that never went through the middleware."""
+    identity = getattr(request, 'crm_identity', None)
+    if identity is None:
+        identity = load_identity(getattr(getattr(request, 'user', None), 'pk', None))
+    return identity
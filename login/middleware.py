@@ -0,0 +1,15 @@
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+
+from .identity import load_identity
+
+
+class CrmIdentityMiddleware(MiddlewareMixin):
+    """
+    Give every request a ``crm_identity``. It resolves lazily (one query)
+    from whichever user authenticated the request; API requests get it
+    replaced by ``CrmJWTAuthentication`` without an extra query.
+    """
+
+    def process_request(self, request):
+        request.crm_identity = SimpleLazyObject(lambda: load_identity(request.user.pk))
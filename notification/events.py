@@ -0,0 +1,121 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+def telecaller_channel(telecaller_id):
+    return f"telecaller:{telecaller_id}"
+
+
+def format_sse(event):
+    """One ``text/event-stream`` frame for ``event`` (``{"type", "data"}``)."""
+    data = json.dumps(event['data'], cls=DjangoJSONEncoder)
+    return f"event: {event['type']}\ndata: {data}\n\n"
+
+
+class Subscription:
+    """
+    One stream's queue. Events may be put from any thread; they are handed
+    to the subscriber's event loop, dropping the oldest when a slow client
+    falls ``maxsize`` events behind.
+    """
+
+    def __init__(self, bus, channel, loop, maxsize):
+        self.bus = bus
+        self.channel = channel
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def put(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The stream's event loop is closed (e.g. its worker is shutting
+            # down); the subscription is dead, and the publisher must not fail
+            self.close()
+
+    def _put(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """In-process fan-out of channel events to this process's open streams."""
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel, maxsize=100):
+        subscription = Subscription(self, channel, asyncio.get_running_loop(), maxsize)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def has_subscribers(self, channel):
+        return channel in self._subscriptions
+
+    def dispatch(self, channel, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.put(event)
+
+
+class LocalBroker:
+    """
+    Broker for a single process (tests, runserver, one ASGI worker): events
+    go straight to the local bus.
+
+    A multi-process broker (e.g. Redis pub/sub) implements the same two
+    methods: ``publish`` sends the event to every process, each of which
+    hands it to ``bus.dispatch``; ``wants`` may simply return True.
+    """
+
+    def __init__(self, bus):
+        self.bus = bus
+
+    def publish(self, channel, event):
+        self.bus.dispatch(channel, event)
+
+    def wants(self, channel):
+        """Whether anyone may be listening on ``channel`` (lets publishers skip work)."""
+        return self.bus.has_subscribers(channel)
+
+
+bus = EventBus()
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.EVENT_BROKER)(bus)
+    return _broker
+
+
+def publish(channel, event_type, data):
+    """Publish an event once the current transaction (if any) commits."""
+    event = {"type": event_type, "data": data}
+    transaction.on_commit(lambda: get_broker().publish(channel, event))
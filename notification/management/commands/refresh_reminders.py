@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from notification.reminders import refresh_reminders
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed reminders table (schedule every minute when REMINDERS_PRECOMPUTED is on)."
+
+    def handle(self, *args, **options):
+        written = refresh_reminders()
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {written} reminders."))
@@ -1,3 +1,30 @@
 from django.db import models
+from lead.models import Enquiry
+from tellecaller.models import Telecaller
 
 # Create your models here.
+
+
+class Reminder(models.Model):
+    """
+    Precomputed follow-up/walk-in reminders, rebuilt by
+    ``manage.py refresh_reminders``. Each row is the latest call of an
+    enquiry for its telecaller; ``latest_for_enquiry`` marks the rows that
+    are also the enquiry's latest call overall (what admins see).
+    """
+    call = models.OneToOneField('callregister.CallRegister', on_delete=models.CASCADE, related_name='reminder')
+    telecaller = models.ForeignKey(Telecaller, on_delete=models.CASCADE, related_name='reminders')
+    enquiry = models.ForeignKey(Enquiry, on_delete=models.CASCADE, related_name='reminders')
+    call_outcome = models.CharField(max_length=30)
+    follow_up_date = models.DateField()
+    call_created_at = models.DateTimeField()
+    latest_for_enquiry = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['telecaller', 'follow_up_date']),
+            models.Index(fields=['latest_for_enquiry', 'follow_up_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.enquiry_id} - {self.call_outcome} on {self.follow_up_date}"
@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q, Subquery
+from django.utils import timezone
+
+from callregister.models import CallRegister
+from .models import Reminder
+
+# Latest-call outcome -> reminder message
+REMINDER_MESSAGES = {
+    'Follow Up': "Follow-up needed",
+    'walk_in_list': "Walk-in scheduled",
+}
+OVERDUE_MESSAGES = {
+    'Follow Up': "Follow-up overdue",
+    'walk_in_list': "Walk-in overdue",
+}
+
+REFRESH_BATCH_SIZE = 1000
+
+
+def reminder_message(call_outcome, follow_up_date, today):
+    messages = OVERDUE_MESSAGES if follow_up_date < today else REMINDER_MESSAGES
+    return messages.get(call_outcome, REMINDER_MESSAGES['Follow Up'])
+
+
+def latest_call_ids(calls, *group_by):
+    """``MAX(id)`` of ``calls`` per enquiry (and ``group_by`` fields), as a subquery."""
+    return Subquery(
+        calls.order_by().values(*group_by, 'enquiry_id').annotate(latest_id=Max('id')).values('latest_id')
+    )
+
+
+def due_q(start_date, end_date, prefix=''):
+    """Reminder outcomes with a follow-up date up to ``end_date`` (from ``start_date`` when given)."""
+    condition = Q(**{f'{prefix}call_outcome__in': list(REMINDER_MESSAGES)})
+    condition &= Q(**{f'{prefix}follow_up_date__lte': end_date})
+    if start_date:
+        condition &= Q(**{f'{prefix}follow_up_date__gte': start_date})
+    return condition
+
+
+def refresh_reminders(today=None):
+    """
+    Rebuild the ``Reminder`` table: every reminder due up to the maximum
+    look-ahead window, overdue ones included. Returns the number of rows.
+    """
+    today = today or timezone.localdate()
+    horizon = today + timedelta(days=settings.REMINDER_MAX_LOOKAHEAD_DAYS)
+    calls = CallRegister.objects.all()
+
+    rows = (
+        CallRegister.objects
+        .filter(due_q(None, horizon), id__in=latest_call_ids(calls, 'telecaller_id'))
+        .annotate(latest_for_enquiry=Q(id__in=latest_call_ids(calls)))
+        .values_list('id', 'telecaller_id', 'enquiry_id', 'call_outcome', 'follow_up_date', 'created_at', 'latest_for_enquiry')
+    )
+
+    written = 0
+    with transaction.atomic():
+        Reminder.objects.all().delete()
+        batch = []
+        for call_id, telecaller_id, enquiry_id, outcome, follow_up_date, created_at, latest in rows.iterator(chunk_size=REFRESH_BATCH_SIZE):
+            batch.append(Reminder(
+                call_id=call_id, telecaller_id=telecaller_id, enquiry_id=enquiry_id, call_outcome=outcome,
+                follow_up_date=follow_up_date, call_created_at=created_at, latest_for_enquiry=latest,
+            ))
+            if len(batch) >= REFRESH_BATCH_SIZE:
+                Reminder.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            Reminder.objects.bulk_create(batch)
+            written += len(batch)
+    return written
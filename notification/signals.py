@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from callregister.models import CallRegister
+from tellecaller.counters import counters_changed
+from tellecaller.models import Telecaller
+from .events import get_broker, publish, telecaller_channel
+from .reminders import REMINDER_MESSAGES, reminder_message
+
+
+@receiver(post_save, sender=CallRegister)
+def push_reminder(sender, instance, raw=False, **kwargs):
+    """A call that leaves a follow-up/walk-in due within the window becomes a live reminder."""
+    if raw or instance.call_outcome not in REMINDER_MESSAGES or not instance.follow_up_date:
+        return
+    today = timezone.localdate()
+    if instance.follow_up_date > today + timedelta(days=settings.REMINDER_LOOKAHEAD_DAYS):
+        return
+    channel = telecaller_channel(instance.telecaller_id)
+    if not get_broker().wants(channel):
+        return  # nobody listening: don't load the enquiry for nothing
+    publish(channel, "reminder", {
+        "id": instance.id,
+        "enquiry_name": instance.enquiry.candidate_name,
+        "reminder_message": reminder_message(instance.call_outcome, instance.follow_up_date, today),
+        "created_at": instance.created_at,
+        "enquiry_id": instance.enquiry_id,
+    })
+
+
+@receiver(counters_changed)
+def push_counters(sender, changes, **kwargs):
+    for telecaller_id, deltas in changes.items():
+        assigned = deltas.get('assigned_enquiries_count', 0)
+        if assigned > 0:
+            publish(telecaller_channel(telecaller_id), "enquiries_assigned", {"count": assigned})
+
+    def send_current_counters():
+        broker = get_broker()
+        wanted = [t for t in changes if broker.wants(telecaller_channel(t))]
+        if not wanted:
+            return
+        rows = Telecaller.objects.filter(pk__in=wanted).values('id', *Telecaller.COUNTER_FIELDS)
+        for row in rows:
+            broker.publish(telecaller_channel(row.pop('id')), {"type": "counters", "data": row})
+
+    # ✅ Read the new values only after commit, and only for streams that are open
+    transaction.on_commit(send_current_counters)
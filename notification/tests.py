@@ -1,3 +1,67 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
 
-# Create your tests here.
+from django.test import AsyncClient, TestCase
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from branch.models import Branch
+from callregister.models import CallRegister
+from lead.models import Enquiry
+from login.models import Account
+from roles.models import Role
+from tellecaller.models import Telecaller
+from notification.events import EventBus, telecaller_channel
+
+
+class EventStreamTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        role = Role.objects.create(name='Telecaller')
+        branch = Branch.objects.create(branch_name='Main', address='-', city='-', email='main@example.com', contact='0')
+        account = Account.objects.create_user('caller@example.com', 'pw', role)
+        cls.telecaller = Telecaller.objects.create(
+            account=account, branch=branch, email=account.email, name='Caller',
+            contact='0', address='-', role=role,
+        )
+        cls.token = str(RefreshToken.for_user(account).access_token)
+
+    def test_stream_is_refused_under_wsgi(self):
+        response = self.client.get('/api/events/', {'token': self.token})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['code'], 503)
+
+    async def test_stream_opens_with_the_counters_under_asgi(self):
+        response = await AsyncClient().get('/api/events/', {'token': self.token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b'retry: 5000\n\n')
+        self.assertTrue((await anext(chunks)).startswith(b'event: counters\n'))
+        await chunks.aclose()
+
+    def test_events_for_a_closed_loop_drop_the_subscription(self):
+        bus = EventBus()
+        channel = telecaller_channel(self.telecaller.id)
+
+        async def subscribe():
+            return bus.subscribe(channel)
+
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(subscribe())
+        loop.close()
+
+        bus.dispatch(channel, {"type": "reminder", "data": {}})
+        self.assertFalse(bus.has_subscribers(channel))
+
+    def test_reminders_without_listeners_do_not_load_the_enquiry(self):
+        enquiry = Enquiry.objects.create(candidate_name='Lead', phone='9000000000', email='lead@example.com')
+        CallRegister.objects.create(enquiry=enquiry, telecaller=self.telecaller, call_status='contacted',
+                                    call_start_time=timezone.now())
+        call = CallRegister.objects.get()
+        call.call_outcome = 'Follow Up'
+        call.follow_up_date = timezone.localdate() + timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            call.save()
+        self.assertNotIn('enquiry', call._state.fields_cache)
@@ -1,9 +1,10 @@
 from django.urls import path
-from .views import TelecallerRemindersView,TelecallerCallSummaryView,TelecallerDashboardView
+from .views import TelecallerRemindersView,TelecallerCallSummaryView,TelecallerDashboardView,telecaller_events
 
 urlpatterns = [
     path('reminders/', TelecallerRemindersView.as_view(), name='telecaller-reminders'),
     path('dashboard/', TelecallerDashboardView.as_view(), name='telecaller-dashboard'),
     path('calls-summary/',TelecallerCallSummaryView.as_view(),name="tellecaller-calls-summary"),
+    path('events/', telecaller_events, name='telecaller-events'),
 
 ]
\ No newline at end of file
@@ -5,7 +5,10 @@ from datetime import timedelta
 from django.utils import timezone
 from callregister.models import CallRegister
 from tellecaller.models import Telecaller
-from rest_framework.pagination import PageNumberPagination 
+from tellecaller.counters import counter_values, global_counts
+from crmtel.report_cache import cached_report
+from rest_framework.pagination import PageNumberPagination
+from crmtel.pagination import KeysetPaginationMixin, CountStrategyMixin 
 from django.db.models import OuterRef, Subquery
 from callregister.serializers import CallRegisterSerializer
 from callregister.models import CallRegister
@@ -13,10 +16,26 @@ from lead.serializers import Enquiry
 from lead.serializers import EnquirySerializer
 from rest_framework import generics,status
 from rest_framework.generics import ListAPIView
-from django.db.models import Max
+from django.db.models import Max, Q, Count
+from callregister.reports import call_date_q, latest_calls, latest_call_buckets
+from callregister.rollups import telecaller_call_totals
 from django.utils.dateparse import parse_date
-
-class NotificationPagination(PageNumberPagination):
+from django.conf import settings
+from django.db.models import F
+from lead.search import text_search_q
+from .models import Reminder
+from .reminders import due_q, latest_call_ids, reminder_message
+from .events import bus, format_sse, telecaller_channel
+import asyncio
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from login.authentication import CrmJWTAuthentication
+from login.identity import identity_for
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+class NotificationPagination(KeysetPaginationMixin, CountStrategyMixin, PageNumberPagination):
     page_size = 10
     page_size_query_param = 'limit'
     max_page_size = 100
@@ -26,8 +45,9 @@ class NotificationPagination(PageNumberPagination):
             "code": 200,
             "message": "",
             "data": data,
-            "pagination": {
+            "pagination": self.get_cursor_pagination() if self.cursor_mode else {
                 "total": self.page.paginator.count,
+                "totalExact": self.page.paginator.count_is_exact,
                 "page": self.page.number,
                 "limit": self.get_page_size(self.request),
                 "totalPages": self.page.paginator.num_pages,
@@ -35,118 +55,104 @@ class NotificationPagination(PageNumberPagination):
         })
 
 class TelecallerRemindersView(APIView):
+    """
+    Follow-up / walk-in reminders from each enquiry's latest call.
+
+    ``?days=N`` sets the look-ahead window after today (default
+    ``REMINDER_LOOKAHEAD_DAYS``) and ``?overdue=true`` adds reminders whose
+    date has passed. With ``REMINDERS_PRECOMPUTED`` the rows come from the
+    ``Reminder`` table refreshed by ``manage.py refresh_reminders``.
+    """
     permission_classes = [IsAuthenticated]
     pagination_class = NotificationPagination
 
     def get(self, request):
-        user = request.user
-        today = timezone.now().date()
-        tomorrow = today + timedelta(days=1)
-        in_2_days = today + timedelta(days=2)
-        search = request.GET.get("search", "").lower()
-
-        def format_reminder(entry, message):
-            return {
-                "id": entry.id,
-                "enquiry_name": entry.enquiry.candidate_name,
-                "reminder_message": message,
-                "created_at": entry.created_at,
-                "enquiry_id": entry.enquiry.id
-            }
-
-        # Get base queryset
-        base_qs = CallRegister.objects.all()
+        identity = request.crm_identity
+        today = timezone.localdate()
+        search = request.GET.get("search", "").strip()
+        overdue = request.GET.get("overdue", "").lower() in ("1", "true", "yes")
+        try:
+            days = int(request.GET.get("days", settings.REMINDER_LOOKAHEAD_DAYS))
+        except ValueError:
+            return Response({"code": 400, "message": "days must be a whole number", "data": None}, status=400)
+        days = max(0, min(days, settings.REMINDER_MAX_LOOKAHEAD_DAYS))
+        start_date = None if overdue else today
+        end_date = today + timedelta(days=days)
 
         # Filter for telecaller if not admin
-        if user.role.name != "Admin":
-            try:
-                telecaller = Telecaller.objects.get(account=user)
-            except Telecaller.DoesNotExist:
+        telecaller = None
+        if not identity.is_admin:
+            telecaller = identity.telecaller
+            if telecaller is None:
                 return Response({"error": "Only telecallers and admins can access this data."}, status=403)
-            base_qs = base_qs.filter(telecaller=telecaller)
 
-        # Get only the latest CallRegister entry per enquiry
-        latest_ids = base_qs.values('enquiry').annotate(latest_id=Max('id')).values('latest_id')
-        latest_calls = CallRegister.objects.filter(id__in=Subquery(latest_ids))
-
-        # Filter latest calls by outcome and date
-        filtered_qs = latest_calls.filter(
-            call_outcome__in=['Follow Up', 'walk_in_list'],
-            follow_up_date__in=[today, tomorrow, in_2_days]
-        )
-
-        # Format reminders
-        reminders = []
-        for entry in filtered_qs:
-            message = "Walk-in scheduled" if entry.call_outcome == 'walk_in_list' else "Follow-up needed"
-            reminders.append(format_reminder(entry, message))
+        if settings.REMINDERS_PRECOMPUTED:
+            reminders = Reminder.objects.filter(due_q(start_date, end_date))
+            # Admins see each enquiry's latest call overall, telecallers their own latest call
+            reminders = reminders.filter(telecaller=telecaller) if telecaller else reminders.filter(latest_for_enquiry=True)
+            reminders = reminders.annotate(created_at=F('call_created_at')).order_by('-call_created_at', '-call_id')
+            id_field = 'call_id'
+        else:
+            base_qs = CallRegister.objects.all()
+            if telecaller:
+                base_qs = base_qs.filter(telecaller=telecaller)
+            # Get only the latest CallRegister entry per enquiry, then filter by outcome and date
+            reminders = (
+                CallRegister.objects
+                .filter(due_q(start_date, end_date), id__in=latest_call_ids(base_qs))
+                .order_by('-created_at', '-id')
+            )
+            id_field = 'id'
 
-        # Apply search filter
+        # ✅ Search and enquiry names resolved in SQL
+        reminders = reminders.select_related('enquiry')
         if search:
-            reminders = [r for r in reminders if search in r["enquiry_name"].lower()]
+            reminders = reminders.filter(text_search_q(reminders.model, ['enquiry__candidate_name'], search, reminders.db))
+
+        def format_reminder(entry):
+            return {
+                "id": getattr(entry, id_field),
+                "enquiry_name": entry.enquiry.candidate_name,
+                "reminder_message": reminder_message(entry.call_outcome, entry.follow_up_date, today),
+                "created_at": entry.created_at,
+                "enquiry_id": entry.enquiry.id
+            }
 
         # Apply pagination
         paginator = NotificationPagination()
         paginated_reminders = paginator.paginate_queryset(reminders, request, view=self)
 
-        return paginator.get_paginated_response(paginated_reminders)
+        return paginator.get_paginated_response([format_reminder(entry) for entry in paginated_reminders])
 
 class TelecallerDashboardView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
 
-    def get_enquiries_with_latest_call_status(self, telecaller):
-        """
-        Annotate each enquiry assigned to the telecaller with the latest call outcome
-        (regardless of which telecaller made the call).
-        """
-        latest_call_subquery = (
-            CallRegister.objects
-            .filter(enquiry_id=OuterRef('pk'))
-            .order_by('-created_at')  # Use '-id' if 'created_at' not available
-        )
-
-        # Only get enquiries assigned to the logged-in telecaller
-        enquiries_with_latest = (
-            Enquiry.objects
-            .filter(assigned_by=telecaller)
-            .annotate(
-                latest_call_outcome=Subquery(latest_call_subquery.values('call_outcome')[:1])
-            )
-        )
-
-        return enquiries_with_latest
-
+    @cached_report('dashboard')
     def get(self, request):
-        user = request.user
+        identity = request.crm_identity
 
         # Admin dashboard logic
-        if user.role and user.role.name == 'Admin':
+        if identity.is_admin:
+            counts = global_counts()
             return Response({
                 'dashboard_type': 'admin',
-                'total_calls': CallRegister.objects.count(),
-                'total_leads': Enquiry.objects.count(),
-                'total_telecallers': Telecaller.objects.count(),
+                'total_calls': counts['calls'],
+                'total_leads': counts['enquiries'],
+                'total_telecallers': counts['telecallers'],
             })
 
-        # Telecaller dashboard logic
-        try:
-            telecaller = Telecaller.objects.get(account=user)
-        except Telecaller.DoesNotExist:
+        # Telecaller dashboard logic: counters live on the telecaller row
+        telecaller = identity.telecaller
+        if telecaller is None:
             return Response({'error': 'Only telecallers can access dashboard.'}, status=403)
 
-        # Enquiries assigned to telecaller with latest call outcome
-        enquiries = self.get_enquiries_with_latest_call_status(telecaller)
-
-        # Count based on latest call outcome
-        pending_followups = enquiries.filter(latest_call_outcome='Follow Up').count()
-        walkin_list = enquiries.filter(latest_call_outcome='walk_in_list').count()
-
+        counters = counter_values(telecaller)
         return Response({
             'dashboard_type': 'telecaller',
-            'total_calls': CallRegister.objects.filter(telecaller=telecaller).count(),
-            'total_leads': enquiries.count(),  # Count of active enquiries assigned
-            'pending_followups': pending_followups,
-            'walkin_list': walkin_list,
+            'total_calls': counters['calls_count'],
+            'total_leads': counters['assigned_enquiries_count'],  # Count of active enquiries assigned
+            'pending_followups': counters['pending_follow_ups_count'],  # Latest call outcome is Follow Up
+            'walkin_list': counters['pending_walk_ins_count'],
         })
     
 class TelecallerCallSummaryView(ListAPIView):
@@ -154,30 +160,27 @@ class TelecallerCallSummaryView(ListAPIView):
     pagination_class = NotificationPagination
     serializer_class = CallRegisterSerializer
 
-    def get_latest_calls_per_enquiry(self, telecaller, start_date=None, end_date=None):
-        calls_qs = CallRegister.objects.filter(telecaller=telecaller)
+    # ✅ Latest-call buckets shown per telecaller
+    SUMMARY_BUCKETS = {
+        "total_follow_ups": Q(call_outcome='Follow Up'),
+        "contacted": Q(call_status='contacted'),
+        "not_contacted": Q(call_status='not_contacted'),
+        "answered": Q(call_status='Answered'),
+        "not_answered": Q(call_status='Not Answered'),
+        "walk_in_list": Q(call_outcome='walk_in_list'),
+        "won": Q(call_outcome='Won'),
+        "not_intrested": Q(call_outcome__in=['Not Interested', 'Do Not Call']),
+    }
 
+    def get_latest_calls_per_enquiry(self, telecaller, start_date=None, end_date=None):
         # ✅ Apply date filtering ONLY if dates are given
-        if start_date and end_date:
-            calls_qs = calls_qs.filter(created_at__date__range=(start_date, end_date))
-        elif start_date:
-            calls_qs = calls_qs.filter(created_at__date__gte=start_date)
-        elif end_date:
-            calls_qs = calls_qs.filter(created_at__date__lte=end_date)
+        calls_qs = CallRegister.objects.filter(call_date_q(start_date, end_date), telecaller=telecaller)
 
         # ✅ Always return latest call per enquiry from the (possibly filtered) list
-        latest_calls_map = (
-            calls_qs
-            .values('enquiry_id')
-            .annotate(latest_call_id=Max('id'))
-            .values_list('latest_call_id', flat=True)
-        )
-
-        return CallRegister.objects.filter(id__in=list(latest_calls_map))
+        return latest_calls(calls_qs)
 
     def get_queryset(self):
-        user = self.request.user
-        if not user.role or user.role.name != 'Admin':
+        if not self.request.crm_identity.is_admin:
             return CallRegister.objects.none()
 
         report_type = self.request.query_params.get("report", "").lower()
@@ -213,16 +216,10 @@ class TelecallerCallSummaryView(ListAPIView):
             elif report_type == "won":
                 return latest_calls.filter(call_outcome__in=['Won'])
             elif report_type == "totalcalls":
-                all_calls = CallRegister.objects.filter(telecaller=telecaller)
-                if start_date and end_date:
-                    all_calls = all_calls.filter(created_at__date__range=(start_date, end_date))
-                elif start_date:
-                    all_calls = all_calls.filter(created_at__date__gte=start_date)
-                elif end_date:
-                    all_calls = all_calls.filter(created_at__date__lte=end_date)
-                return all_calls
+                return CallRegister.objects.filter(call_date_q(start_date, end_date), telecaller=telecaller)
 
 
+    @cached_report('calls-summary')
     def list(self, request, *args, **kwargs):
         report_type = self.request.query_params.get("report", "").lower()
         telecaller_id = self.request.query_params.get("telecaller_id")
@@ -232,10 +229,13 @@ class TelecallerCallSummaryView(ListAPIView):
         if report_type and telecaller_id:
             return super().list(request, *args, **kwargs)
 
-        if not request.user.role or request.user.role.name != 'Admin':
+        if not request.crm_identity.is_admin:
             return Response({'error': 'Only admin can access this data.'}, status=403)
 
-        queryset = Telecaller.objects.select_related('branch').all()
+        # ✅ total_calls rides along on the telecaller page query, summed from the daily rollups
+        queryset = Telecaller.objects.select_related('branch').annotate(
+            **telecaller_call_totals({'total_calls': {}}, start_date, end_date)
+        ).order_by('id')
 
         # Optional filters
         branch_name = self.request.query_params.get('branch_name', '').strip()
@@ -250,38 +250,90 @@ class TelecallerCallSummaryView(ListAPIView):
             queryset = queryset.filter(name__icontains=search)
 
         queryset = self.paginate_queryset(queryset)
-        response_data = []
-
-        for telecaller in queryset:
-            all_calls = CallRegister.objects.filter(telecaller=telecaller)
-            latest_calls = self.get_latest_calls_per_enquiry(telecaller, start_date, end_date)
 
-            if not latest_calls.exists():
-                continue  # ✅ Valid here — inside the loop
+        # ✅ Latest call per enquiry, bucketed for the whole page in one query
+        page_calls = CallRegister.objects.filter(
+            call_date_q(start_date, end_date),
+            telecaller_id__in=[telecaller.id for telecaller in queryset],
+        )
+        buckets = latest_call_buckets(page_calls, self.SUMMARY_BUCKETS)
 
-            # Optional: filter total_calls by date
-            if start_date and end_date:
-                all_calls = all_calls.filter(created_at__date__range=(start_date, end_date))
-            elif start_date:
-                all_calls = all_calls.filter(created_at__date__gte=start_date)
-            elif end_date:
-                all_calls = all_calls.filter(created_at__date__lte=end_date)
+        response_data = []
+        for telecaller in queryset:
+            if telecaller.id not in buckets:
+                continue  # ✅ No calls in range for this telecaller
 
             summary = {
                 "telecaller_id": telecaller.id,
                 "telecaller_name": telecaller.name,
                 "branch_name": telecaller.branch.branch_name if telecaller.branch else None,
-                "total_calls": all_calls.count(),
-                "total_follow_ups": latest_calls.filter(call_outcome='Follow Up').count(),
-                "contacted": latest_calls.filter(call_status='contacted').count(),
-                "not_contacted": latest_calls.filter(call_status='not_contacted').count(),
-                "answered": latest_calls.filter(call_status='Answered').count(),
-                "not_answered": latest_calls.filter(call_status='Not Answered').count(),
-                "walk_in_list": latest_calls.filter(call_outcome='walk_in_list').count(),
-                "won": latest_calls.filter(call_outcome='Won').count(),
-                "not_intrested": latest_calls.filter(call_outcome__in=['Not Interested', 'Do Not Call']).count(),
+                "total_calls": telecaller.total_calls,
+                **buckets[telecaller.id],
             }
 
             response_data.append(summary)
 
-        return self.get_paginated_response(response_data)
\ No newline at end of file
+        return self.get_paginated_response(response_data)
+
+
+def authenticate_stream(request):
+    """
+    Identity of the JWT user for an event stream, or None. ``EventSource``
+    cannot send headers, so a ``?token=`` access token is accepted besides the
+    usual Authorization header.
+    """
+    authenticator = CrmJWTAuthentication()
+    try:
+        result = authenticator.authenticate(request)
+        if result is None and request.GET.get('token'):
+            validated = authenticator.get_validated_token(request.GET['token'])
+            result = (authenticator.get_user(validated), validated)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return identity_for(result[0]) if result else None
+
+
+async def telecaller_events(request):
+    """
+    Server-sent events for the signed-in telecaller: ``counters`` (dashboard
+    counter values, sent on connect and on every change), ``reminder`` and
+    ``enquiries_assigned``. Needs the ASGI application (crmtel.asgi); under
+    WSGI the stream would hold a worker for as long as the client stays
+    connected, so it is refused.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({
+            "code": 503,
+            "message": "Live events need the ASGI server (crmtel.asgi).",
+            "data": None,
+        }, status=503)
+
+    identity = await sync_to_async(authenticate_stream)(request)
+    if identity is None:
+        return JsonResponse({"code": 401, "message": "Authentication required", "data": None}, status=401)
+
+    telecaller = identity.telecaller
+    if telecaller is None:
+        return JsonResponse({"code": 403, "message": "Only telecallers can subscribe to events.", "data": None}, status=403)
+
+    subscription = bus.subscribe(telecaller_channel(telecaller.id))
+    counters = {field: getattr(telecaller, field) for field in Telecaller.COUNTER_FIELDS}
+
+    async def stream():
+        try:
+            yield "retry: 5000\n\n"
+            yield format_sse({"type": "counters", "data": counters})
+            while True:
+                try:
+                    event = await subscription.get(timeout=settings.SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
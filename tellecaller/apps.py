@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TellecallerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tellecaller'
+
+    def ready(self):
+        from . import signals  # noqa: F401
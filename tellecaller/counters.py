@@ -0,0 +1,184 @@
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
+
+from .models import Telecaller, GlobalCounter
+
+# Global counter name -> model whose rows it counts
+GLOBAL_COUNTERS = {
+    'calls': 'callregister.CallRegister',
+    'enquiries': 'lead.Enquiry',
+    'telecallers': 'tellecaller.Telecaller',
+}
+
+# Latest-call outcome of an assigned enquiry -> pending counter of the assignee
+PENDING_OUTCOME_FIELDS = {
+    'Follow Up': 'pending_follow_ups_count',
+    'walk_in_list': 'pending_walk_ins_count',
+}
+
+# Outcome of a call -> counter of the calling telecaller
+CALL_OUTCOME_FIELDS = {
+    'Follow Up': 'follow_up_calls_count',
+    'walk_in_list': 'walk_in_calls_count',
+}
+
+# Sent after CounterDeltas.apply() with changes={telecaller_id: {field: delta}}
+counters_changed = Signal()
+
+
+class CounterDeltas(Counter):
+    """``(telecaller_id, counter_field) -> delta``, applied with F() updates."""
+
+    def add_pending(self, assigned_by_id, latest_call_outcome, sign=1):
+        field = PENDING_OUTCOME_FIELDS.get(latest_call_outcome)
+        if assigned_by_id is not None and field:
+            self[assigned_by_id, field] += sign
+
+    def add_enquiry(self, assigned_by_id, latest_call_outcome=None, sign=1):
+        if assigned_by_id is None:
+            return
+        self[assigned_by_id, 'assigned_enquiries_count'] += sign
+        self.add_pending(assigned_by_id, latest_call_outcome, sign)
+
+    def add_call(self, telecaller_id, call_outcome, sign=1):
+        if telecaller_id is None:
+            return
+        self[telecaller_id, 'calls_count'] += sign
+        field = CALL_OUTCOME_FIELDS.get(call_outcome)
+        if field:
+            self[telecaller_id, field] += sign
+
+    def apply(self):
+        """
+        One UPDATE per telecaller with a non-zero change, in id order so that
+        concurrent writers lock the rows in the same order and cannot deadlock.
+        """
+        changes = defaultdict(dict)
+        for (telecaller_id, field), delta in sorted(self.items()):
+            if delta:
+                changes[telecaller_id][field] = F(field) + delta
+        for telecaller_id, updates in changes.items():
+            Telecaller.objects.filter(pk=telecaller_id).update(**updates)
+        if changes:
+            counters_changed.send(sender=type(self), changes={
+                telecaller_id: {field: self[telecaller_id, field] for field in updates}
+                for telecaller_id, updates in changes.items()
+            })
+        self.clear()
+
+
+def bump_global(name, delta):
+    """
+    Move a global counter by ``delta`` once the current transaction commits.
+
+    Every write of a model goes through the same counter row; updating it
+    after commit holds that row's lock for one statement instead of for the
+    rest of the writer's transaction, and a rolled back write never counts.
+    A counter that does not exist yet is left alone; :func:`global_counts`
+    creates it from a real count. ``reconcile_counters`` repairs the drift
+    of a process that dies between the commit and the update.
+    """
+    if delta:
+        transaction.on_commit(
+            lambda: GlobalCounter.objects.filter(name=name).update(value=F('value') + delta)
+        )
+
+
+def count_rows(name):
+    return apps.get_model(GLOBAL_COUNTERS[name]).objects.count()
+
+
+def _create_global(name):
+    try:
+        with transaction.atomic():
+            counter, _ = GlobalCounter.objects.get_or_create(name=name, defaults={'value': count_rows(name)})
+    except IntegrityError:
+        counter = GlobalCounter.objects.get(name=name)
+    return counter.value
+
+
+def global_counts():
+    """``{name: value}`` for every global counter, initialising missing ones."""
+    counts = dict(GlobalCounter.objects.filter(name__in=GLOBAL_COUNTERS).values_list('name', 'value'))
+    for name in GLOBAL_COUNTERS:
+        if name not in counts:
+            counts[name] = _create_global(name)
+    return counts
+
+
+def global_count(name):
+    """Value of one global counter, initialising it if missing."""
+    value = GlobalCounter.objects.filter(name=name).values_list('value', flat=True).first()
+    return _create_global(name) if value is None else value
+
+
+# ---------- backfills ----------
+#
+# Denormalised data added after rows already existed is only complete once a
+# deploy has run its backfill (see README). The commands record completion in
+# a ``backfilled:<name>`` GlobalCounter; readers use live queries until then.
+
+TELECALLER_COUNTERS = 'telecaller_counters'  # set by reconcile_counters
+CALL_ROLLUPS = 'call_rollups'  # set by a full rebuild_call_rollups
+
+# Seconds a missing marker is remembered before the database is asked again
+BACKFILL_RECHECK = 60
+
+
+def mark_backfilled(name):
+    GlobalCounter.objects.update_or_create(name=f'backfilled:{name}', defaults={'value': 1})
+    cache.set(f'backfilled:{name}', True, None)
+
+
+def is_backfilled(name):
+    key = f'backfilled:{name}'
+    done = cache.get(key)
+    if done is None:
+        done = GlobalCounter.objects.filter(name=key).exists()
+        cache.set(key, done, None if done else BACKFILL_RECHECK)
+    return done
+
+
+def _count_per_telecaller(queryset, field):
+    """Correlated COUNT of ``queryset`` rows whose ``field`` is the outer telecaller."""
+    counts = (
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(n=Count('pk'))
+        .values('n')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def live_counter_expressions():
+    """``{counter field: expression}`` recounting each Telecaller counter, for ``annotate()``."""
+    Enquiry = apps.get_model('lead.Enquiry')
+    CallRegister = apps.get_model('callregister.CallRegister')
+    expressions = {
+        'assigned_enquiries_count': _count_per_telecaller(Enquiry.objects.all(), 'assigned_by'),
+        'calls_count': _count_per_telecaller(CallRegister.objects.all(), 'telecaller'),
+    }
+    for outcome, field in PENDING_OUTCOME_FIELDS.items():
+        expressions[field] = _count_per_telecaller(Enquiry.objects.filter(latest_call_outcome=outcome), 'assigned_by')
+    for outcome, field in CALL_OUTCOME_FIELDS.items():
+        expressions[field] = _count_per_telecaller(CallRegister.objects.filter(call_outcome=outcome), 'telecaller')
+    return expressions
+
+
+def counter_values(telecaller):
+    """
+    ``{counter field: value}`` for ``telecaller``: its counter columns once
+    ``reconcile_counters`` has filled them, one live recount until then.
+    """
+    if is_backfilled(TELECALLER_COUNTERS):
+        return {field: getattr(telecaller, field) for field in Telecaller.COUNTER_FIELDS}
+    live = {f'live_{field}': expression for field, expression in live_counter_expressions().items()}
+    row = Telecaller.objects.filter(pk=telecaller.pk).values(**live).get()
+    return {field: row[f'live_{field}'] for field in Telecaller.COUNTER_FIELDS}
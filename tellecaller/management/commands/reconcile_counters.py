@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tellecaller.counters import (
+    GLOBAL_COUNTERS, TELECALLER_COUNTERS, count_rows, live_counter_expressions, mark_backfilled,
+)
+from tellecaller.models import Telecaller, GlobalCounter
+
+
+class Command(BaseCommand):
+    help = "Compare Telecaller and global dashboard counters with real counts and repair any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without fixing it")
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        expected = live_counter_expressions()
+
+        drifted = 0
+        telecallers = Telecaller.objects.annotate(**{f'expected_{f}': e for f, e in expected.items()})
+        for telecaller in telecallers.iterator(chunk_size=500):
+            changes = {}
+            for field in expected:
+                actual, correct = getattr(telecaller, field), getattr(telecaller, f'expected_{field}')
+                if actual != correct:
+                    self.stdout.write(f"Telecaller {telecaller.id} {field}: {actual} -> {correct}")
+                    changes[field] = correct
+            if changes:
+                drifted += 1
+                if not dry_run:
+                    Telecaller.objects.filter(pk=telecaller.pk).update(**changes)
+
+        for name in GLOBAL_COUNTERS:
+            with transaction.atomic():
+                counter = GlobalCounter.objects.select_for_update().filter(name=name).first()
+                correct = count_rows(name)
+                if counter is None or counter.value != correct:
+                    self.stdout.write(f"Global {name}: {counter.value if counter else 'missing'} -> {correct}")
+                    drifted += 1
+                    if not dry_run:
+                        GlobalCounter.objects.update_or_create(name=name, defaults={'value': correct})
+
+        if not dry_run:
+            mark_backfilled(TELECALLER_COUNTERS)
+
+        verb = "Found" if dry_run else "Fixed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} drift in {drifted} counter rows."))
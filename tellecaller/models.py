@@ -15,6 +15,30 @@ class Telecaller(models.Model):
     status = models.CharField(max_length=20, choices=[('active', 'Active'), ('deactivated', 'Deactivated')], default='active')
     created_date = models.DateTimeField(default=now)
     created_by = models.ForeignKey(Account, on_delete=models.SET_NULL, null=True, blank=True, related_name='created_telecallers')
+    # Lead rotation: position of the last lead assignment, used to break load ties across imports
+    assignment_sequence = models.PositiveBigIntegerField(default=0)
+
+    # Dashboard counters, kept in step by tellecaller.counters (repair: manage.py reconcile_counters)
+    assigned_enquiries_count = models.IntegerField(default=0, editable=False)
+    pending_follow_ups_count = models.IntegerField(default=0, editable=False)  # assigned enquiries whose latest call is a follow-up
+    pending_walk_ins_count = models.IntegerField(default=0, editable=False)  # ... whose latest call is walk_in_list
+    calls_count = models.IntegerField(default=0, editable=False)
+    follow_up_calls_count = models.IntegerField(default=0, editable=False)
+    walk_in_calls_count = models.IntegerField(default=0, editable=False)
+
+    COUNTER_FIELDS = (
+        'assigned_enquiries_count', 'pending_follow_ups_count', 'pending_walk_ins_count',
+        'calls_count', 'follow_up_calls_count', 'walk_in_calls_count',
+    )
+
+    def save(self, *args, **kwargs):
+        if kwargs.get('update_fields') is None and not self._state.adding and not kwargs.get('force_insert'):
+            # Counters only move through F() updates; never write back a stale copy
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
     def delete(self, *args, **kwargs):
         account = self.account
@@ -24,3 +48,16 @@ class Telecaller(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class GlobalCounter(models.Model):
+    """
+    Named counters: whole-table row counts for the admin dashboard and
+    ``backfilled:<name>`` markers (see tellecaller.counters), and the report
+    cache version (crmtel.report_cache).
+    """
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
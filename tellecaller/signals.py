@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from crmtel.report_cache import invalidate_reports_on_commit
+from .counters import bump_global
+from .models import Telecaller
+
+
+@receiver(post_save, sender=Telecaller)
+def count_telecaller(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        bump_global('telecallers', 1)
+
+
+@receiver(post_delete, sender=Telecaller)
+def uncount_telecaller(sender, instance, **kwargs):
+    bump_global('telecallers', -1)
+
+
+@receiver(post_save, sender=Telecaller)
+@receiver(post_delete, sender=Telecaller)
+def invalidate_cached_reports(sender, raw=False, **kwargs):
+    if not raw:
+        invalidate_reports_on_commit()
@@ -1,3 +1,129 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from branch.models import Branch
+from callregister.models import CallRegister
+from lead.models import Enquiry
+from login.models import Account
+from roles.models import Role
+from tellecaller.counters import (
+    TELECALLER_COUNTERS, CounterDeltas, counter_values, global_count, global_counts, is_backfilled,
+)
+from tellecaller.models import Telecaller
+
+
+class CounterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        role = Role.objects.create(name='Telecaller')
+        branch = Branch.objects.create(branch_name='Main', address='-', city='-', email='main@example.com', contact='0')
+        cls.telecallers = []
+        for i in range(2):
+            account = Account.objects.create_user(f'caller{i}@example.com', 'pw', role)
+            cls.telecallers.append(Telecaller.objects.create(
+                account=account, branch=branch, email=account.email, name=f'Caller {i}',
+                contact='0', address='-', role=role,
+            ))
+
+    def setUp(self):
+        cache.clear()
+        global_counts()  # create the global counters before counting writes against them
+
+    def assert_no_drift(self):
+        out = StringIO()
+        call_command('reconcile_counters', '--dry-run', stdout=out)
+        self.assertIn('Found drift in 0 counter rows.', out.getvalue(), out.getvalue())
+
+    def counters(self, telecaller):
+        telecaller.refresh_from_db()
+        return {field: getattr(telecaller, field) for field in Telecaller.COUNTER_FIELDS}
+
+    def call(self, enquiry, telecaller, outcome):
+        return CallRegister.objects.create(
+            enquiry=enquiry, telecaller=telecaller, call_status='contacted',
+            call_outcome=outcome, call_start_time=timezone.now(),
+        )
+
+    def test_creates_updates_and_deletes_match_a_recount(self):
+        first, second = self.telecallers
+        with self.captureOnCommitCallbacks(execute=True):
+            enquiries = [
+                Enquiry.objects.create(candidate_name=f'Lead {i}', phone=f'900000000{i}',
+                                       email='lead@example.com', assigned_by=first)
+                for i in range(3)
+            ]
+            self.call(enquiries[0], first, 'Interested')
+            follow_up = self.call(enquiries[0], first, 'Follow Up')
+            walk_in = self.call(enquiries[1], second, 'walk_in_list')
+
+            follow_up.call_outcome = 'walk_in_list'
+            follow_up.save()
+            walk_in.telecaller = first
+            walk_in.save()
+            enquiries[2].assigned_by = second
+            enquiries[2].save()
+        self.assert_no_drift()
+        self.assertEqual(self.counters(first), {
+            'assigned_enquiries_count': 2, 'pending_follow_ups_count': 0, 'pending_walk_ins_count': 2,
+            'calls_count': 3, 'follow_up_calls_count': 0, 'walk_in_calls_count': 2,
+        })
+        self.assertEqual(global_counts()['calls'], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            walk_in.delete()
+            enquiries[0].delete()  # and its two calls
+        self.assert_no_drift()
+        self.assertEqual(self.counters(first)['calls_count'], 0)
+        self.assertEqual(self.counters(second)['assigned_enquiries_count'], 1)
+        self.assertEqual(global_counts(), {'calls': 0, 'enquiries': 2, 'telecallers': 2})
+
+    def test_global_counters_move_when_the_write_commits(self):
+        before = global_count('enquiries')
+        with self.captureOnCommitCallbacks(execute=True):
+            Enquiry.objects.create(candidate_name='Lead', phone='9000000000', email='lead@example.com')
+            self.assertEqual(global_count('enquiries'), before)
+            try:
+                with transaction.atomic():
+                    Enquiry.objects.create(candidate_name='Lead', phone='9000000001', email='lead@example.com')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(global_count('enquiries'), before + 1)
+        self.assert_no_drift()
+
+    def test_telecaller_rows_are_updated_in_id_order(self):
+        deltas = CounterDeltas()
+        for telecaller in reversed(self.telecallers):
+            deltas.add_call(telecaller.id, 'Follow Up')
+        with CaptureQueriesContext(connection) as queries:
+            deltas.apply()
+        updated = [q['sql'] for q in queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updated), 2)
+        self.assertTrue(updated[0].endswith(f'= {self.telecallers[0].id}'), updated[0])
+        self.assertTrue(updated[1].endswith(f'= {self.telecallers[1].id}'), updated[1])
+
+    def test_counters_are_recounted_until_reconciled(self):
+        telecaller = self.telecallers[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            enquiry = Enquiry.objects.create(candidate_name='Lead', phone='9000000000',
+                                             email='lead@example.com', assigned_by=telecaller)
+            self.call(enquiry, telecaller, 'Follow Up')
+        # Rows that existed before the counter columns did
+        Telecaller.objects.filter(pk=telecaller.pk).update(calls_count=0, assigned_enquiries_count=0)
+        telecaller.refresh_from_db()
+
+        live = counter_values(telecaller)
+        self.assertEqual((live['calls_count'], live['assigned_enquiries_count']), (1, 1))
 
-# Create your tests here.
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertTrue(is_backfilled(TELECALLER_COUNTERS))
+        telecaller.refresh_from_db()
+        with self.assertNumQueries(0):
+            self.assertEqual(counter_values(telecaller), live)